@@ -1,79 +1,103 @@
+import argparse
 import json
 import os
 
-def check_affordability(property_price, yearly_salary_gross, max_down_payment):
+import numpy as np
+import pandas as pd
+
+from engine.filters import EXCLUDED_TYPES, drop_excluded_types
+from engine.finance import ScenarioGrid, evaluate_scenarios
+
+# Rates for the sensitivity sweep at the end of the report
+SWEEP_RATES = [0.05, 0.055, 0.06, 0.065, 0.07, 0.075, 0.08]
+
+
+def check_affordability(cube, yearly_salary_gross, max_down_payment, max_dti=0.43):
+    """
+    (N, M) masks for every candidate under every scenario in `cube`.
+    """
     gross_monthly = yearly_salary_gross / 12
-    max_monthly_total_debt = gross_monthly * 0.43 
-    required_down_payment_fha = property_price * 0.035
-    required_down_payment_conv = property_price * 0.03
-    
     return {
         "gross_monthly_income": gross_monthly,
-        "max_allowable_dti_payment": max_monthly_total_debt,
-        "fha_down_payment": required_down_payment_fha,
-        "conv_down_payment": required_down_payment_conv,
-        "can_afford_down_fha": required_down_payment_fha <= max_down_payment,
-        "can_afford_down_conv": required_down_payment_conv <= max_down_payment
+        "max_allowable_dti_payment": gross_monthly * max_dti,
+        "can_afford_down": cube['down_payment'] <= max_down_payment,
+        "can_afford_monthly": cube['total_monthly_cost'] <= gross_monthly * max_dti,
     }
 
-def analyze():
-    with open("data/top_10_winners.json", "r") as f:
-        data = json.load(f)
-        
-    salary = 70000
-    down = 3000
-    
+
+def analyze(path="data/top_10_winners.json", salary=70000, down=3000):
+    with open(path, "r") as f:
+        data = pd.DataFrame(json.load(f))
+
+    rate = float(os.getenv("MORTGAGE_INTEREST_RATE", "0.06"))
+
     print(f"--- FINANCIAL CONSTRAINTS ---")
     print(f"Salary: ${salary:,.0f} / year")
     print(f"Max Down Payment: ${down:,.0f}")
-    
-    viable_homes = []
-    
-    for house in data:
-        # FILTER 1: Exclude Manufactured Homes. 
-        # As you discovered, they are frequently in 55+ parks and have hidden "Lot Rents" 
-        # (like the $89/mo promo in your screenshot) which destroy the equity creation model.
-        if house.get('property_type') in ['Manufactured', 'Mobile']:
-            print(f"Skipping {house.get('address', house.get('house_id'))} (Reason: Manufactured/55+ Risk)")
-            continue
-            
-        # FILTER 2: Exclude Vacant Land. You can't live there easily and standard FHA/Conv loans don't apply.
-        if house.get('property_type') == 'Land':
-            print(f"Skipping {house.get('address', house.get('house_id'))} (Reason: Vacant Land)")
-            continue
-            
-        stats = check_affordability(house['price'], salary, down)
-        
-        # Consider homes we can afford the down payment on 
-        # (even if it's slightly over, we can negotiate the price down!)
-        # Let's look for homes priced under $110,000 where we could aggressively negotiate down to $100k.
-        if house['price'] <= 110000 and house['total_monthly_cost'] <= stats['max_allowable_dti_payment']:
-            viable_homes.append({
-                "address": house.get("address", house.get("house_id")),
-                "price": house['price'],
-                "undervaluation": house['undervaluation_amount'],
-                "alpha_pct": house['undervaluation_pct'],
-                "monthly_cost": house['total_monthly_cost'],
-                "down_3pct": stats['conv_down_payment'],
-                "dti": (house['total_monthly_cost'] / stats['gross_monthly_income']) * 100,
-                "type": house.get('property_type')
-            })
-            
-    viable_homes = sorted(viable_homes, key=lambda x: x['alpha_pct'], reverse=True)
-    
+
+    if 'property_type' not in data:
+        data['property_type'] = None
+    homes, excluded = drop_excluded_types(data)
+    for _, house in excluded.iterrows():
+        print(f"Skipping {house.get('address', house.get('house_id'))} (Reason: {EXCLUDED_TYPES[house['property_type']]})")
+
+    # FHA (3.5% down) and conventional (3% down) at today's rate, in one pass
+    grid = ScenarioGrid.product(rates=[rate], programs=('fha', 'conventional'))
+    cube = evaluate_scenarios(homes, grid)
+    conventional = grid.index_of('conventional')
+    stats = check_affordability(cube, salary, down)
+
+    # Consider homes we can afford the monthly payment on with conventional 3% down
+    # (even if the down payment is slightly over, we can negotiate the price down!)
+    # Let's look for homes priced under $110,000 where we could aggressively negotiate down to $100k.
+    viable = (homes['price'].to_numpy() <= 110000) & stats['can_afford_monthly'][:, conventional]
+    # Equity and alpha under the same conventional scenario, so PMI counts against them
+    # (the exported undervaluation_* columns assume 100% financing with no PMI)
+    conventional_metrics = cube.scenario_frame(conventional)[viable]
+    order = np.argsort(-conventional_metrics['undervaluation_pct'].to_numpy(), kind='stable')
+    viable_homes = homes[viable].iloc[order]
+    conventional_metrics = conventional_metrics.iloc[order]
+
     print(f"\n--- VIABLE HOMES FOUND: {len(viable_homes)} ---")
-    for idx, vh in enumerate(viable_homes):
-        print(f"\nRank #{idx+1}: {vh['address']} ({vh['type']})")
-        print(f"  Listed Price: ${vh['price']:,.0f} (Need to negotiate down to $100k for 3% down = $3k limit)")
-        print(f"  Down Payment if bought at $100k: $3,000")
-        print(f"  Total PITI+HOA (approx): ${vh['monthly_cost']:,.0f}/mo")
-        print(f"  DTI Ratio: {vh['dti']:.1f}% (Max 43%)")
-        print(f"  Instant Equity Creation: ${vh['undervaluation']:,.0f}")
-        print(f"  Alpha Score: {vh['alpha_pct']:.1f}%")
-        
-    if not viable_homes:
+    for idx, (house, metrics) in enumerate(zip(viable_homes.to_dict('records'),
+                                               conventional_metrics.to_dict('records'))):
+        cost = metrics['total_monthly_cost']
+        print(f"\nRank #{idx+1}: {house.get('address', house.get('house_id'))} ({house.get('property_type')})")
+        print(f"  Listed Price: ${house['price']:,.0f} (Need to negotiate down to $100k for 3% down = $3k limit)")
+        print(f"  Down Payment at list price: ${metrics['down_payment']:,.0f} (at $100k: $3,000)")
+        print(f"  Total PITI+HOA+PMI (approx): ${cost:,.0f}/mo")
+        print(f"  DTI Ratio: {cost / stats['gross_monthly_income'] * 100:.1f}% (Max 43%)")
+        print(f"  Instant Equity Creation (conventional 3% down): ${metrics['undervaluation_amount']:,.0f}")
+        print(f"  Alpha Score (conventional 3% down): {metrics['undervaluation_pct']:.1f}%")
+
+    if not len(viable_homes):
         print("\nNo viable Single Family/Condos found under the budget constraint in the current Top 10.")
         print("Recommendation: You need to expand the search radius, increase the limit on RentCast, or look for FHA Down Payment Assistance programs (which can cover the 3.5% down for you).")
 
+    if len(homes):
+        # Rate sensitivity: every rate x program in one cube
+        sweep = ScenarioGrid.product(rates=SWEEP_RATES, programs=('fha', 'conventional'))
+        sweep_cube = evaluate_scenarios(homes, sweep)
+        sweep_stats = check_affordability(sweep_cube, salary, down)
+        best = sweep_cube.rankings(top_n=1, mask=sweep_stats['can_afford_monthly'])[0]
+        print(f"\n--- RATE SENSITIVITY ({len(homes)} homes x {len(sweep)} scenarios) ---")
+        for scenario, label in enumerate(sweep.labels()):
+            affordable = int(sweep_stats['can_afford_monthly'][:, scenario].sum())
+            line = f"  {label}: {affordable} within DTI"
+            if affordable:
+                top = homes.iloc[best[scenario]]
+                line += (f", best {top.get('address', top.get('house_id'))} "
+                         f"({sweep_cube['undervaluation_pct'][best[scenario], scenario]:.1f}% alpha)")
+            print(line)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py analyze",
+                                     description="Which of the exported winners can this budget finance?")
+    parser.add_argument("--input", default="data/top_10_winners.json", help="Exported leaderboard JSON")
+    parser.add_argument("--salary", type=float, default=70000, help="Gross yearly salary")
+    parser.add_argument("--cash", type=float, default=3000, help="Cash available for the down payment")
+    args = parser.parse_args(argv)
+    analyze(args.input, salary=args.salary, down=args.cash)
+
 if __name__ == "__main__":
-    analyze()
+    main()
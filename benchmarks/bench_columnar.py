@@ -0,0 +1,122 @@
+"""
+Load-time and peak-RSS comparison: CSV vs. the columnar format.
+
+Builds an N-row history by tiling data/housing_data_tampa.csv, converts it
+with engine.columnar, then loads each format in a fresh subprocess so the
+peak RSS of one does not pollute the other.
+
+Usage:
+    python benchmarks/bench_columnar.py --rows 10000000 --output bench_columnar.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from engine.columnar import convert_csv
+
+TRAINING_PROJECTION = ['sqft', 'beds', 'baths', 'neighborhood_id', 'days_since_start', 'price']
+
+# Runs in a child process; prints one JSON line
+LOADER_SCRIPT = r"""
+import json, resource, sys, time
+sys.path.insert(0, {repo_root!r})
+import pandas as pd
+from engine.columnar import load_columnar
+
+started = time.perf_counter()
+if {fmt!r} == 'csv':
+    df = pd.read_csv({path!r})
+    df['date'] = pd.to_datetime(df['date'])
+    df['days_since_start'] = (df['date'] - df['date'].min()).dt.days
+else:
+    df = load_columnar({path!r}, columns={columns!r})
+# Touch every value so memory-mapped pages are actually read
+checksum = float(df.select_dtypes('number').sum().sum())
+elapsed = time.perf_counter() - started
+try:
+    # VmHWM resets on exec; ru_maxrss can carry over the parent's high-water mark
+    with open('/proc/self/status') as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM'))
+except OSError:
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'seconds': elapsed, 'peak_rss_mb': peak_kb / 1024, 'rows': len(df), 'columns': len(df.columns)}}))
+"""
+
+
+def build_csv(path, rows, seed=42, block_rows=500_000):
+    """
+    Tile the sample history up to `rows`, jittering numerics so the data is not trivially repetitive.
+    """
+    base = pd.read_csv(os.path.join(REPO_ROOT, "data", "housing_data_tampa.csv"))
+    rng = np.random.default_rng(seed)
+    written = 0
+    while written < rows:
+        n = min(block_rows, rows - written)
+        positions = np.arange(written, written + n)
+        block = base.iloc[positions % len(base)].reset_index(drop=True)
+        copy_no = pd.Series(positions // len(base)).astype(str)
+        block['house_id'] = block['house_id'] + "_" + copy_no
+        for column in ['sqft', 'price', 'lat', 'long']:
+            block[column] = block[column] * rng.uniform(0.99, 1.01, n)
+        block.to_csv(path, mode='w' if written == 0 else 'a', header=written == 0, index=False)
+        written += n
+
+
+def run_loader(fmt, path, columns=None):
+    script = LOADER_SCRIPT.format(repo_root=REPO_ROOT, fmt=fmt, path=path, columns=columns)
+    output = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=10_000_000)
+    parser.add_argument('--workdir', default=None, help="Where to write the generated files (default: temp dir)")
+    parser.add_argument('--output', default=None, help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_columnar_")
+    os.makedirs(workdir, exist_ok=True)
+    csv_path = os.path.join(workdir, "history.csv")
+    columnar_path = os.path.join(workdir, "history.npcol")
+
+    print(f"Generating {args.rows:,} rows in {workdir}...")
+    build_csv(csv_path, args.rows)
+
+    started = time.perf_counter()
+    convert_csv(csv_path, columnar_path)
+    convert_seconds = time.perf_counter() - started
+
+    results = {
+        'rows': args.rows,
+        'convert_seconds': convert_seconds,
+        'csv_bytes': os.path.getsize(csv_path),
+        'columnar_bytes': sum(os.path.getsize(os.path.join(columnar_path, f)) for f in os.listdir(columnar_path)),
+        'csv_full': run_loader('csv', csv_path),
+        'columnar_full': run_loader('columnar', columnar_path),
+        'columnar_training_projection': run_loader('columnar', columnar_path, TRAINING_PROJECTION),
+    }
+
+    for name in ['csv_full', 'columnar_full', 'columnar_training_projection']:
+        r = results[name]
+        print(f"{name:30s} {r['seconds']:8.2f}s  peak RSS {r['peak_rss_mb']:9.1f} MB  ({r['columns']} columns)")
+    print(f"Conversion took {convert_seconds:.1f}s; "
+          f"{results['csv_bytes'] / 1e6:.0f} MB CSV -> {results['columnar_bytes'] / 1e6:.0f} MB columnar")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,423 @@
+"""
+End-to-end performance benchmark on synthetic markets.
+
+For each scenario (history rows x neighborhood clusters) a fresh worker process:
+- generates the history with data/generator.py
+- times UndervaluationEngine.run_pipeline
+- times evaluate_candidates, split into model scoring, finance math and the
+  LLM stage (with a stub evaluator, so no OpenAI calls are made)
+- times evaluate_candidate_stream over the same candidates in fixed-size chunks
+- times a financing-scenario sweep (engine.finance) over every scored candidate
+- times RentCastClient._normalize_listings on RentCast-shaped raw listings
+- times one cold and one warm daemon cycle (engine.daemon.run_scan_cycle) against local
+  stand-ins for the RentCast API and the Discord webhook
+and reports its peak RSS. Each scenario runs in its own process so peak RSS
+is not inherited from a bigger one.
+
+Results are written as JSON (with the git commit and library versions) so runs
+from two commits can be diffed with --compare.
+
+Usage:
+    python benchmarks/bench_pipeline.py --output bench_pipeline.json
+    python benchmarks/bench_pipeline.py --scenarios 1000x10,100000x10,100000x1000
+    python benchmarks/bench_pipeline.py --output new.json --compare old.json
+    python benchmarks/bench_pipeline.py --low-memory --compare default.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+DEFAULT_SCENARIOS = "1000x10,100000x100,1000000x1000"
+
+# Stages compared by --compare; a stage this much slower than the baseline is flagged
+COMPARED_STAGES = ['generate', 'run_pipeline', 'model_scoring', 'finance', 'llm_stage', 'evaluate_candidates',
+                   'evaluate_candidate_stream', 'finance_grid', 'normalize_listings', 'daemon_cycle_cold', 'daemon_cycle_warm']
+REGRESSION_RATIO = 1.2
+
+# Chunk size for the evaluate_candidate_stream stage
+STREAM_CHUNK_ROWS = 50000
+
+# Financing sweep for the finance_grid stage: 11 rates x 2 terms x 2 programs
+GRID_RATES = [0.04 + 0.005 * step for step in range(11)]
+GRID_TERMS = (15, 30)
+GRID_PROGRAMS = ('fha', 'conventional')
+
+
+def parse_scenarios(spec):
+    """
+    "1000x10,100000x100" -> [(1000, 10), (100000, 100)]
+    """
+    scenarios = []
+    for item in spec.split(','):
+        rows, clusters = item.lower().strip().split('x')
+        scenarios.append((int(float(rows)), int(clusters)))
+    return scenarios
+
+
+def memory_mb():
+    """
+    Current and peak resident set size of this process, in MB.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            status = dict(line.split(':', 1) for line in f if ':' in line)
+        return int(status['VmRSS'].split()[0]) / 1024, int(status['VmHWM'].split()[0]) / 1024
+    except (OSError, KeyError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return peak, peak
+
+
+class StageTimer:
+    """
+    Collects wall time and RSS per named stage. Fast stages can be repeated;
+    the best and median runs are both kept.
+    """
+    def __init__(self, verbose=False):
+        self.stages = {}
+        self.verbose = verbose
+
+    def run(self, name, fn, repeat=1, rows=None):
+        timings = []
+        result = None
+        for _ in range(repeat):
+            with self._quiet():
+                started = time.perf_counter()
+                result = fn()
+                timings.append(time.perf_counter() - started)
+        timings.sort()
+        rss, peak = memory_mb()
+        stage = {
+            'seconds': timings[0],
+            'median_seconds': timings[len(timings) // 2],
+            'repeat': repeat,
+            'rss_mb': rss,
+            'peak_rss_mb': peak,
+        }
+        if rows:
+            stage['rows'] = rows
+            stage['rows_per_second'] = rows / timings[0] if timings[0] > 0 else None
+        self.stages[name] = stage
+        print(f"  {name:26s} {timings[0]:9.3f}s  (RSS {rss:7.1f} MB)", file=sys.stderr)
+        return result
+
+    @contextlib.contextmanager
+    def _quiet(self):
+        # The engine and daemon narrate every step; keep the benchmark output readable
+        if self.verbose:
+            yield
+            return
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            yield
+
+
+class StubLLMEvaluator:
+    """
+    Stands in for LLMPropertyEvaluator: a fixed repair estimate after an optional
+    simulated network latency, run with the same bounded concurrency.
+    """
+    def __init__(self, latency_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.calls = 0
+
+    def evaluate_property(self, property_data):
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        self.calls += 1
+        return {"repair_cost_estimate": 10000, "reasoning": "Benchmark stub estimate."}
+
+    def evaluate_properties(self, properties, max_concurrency=4):
+        if not properties:
+            return []
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(properties)))) as pool:
+            return list(pool.map(self.evaluate_property, properties))
+
+
+def latest_listings(history):
+    """
+    Each house's most recent event, shaped like the daemon's candidate frames.
+    """
+    latest = history.sort_values('date').groupby('house_id').tail(1).reset_index(drop=True)
+    latest = latest.drop(columns=['is_undervalued'])
+    latest['year_built'] = 1960 + (latest.index.values * 7) % 64
+    latest['days_on_market'] = (latest.index.values * 13) % 200
+    latest['property_type'] = 'Single Family'
+    latest['description'] = 'Benchmark listing.'
+    return latest
+
+
+def to_rentcast_items(listings):
+    """
+    Raw RentCast-style items for the normalizer. A few are land or stale listings
+    so the filter branches are exercised too.
+    """
+    items = []
+    for position, row in enumerate(listings.itertuples(index=False)):
+        items.append({
+            'id': row.house_id,
+            'address': row.address,
+            'zipCode': f"33{600 + row.neighborhood_id % 100}",
+            'latitude': row.lat,
+            'longitude': row.long,
+            'squareFootage': row.sqft,
+            'bedrooms': row.beds,
+            'bathrooms': row.baths,
+            'hoaFee': row.hoa_fee,
+            'yearBuilt': row.year_built,
+            'daysOnMarket': row.days_on_market,
+            'propertyType': 'Land' if position % 100 == 0 else row.property_type,
+            'description': row.description,
+            'price': row.price,
+        })
+    return items
+
+
+@contextlib.contextmanager
+def stand_in_servers(items):
+    """
+    Local stand-ins for the RentCast listings endpoint (paginated with limit/offset)
+    and the Discord webhook (always 204). Yields (rentcast_base_url, webhook_url).
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            offset = int(query.get('offset', ['0'])[0])
+            limit = int(query.get('limit', ['50'])[0])
+            body = json.dumps(items[offset:offset + limit]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        yield base_url, f"{base_url}/webhook"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def run_scenario(rows, clusters, n_jobs=1, repeat=3, top_n=10, llm_latency_seconds=0.0, seed=42, verbose=False,
+                 low_memory=False):
+    """
+    Benchmark one scenario in this process and return its result dict.
+    """
+    from data.generator import generate_synthetic_data
+    from engine.api_client import RentCastClient
+    from engine.discovery_engine import UndervaluationEngine
+    from engine.finance import ScenarioGrid, evaluate_scenarios
+    from engine.listing_store import ListingStore
+    from engine.llm_cache import LLMResponseCache
+    from engine import daemon
+
+    timer = StageTimer(verbose=verbose)
+    # The generator averages three sale events per house
+    houses = max(1, rows // 3)
+    history = timer.run('generate', lambda: generate_synthetic_data(
+        num_houses=houses, num_neighborhoods=clusters, seed=seed, end_date=datetime(2026, 1, 1)
+    ))
+    candidates = latest_listings(history)
+
+    stub_llm = StubLLMEvaluator(latency_seconds=llm_latency_seconds)
+    engine = UndervaluationEngine(data=history, llm_evaluator=stub_llm, assign_clusters='always',
+                                  low_memory=low_memory)
+    del history
+    timer.run('run_pipeline', lambda: engine.run_pipeline(n_jobs=n_jobs, use_snapshot=False), rows=len(engine.df))
+
+    # evaluate_candidates, stage by stage and as a whole
+    predicted = timer.run('model_scoring', lambda: engine.predict_candidates(candidates),
+                          repeat=repeat, rows=len(candidates))
+    scored = timer.run('finance', lambda: engine.add_finance_columns(predicted.copy()),
+                       repeat=repeat, rows=len(candidates))
+    timer.run('llm_stage', lambda: engine.select_top_candidates(scored, top_n=top_n), repeat=repeat)
+    timer.run('evaluate_candidates', lambda: engine.evaluate_candidates(candidates, top_n=top_n),
+              repeat=repeat, rows=len(candidates))
+    chunk_rows = STREAM_CHUNK_ROWS
+    timer.run('evaluate_candidate_stream', lambda: engine.evaluate_candidate_stream(
+        (candidates.iloc[start:start + chunk_rows] for start in range(0, len(candidates), chunk_rows)),
+        top_n=top_n
+    ), repeat=repeat, rows=len(candidates))
+
+    grid = ScenarioGrid.product(rates=GRID_RATES, terms=GRID_TERMS, programs=GRID_PROGRAMS)
+    timer.run('finance_grid', lambda: evaluate_scenarios(scored, grid).rankings(top_n=top_n),
+              repeat=repeat, rows=len(scored) * len(grid))
+
+    items = to_rentcast_items(candidates)
+    client = RentCastClient("benchmark-key", base_url="http://127.0.0.1:9")
+    timer.run('normalize_listings', lambda: client._normalize_listings(items), repeat=repeat, rows=len(items))
+
+    # One daemon cycle: the daemon pages through at most 500 listings per scan
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as workdir, \
+            stand_in_servers(items[:500]) as (rentcast_url, webhook_url):
+        daemon.DISCORD_WEBHOOK_URL = webhook_url
+        client = RentCastClient("benchmark-key", base_url=rentcast_url, requests_per_second=1000)
+        store = ListingStore(os.path.join(workdir, "listings.db"))
+        llm_cache = LLMResponseCache(path=os.path.join(workdir, "llm_cache.json"))
+        # The cycle writes its champion and leaderboard files relative to the working directory
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            # Cold: every listing is new and the first champion triggers an alert.
+            # Warm: same listings, so scores come from the store and the champion holds.
+            champion = timer.run('daemon_cycle_cold', lambda: daemon.run_scan_cycle(engine, client, store, llm_cache, None))
+            timer.run('daemon_cycle_warm', lambda: daemon.run_scan_cycle(engine, client, store, llm_cache, champion))
+        finally:
+            os.chdir(previous_cwd)
+            store.close()
+            client.transport.close()
+
+    _, peak = memory_mb()
+    return {
+        'scenario': f"{rows}x{clusters}",
+        'rows': len(engine.df),
+        'houses': houses,
+        'clusters': clusters,
+        'local_models': len(engine.local_models),
+        'candidates': len(candidates),
+        'n_jobs': n_jobs,
+        'low_memory': low_memory,
+        'llm_calls': stub_llm.calls,
+        'peak_rss_mb': peak,
+        'stages': timer.stages,
+    }
+
+
+def run_worker(args, rows, clusters):
+    """
+    Run one scenario in a fresh interpreter and return its parsed result.
+    """
+    command = [sys.executable, os.path.abspath(__file__), '--worker',
+               '--scenarios', f"{rows}x{clusters}", '--n-jobs', str(args.n_jobs), '--repeat', str(args.repeat),
+               '--top-n', str(args.top_n), '--llm-latency-ms', str(args.llm_latency_ms), '--seed', str(args.seed)]
+    if args.verbose:
+        command.append('--verbose')
+    if args.low_memory:
+        command.append('--low-memory')
+    output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True, cwd=REPO_ROOT)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def environment_info():
+    import numpy
+    import pandas
+    import sklearn
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO_ROOT,
+                                    capture_output=True, text=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, None
+    return {
+        'git_commit': commit,
+        'git_dirty': dirty,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'pandas': pandas.__version__,
+        'sklearn': sklearn.__version__,
+    }
+
+
+def compare(results, baseline):
+    """
+    Print per-stage time ratios against a previous results file.
+    Returns the number of stages slower than REGRESSION_RATIO.
+    """
+    previous = {s['scenario']: s for s in baseline.get('scenarios', [])}
+    print(f"\nComparison with {baseline.get('environment', {}).get('git_commit') or 'baseline'} "
+          f"(ratio = new / old, flagged above {REGRESSION_RATIO}x):")
+    regressions = 0
+    for scenario in results['scenarios']:
+        old = previous.get(scenario['scenario'])
+        if old is None:
+            print(f"  {scenario['rows']:,} rows x {scenario['clusters']} clusters: not in baseline")
+            continue
+        print(f"  {scenario['rows']:,} rows x {scenario['clusters']} clusters:")
+        for name in COMPARED_STAGES:
+            new_s, old_s = scenario['stages'].get(name), old['stages'].get(name)
+            if not new_s or not old_s or not old_s['seconds']:
+                continue
+            ratio = new_s['seconds'] / old_s['seconds']
+            flag = "  REGRESSION" if ratio > REGRESSION_RATIO else ""
+            regressions += bool(flag)
+            print(f"    {name:26s} {old_s['seconds']:9.3f}s -> {new_s['seconds']:9.3f}s  {ratio:5.2f}x{flag}")
+        print(f"    {'peak_rss_mb':26s} {old['peak_rss_mb']:9.1f}   -> {scenario['peak_rss_mb']:9.1f}    "
+              f"{scenario['peak_rss_mb'] / old['peak_rss_mb']:5.2f}x")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default=DEFAULT_SCENARIOS,
+                        help=f"Comma-separated ROWSxCLUSTERS list (default: {DEFAULT_SCENARIOS})")
+    parser.add_argument('--n-jobs', type=int, default=1, help="n_jobs for run_pipeline")
+    parser.add_argument('--repeat', type=int, default=3, help="Repetitions of the fast stages (best is reported)")
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--llm-latency-ms', type=float, default=0.0, help="Simulated latency per stub LLM call")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help="Write results as JSON to this file")
+    parser.add_argument('--compare', default=None, help="Previous results JSON to compare against")
+    parser.add_argument('--verbose', action='store_true', help="Show the engine's own output")
+    parser.add_argument('--low-memory', action='store_true', help="Run the engine in low-memory mode")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    scenarios = parse_scenarios(args.scenarios)
+    if args.worker:
+        rows, clusters = scenarios[0]
+        result = run_scenario(rows, clusters, n_jobs=args.n_jobs, repeat=args.repeat, top_n=args.top_n,
+                              llm_latency_seconds=args.llm_latency_ms / 1000, seed=args.seed, verbose=args.verbose,
+                              low_memory=args.low_memory)
+        print(json.dumps(result))
+        return
+
+    results = {'environment': environment_info(), 'scenarios': []}
+    for rows, clusters in scenarios:
+        print(f"Scenario: {rows:,} rows x {clusters} clusters", file=sys.stderr)
+        scenario = run_worker(args, rows, clusters)
+        results['scenarios'].append(scenario)
+        print(f"  {'peak RSS':26s} {scenario['peak_rss_mb']:9.1f} MB", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
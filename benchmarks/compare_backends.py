@@ -0,0 +1,223 @@
+"""
+Speed/accuracy/size comparison of the model backends in engine.models.
+
+On a synthetic market (data/generator.py), split by house into train and
+holdout sets, it reports for every backend:
+- fit time
+- predict latency per 1,000 rows (best of --repeat)
+- pickled model size in bytes (what a snapshot stores)
+- holdout error: MAE and MAPE against the sale price
+
+Baseline backends are fitted on the baseline features; local backends are
+fitted per neighborhood on the local features, as the engine does. --pairs
+additionally trains the full engine (baseline + time trend + local models)
+for each `baseline:local` pair and scores the holdout end to end.
+
+Usage:
+    python benchmarks/compare_backends.py
+    python benchmarks/compare_backends.py --rows 300000 --clusters 100 --output backends.json
+    python benchmarks/compare_backends.py --baselines random_forest,hist_gb --locals mlp,linear --pairs hist_gb:linear
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import pickle
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from data.generator import generate_synthetic_data
+from engine.discovery_engine import (BASELINE_FEATURES, LOCAL_FEATURES, MIN_CLUSTER_ROWS, SNAPSHOT_ATTRIBUTES,
+                                     UndervaluationEngine)
+from engine.models import BASELINE_BACKENDS, LOCAL_BACKENDS, BaselineRegressor, make_local_model
+
+DEFAULT_PAIRS = "random_forest:mlp,hist_gb:mlp,hist_gb:hist_gb"
+
+
+def size_bytes(obj):
+    return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def errors(actual, predicted):
+    actual = np.asarray(actual, dtype=float)
+    absolute = np.abs(np.asarray(predicted, dtype=float) - actual)
+    return {'mae': float(absolute.mean()), 'mape_pct': float((absolute / actual).mean() * 100)}
+
+
+def best_time(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def split_by_house(history, holdout_fraction, seed):
+    """
+    Hold out every sale of a random subset of houses, so no house is in both sets.
+    """
+    houses = history['house_id'].unique()
+    rng = np.random.default_rng(seed)
+    held_out = set(rng.choice(houses, size=max(1, int(len(houses) * holdout_fraction)), replace=False))
+    mask = history['house_id'].isin(held_out).values
+    return history[~mask].reset_index(drop=True), history[mask].reset_index(drop=True)
+
+
+def compare_baselines(train, holdout, backends, repeat):
+    results = []
+    for backend in backends:
+        model = BaselineRegressor(backend)
+        fit_seconds, _ = best_time(lambda: model.fit(train[BASELINE_FEATURES], train['price']), 1)
+        predict_seconds, predictions = best_time(lambda: model.predict(holdout[BASELINE_FEATURES]), repeat)
+        results.append({
+            'backend': backend,
+            'fit_seconds': fit_seconds,
+            'predict_ms_per_1k': predict_seconds / len(holdout) * 1000 * 1000,
+            'size_bytes': size_bytes(model),
+            **errors(holdout['price'], predictions),
+        })
+    return results
+
+
+def compare_locals(train, holdout, backends, repeat):
+    """
+    One model per neighborhood with at least MIN_CLUSTER_ROWS training rows;
+    errors are measured on holdout rows of those neighborhoods.
+    """
+    clusters = [(nb_id, group) for nb_id, group in train.groupby('neighborhood_id', sort=False)
+                if len(group) >= MIN_CLUSTER_ROWS]
+    holdout_groups = holdout.groupby('neighborhood_id').indices
+    results = []
+    for backend in backends:
+        models = {}
+        started = time.perf_counter()
+        for nb_id, group in clusters:
+            models[nb_id] = make_local_model(backend)
+            models[nb_id].fit(group[LOCAL_FEATURES].values, group['price'].values)
+        fit_seconds = time.perf_counter() - started
+
+        X_holdout = holdout[LOCAL_FEATURES].values
+
+        def predict_all():
+            predictions = np.full(len(holdout), np.nan)
+            for nb_id, positions in holdout_groups.items():
+                if nb_id in models:
+                    predictions[positions] = models[nb_id].predict(X_holdout[positions])
+            return predictions
+
+        predict_seconds, predictions = best_time(predict_all, repeat)
+        covered = ~np.isnan(predictions)
+        results.append({
+            'backend': backend,
+            'models': len(models),
+            'fit_seconds': fit_seconds,
+            'predict_ms_per_1k': predict_seconds / max(1, covered.sum()) * 1000 * 1000,
+            'size_bytes': size_bytes(models),
+            **errors(holdout['price'].values[covered], predictions[covered]),
+        })
+    return results
+
+
+def compare_pairs(train, holdout, pairs, repeat, verbose=False):
+    results = []
+    for baseline_backend, local_backend in pairs:
+        engine = UndervaluationEngine(data=train, baseline_backend=baseline_backend, local_backend=local_backend,
+                                      assign_clusters='never')
+        quiet = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+        with quiet:
+            fit_seconds, _ = best_time(lambda: engine.run_pipeline(use_snapshot=False), 1)
+            predict_seconds, scored = best_time(lambda: engine.predict_candidates(holdout), repeat)
+        results.append({
+            'backend': f"{baseline_backend}:{local_backend}",
+            'fit_seconds': fit_seconds,
+            'predict_ms_per_1k': predict_seconds / len(holdout) * 1000 * 1000,
+            'size_bytes': size_bytes({attr: getattr(engine, attr) for attr in SNAPSHOT_ATTRIBUTES}),
+            **errors(holdout['price'], scored['predicted_price']),
+        })
+    return results
+
+
+def print_table(title, rows):
+    print(f"\n{title}")
+    print(f"  {'backend':26s} {'fit s':>9s} {'ms/1k rows':>11s} {'size':>12s} {'MAE':>11s} {'MAPE':>7s}")
+    for row in rows:
+        print(f"  {row['backend']:26s} {row['fit_seconds']:9.3f} {row['predict_ms_per_1k']:11.3f} "
+              f"{row['size_bytes'] / 1024:9.0f} KB {row['mae']:11,.0f} {row['mape_pct']:6.2f}%")
+
+
+def parse_list(spec, registry, kind):
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in registry]
+    if unknown:
+        raise SystemExit(f"Unknown {kind} backend(s) {unknown}; expected any of {sorted(registry)}")
+    return names
+
+
+def parse_pairs(spec):
+    pairs = []
+    for pair in filter(None, (p.strip() for p in spec.split(','))):
+        baseline_backend, _, local_backend = pair.partition(':')
+        parse_list(baseline_backend, BASELINE_BACKENDS, 'baseline')
+        parse_list(local_backend or 'mlp', LOCAL_BACKENDS, 'local')
+        pairs.append((baseline_backend, local_backend or 'mlp'))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare baseline and local model backends")
+    parser.add_argument("--rows", type=int, default=60000, help="Approximate history rows to generate")
+    parser.add_argument("--clusters", type=int, default=20, help="Number of neighborhoods")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Fraction of houses held out")
+    parser.add_argument("--baselines", default=",".join(BASELINE_BACKENDS))
+    parser.add_argument("--locals", default=",".join(LOCAL_BACKENDS))
+    parser.add_argument("--pairs", default=DEFAULT_PAIRS,
+                        help="Comma-separated baseline:local pairs trained end to end ('' to skip)")
+    parser.add_argument("--repeat", type=int, default=3, help="Predict timings keep the best of N runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show engine training output")
+    args = parser.parse_args()
+
+    baselines = parse_list(args.baselines, BASELINE_BACKENDS, 'baseline')
+    local_backends = parse_list(args.locals, LOCAL_BACKENDS, 'local')
+    pairs = parse_pairs(args.pairs)
+
+    # The generator averages three sale events per house
+    history = generate_synthetic_data(num_houses=max(1, args.rows // 3), num_neighborhoods=args.clusters,
+                                      seed=args.seed, end_date=datetime(2026, 1, 1))
+    history['date'] = pd.to_datetime(history['date'])
+    history['days_since_start'] = (history['date'] - history['date'].min()).dt.days
+    train, holdout = split_by_house(history, args.holdout, args.seed)
+    print(f"{len(history):,} rows x {args.clusters} clusters: {len(train):,} train / {len(holdout):,} holdout")
+
+    results = {
+        'rows': len(history),
+        'clusters': args.clusters,
+        'train_rows': len(train),
+        'holdout_rows': len(holdout),
+        'baseline': compare_baselines(train, holdout, baselines, args.repeat),
+        'local': compare_locals(train, holdout, local_backends, args.repeat),
+        'engine': compare_pairs(train, holdout, pairs, args.repeat, verbose=args.verbose),
+    }
+    print_table("Baseline backends (baseline features only)", results['baseline'])
+    print_table("Local backends (one model per neighborhood)", results['local'])
+    if results['engine']:
+        print_table("End to end (baseline + time trend + local blend)", results['engine'])
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
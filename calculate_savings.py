@@ -1,17 +1,22 @@
+import argparse
 import json
 
-def calculate_savings_timeline():
-    with open("data/top_10_winners.json", "r") as f:
-        data = json.load(f)
-        
-    salary = 70000
-    current_savings = 3000
-    
-    # Let's realistically assume the user can save 15% of their gross monthly income 
-    # strictly towards the house down payment if they are renting cheaply or living at home.
-    # $70,000 / 12 = $5,833 gross * 0.15 = ~$875/month in savings.
-    monthly_savings_rate = 875 
-    
+import numpy as np
+import pandas as pd
+
+from engine.filters import drop_excluded_types
+from engine.finance import ScenarioGrid, evaluate_scenarios
+
+def calculate_savings_timeline(path="data/top_10_winners.json", current_savings=3000, monthly_savings_rate=875):
+    """
+    Months of saving until each exported winner's FHA down payment is covered.
+    The default savings rate assumes 15% of a $70,000 gross salary
+    ($70,000 / 12 = $5,833 gross * 0.15 = ~$875/month), put strictly towards
+    the down payment while renting cheaply or living at home.
+    """
+    with open(path, "r") as f:
+        data = pd.DataFrame(json.load(f))
+
     print("\n=======================================================")
     print("FINANCIAL PROJECTION: SAVINGS TIMELINE VS. ALPHA CAPTURE")
     print("=======================================================")
@@ -19,55 +24,51 @@ def calculate_savings_timeline():
     print(f"Projected Savings Rate: ${monthly_savings_rate:,.0f}/mo (15% of Gross Income)")
     print("Goal: Maximize Alpha (Instant Equity) while moving FAST.")
     print("=======================================================\n")
-    
-    viable_targets = []
-    
-    for house in data:
-        prop_type = house.get('property_type', 'Unknown')
-        if prop_type in ['Manufactured', 'Mobile', 'Land']:
-            continue
-            
-        price = house['price']
-        # We assume they can get an FHA loan (3.5% down)
-        required_down = price * 0.035
-        # We also need to factor in closing costs (roughly 3% of the loan amount)
-        # But for this aggressively optimized model, let's assume they negotiate "Seller Paid Closing Costs"
-        
-        shortfall = max(0, required_down - current_savings)
-        months_to_save = shortfall / monthly_savings_rate if shortfall > 0 else 0
-        
-        viable_targets.append({
-            "address": house.get("address", house.get("house_id")),
-            "type": prop_type,
-            "price": price,
-            "required_down": required_down,
-            "shortfall": shortfall,
-            "months_to_save": months_to_save,
-            "alpha": house['undervaluation_amount'],
-            "alpha_pct": house['undervaluation_pct']
-        })
-        
-    viable_targets = sorted(viable_targets, key=lambda x: x['months_to_save'])
-    
-    if not viable_targets:
+
+    if 'property_type' not in data:
+        data['property_type'] = 'Unknown'
+    data['property_type'] = data['property_type'].fillna('Unknown')
+    targets, _ = drop_excluded_types(data)
+
+    if targets.empty:
         print("No viable non-manufactured homes in the current dataset.")
         return
-        
-    for target in viable_targets:
-        print(f"TARGET: {target['address']} ({target['type']})")
+
+    # We assume they can get an FHA loan (3.5% down)
+    # We also need to factor in closing costs (roughly 3% of the loan amount)
+    # But for this aggressively optimized model, let's assume they negotiate "Seller Paid Closing Costs"
+    cube = evaluate_scenarios(targets, ScenarioGrid.product(rates=[0.06], programs=('fha',)))
+    required_down = cube['down_payment'][:, 0].astype(float)
+    shortfall = np.maximum(0, required_down - current_savings)
+    months_to_save = shortfall / monthly_savings_rate
+
+    order = np.argsort(months_to_save, kind='stable')
+    for position in order:
+        target = targets.iloc[position]
+        alpha = target['undervaluation_amount']
+        print(f"TARGET: {target.get('address', target.get('house_id'))} ({target['property_type']})")
         print(f"  Listed Price: ${target['price']:,.0f}")
-        print(f"  Required Cash (3.5% Down): ${target['required_down']:,.0f}")
-        print(f"  Current Shortfall: ${target['shortfall']:,.0f}")
-        
-        if target['months_to_save'] == 0:
+        print(f"  Required Cash (3.5% Down): ${required_down[position]:,.0f}")
+        print(f"  Current Shortfall: ${shortfall[position]:,.0f}")
+
+        if months_to_save[position] == 0:
             print(f"  TIMELINE: You can buy this TODAY.")
         else:
-            print(f"  TIMELINE: {target['months_to_save']:.1f} months of saving.")
-            
-        print(f"  PAYOFF (Instant Equity): +${target['alpha']:,.0f} ({target['alpha_pct']:.1f}% Alpha)")
+            print(f"  TIMELINE: {months_to_save[position]:.1f} months of saving.")
+
+        print(f"  PAYOFF (Instant Equity): +${alpha:,.0f} ({target['undervaluation_pct']:.1f}% Alpha)")
         # Calculate Return on Cash (Alpha / Required Down)
-        roc = (target['alpha'] / target['required_down']) * 100
+        roc = (alpha / required_down[position]) * 100
         print(f"  RETURN ON CASH: {roc:,.0f}%\n")
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py savings",
+                                     description="Savings timeline to each exported winner's down payment")
+    parser.add_argument("--input", default="data/top_10_winners.json", help="Exported leaderboard JSON")
+    parser.add_argument("--cash", type=float, default=3000, help="Current savings")
+    parser.add_argument("--monthly-savings", type=float, default=875, help="Saved towards the down payment per month")
+    args = parser.parse_args(argv)
+    calculate_savings_timeline(args.input, current_savings=args.cash, monthly_savings_rate=args.monthly_savings)
+
 if __name__ == "__main__":
-    calculate_savings_timeline()
+    main()
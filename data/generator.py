@@ -1,136 +1,217 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
+import argparse
 import os
 
-def generate_synthetic_data(num_houses=1000, num_neighborhoods=10, history_days=365):
+# Market definitions. Bounds are (min, max) lat/long boxes the neighborhood centroids are drawn from.
+MARKETS = {
+    'tampa': {
+        'house_prefix': 'TPA',
+        'lat': (27.8, 28.1),
+        'long': (-82.6, -82.3),
+        # Common street names in Tampa area
+        'streets': [
+            "Bayshore Blvd", "Kennedy Blvd", "Dale Mabry Hwy", "Nebraska Ave",
+            "Florida Ave", "Hyde Park Ave", "Howard Ave", "MacDill Ave",
+            "Gandy Blvd", "Fowler Ave", "Busch Blvd", "Ybor St", "Seventh Ave",
+            "Westshore Blvd", "Hillsborough Ave", "Bearss Ave", "Bruce B Downs Blvd"
+        ],
+        'neighborhood_names': [
+            "South Tampa", "Ybor City", "Hyde Park", "Seminole Heights",
+            "Westchase", "New Tampa", "Carrollwood", "Brandon",
+            "Temple Terrace", "Town 'n' Country"
+        ],
+    },
+    'orlando': {
+        'house_prefix': 'ORL',
+        'lat': (28.35, 28.65),
+        'long': (-81.5, -81.2),
+        'streets': [
+            "Orange Ave", "Colonial Dr", "Mills Ave", "Michigan St", "Kirkman Rd",
+            "Semoran Blvd", "Edgewater Dr", "Curry Ford Rd", "Conway Rd", "Lake Underhill Rd"
+        ],
+        'neighborhood_names': [
+            "Downtown", "Thornton Park", "College Park", "Baldwin Park", "Lake Nona",
+            "Dr. Phillips", "Winter Park", "Conway", "MetroWest", "Audubon Park"
+        ],
+    },
+    'miami': {
+        'house_prefix': 'MIA',
+        'lat': (25.7, 25.9),
+        'long': (-80.35, -80.15),
+        'streets': [
+            "Biscayne Blvd", "Flagler St", "Calle Ocho", "Coral Way", "Brickell Ave",
+            "NW 7th Ave", "Bird Rd", "Kendall Dr", "Collins Ave", "Miami Ave"
+        ],
+        'neighborhood_names': [
+            "Brickell", "Little Havana", "Coconut Grove", "Wynwood", "Edgewater",
+            "Little River", "Coral Way", "Allapattah", "Overtown", "Upper East Side"
+        ],
+    },
+}
+
+def _make_neighborhoods(rng, market, num_neighborhoods, id_offset=0):
     """
-    Generates synthetic real estate data with time-series trends and local clusters in Tampa.
+    Neighborhood centroids, quality multipliers and appreciation rates, as arrays.
     """
-    np.random.seed(42)
-    
-    # Tampa bounds: Lat ~27.8 to 28.1, Long ~ -82.6 to -82.3
-    tampa_bounds = {
-        'lat': (27.8, 28.1),
-        'long': (-82.6, -82.3)
+    names = market['neighborhood_names']
+    return {
+        'id': np.arange(num_neighborhoods) + id_offset,
+        'name': np.array([names[i] if i < len(names) else f"Neighborhood {i}" for i in range(num_neighborhoods)]),
+        'lat': rng.uniform(market['lat'][0], market['lat'][1], num_neighborhoods),
+        'long': rng.uniform(market['long'][0], market['long'][1], num_neighborhoods),
+        'quality_multiplier': rng.uniform(1.0, 2.5, num_neighborhoods), # Premium areas
+        'appreciation_rate': rng.uniform(0.00015, 0.0004, num_neighborhoods) # Higher growth in FL
     }
 
-    # Common street names in Tampa area
-    streets = [
-        "Bayshore Blvd", "Kennedy Blvd", "Dale Mabry Hwy", "Nebraska Ave", 
-        "Florida Ave", "Hyde Park Ave", "Howard Ave", "MacDill Ave",
-        "Gandy Blvd", "Fowler Ave", "Busch Blvd", "Ybor St", "Seventh Ave",
-        "Westshore Blvd", "Hillsborough Ave", "Bearss Ave", "Bruce B Downs Blvd"
-    ]
-    
-    # 1. Define Neighborhoods
-    neighborhoods = []
-    neighborhood_names = ["South Tampa", "Ybor City", "Hyde Park", "Seminole Heights", 
-                          "Westchase", "New Tampa", "Carrollwood", "Brandon", 
-                          "Temple Terrace", "Town 'n' Country"]
-    
-    for i in range(num_neighborhoods):
-        neighborhoods.append({
-            'id': i,
-            'name': neighborhood_names[i] if i < len(neighborhood_names) else f"Neighborhood {i}",
-            'lat': np.random.uniform(tampa_bounds['lat'][0], tampa_bounds['lat'][1]),
-            'long': np.random.uniform(tampa_bounds['long'][0], tampa_bounds['long'][1]),
-            'quality_multiplier': np.random.uniform(1.0, 2.5), # Tampa premium areas
-            'appreciation_rate': np.random.uniform(0.00015, 0.0004) # Higher growth in FL
-        })
-    
-    data = []
-    
-    # 2. Generate Houses
-    for i in range(num_houses):
-        nb = np.random.choice(neighborhoods)
-        
-        # House characteristics
-        # Support smaller units (Condos/Studios) down to 400 sqft
-        sqft = np.random.normal(1800, 800)
-        sqft = max(450, sqft)
-        
-        beds = int(sqft / 600) + np.random.randint(0, 2)
-        beds = max(1, beds)
-        
-        baths = max(1, int(beds * 0.7 + np.random.uniform(0, 1)))
-        
-        # Base price calculation (Tampa market ~ $200-$450/sqft base)
-        # Smaller units often have HIGHER price per sqft but lower absolute price
-        sqft_premium = 1.0 if sqft > 1000 else 1.2
-        base_price_per_sqft = 220 * nb['quality_multiplier'] * sqft_premium
-        initial_price = sqft * base_price_per_sqft
-        
-        # Random noise in base price
-        initial_price *= np.random.uniform(0.85, 1.15)
-        
-        # House ID and Fake Address
-        house_id = f"TPA{i:04d}"
-        address = f"{np.random.randint(100, 9999)} {np.random.choice(streets)}"
-        
-        # HOA fee generation: higher quality or specific neighborhoods have higher fees
-        # Some homes have no HOA (0), others range from $50 to $600+
-        has_hoa = np.random.choice([True, False], p=[0.7, 0.3])
-        if has_hoa:
-            base_hoa = 50 * nb['quality_multiplier']
-            hoa_fee = base_hoa + np.random.uniform(0, 300)
-        else:
-            hoa_fee = 0
-            
-        # Local coordinates near neighborhood centroid
-        lat = nb['lat'] + np.random.normal(0, 0.015)
-        long = nb['long'] + np.random.normal(0, 0.015)
-        
-        # 3. Generate Time-Series History
-        start_date = datetime.now() - timedelta(days=history_days)
-        num_events = np.random.randint(2, 5)
-        event_dates = sorted([start_date + timedelta(days=np.random.randint(0, history_days)) for _ in range(num_events)])
-        
-        for date in event_dates:
-            days_passed = (date - start_date).days
-            current_market_price = initial_price * (1 + nb['appreciation_rate'] * days_passed)
-            
-            # Listing price noise
-            listing_price = current_market_price * np.random.uniform(0.97, 1.03)
-            
-            data.append({
-                'house_id': house_id,
-                'address': address,
-                'neighborhood_id': nb['id'],
-                'neighborhood_name': nb['name'],
-                'lat': lat,
-                'long': long,
-                'sqft': sqft,
-                'beds': beds,
-                'baths': baths,
-                'hoa_fee': hoa_fee,
-                'date': date,
-                'price': listing_price,
-                'is_undervalued': False
-            })
-
-    # 4. Inject "Undervalued" Gems (Recently)
-    df = pd.DataFrame(data)
-    unique_houses = df['house_id'].unique()
-    undervalued_count = max(1, int(len(unique_houses) * 0.015))
-    undervalued_houses = np.random.choice(unique_houses, undervalued_count, replace=False)
-    
-    for house_id in undervalued_houses:
-        latest_idx = df[df['house_id'] == house_id]['date'].idxmax()
-        # 20% to 35% discount
-        df.at[latest_idx, 'price'] *= np.random.uniform(0.65, 0.8)
-        df.at[latest_idx, 'is_undervalued'] = True
-
-    return df
+def _generate_block(rng, market, nb, first_house, num_houses, history_days, start_date, gem_mask):
+    """
+    Generate the full sale history of `num_houses` houses in one vectorized pass.
+    `gem_mask` flags which of them get an undervalued latest listing.
+    """
+    # 1. Houses
+    nb_idx = rng.integers(0, len(nb['id']), num_houses)
+    quality = nb['quality_multiplier'][nb_idx]
+
+    # Support smaller units (Condos/Studios) down to 450 sqft
+    sqft = np.maximum(450, rng.normal(1800, 800, num_houses))
+    beds = np.maximum(1, (sqft / 600).astype(int) + rng.integers(0, 2, num_houses))
+    baths = np.maximum(1, (beds * 0.7 + rng.uniform(0, 1, num_houses)).astype(int))
+
+    # Base price (~ $200-$450/sqft base). Smaller units have a HIGHER price per sqft
+    sqft_premium = np.where(sqft > 1000, 1.0, 1.2)
+    initial_price = sqft * 220 * quality * sqft_premium
+    initial_price *= rng.uniform(0.85, 1.15, num_houses)
+
+    # HOA: 70% of homes pay one, scaled with neighborhood quality
+    has_hoa = rng.random(num_houses) < 0.7
+    hoa_fee = np.where(has_hoa, 50 * quality + rng.uniform(0, 300, num_houses), 0.0)
+
+    # Local coordinates near neighborhood centroid
+    lat = nb['lat'][nb_idx] + rng.normal(0, 0.015, num_houses)
+    long = nb['long'][nb_idx] + rng.normal(0, 0.015, num_houses)
+
+    house_numbers = np.arange(first_house, first_house + num_houses)
+    house_ids = pd.Series(house_numbers).astype(str).str.zfill(4).radd(market['house_prefix'])
+    streets = np.asarray(market['streets'])[rng.integers(0, len(market['streets']), num_houses)]
+    addresses = pd.Series(rng.integers(100, 9999, num_houses)).astype(str) + " " + streets
+
+    # 2. Time-series history: 2-4 listing events per house, sorted by date within each house
+    num_events = rng.integers(2, 5, num_houses)
+    house_of_event = np.repeat(np.arange(num_houses), num_events)
+    days_passed = rng.integers(0, history_days, len(house_of_event))
+    order = np.lexsort((days_passed, house_of_event))
+    house_of_event = house_of_event[order]
+    days_passed = days_passed[order]
+
+    appreciation = nb['appreciation_rate'][nb_idx][house_of_event]
+    current_market_price = initial_price[house_of_event] * (1 + appreciation * days_passed)
+    # Listing price noise
+    listing_price = current_market_price * rng.uniform(0.97, 1.03, len(house_of_event))
+
+    # 3. Undervalued gems: 20% to 35% discount on the house's latest listing
+    latest_event = np.cumsum(num_events) - 1
+    is_undervalued = np.zeros(len(house_of_event), dtype=bool)
+    gem_events = latest_event[gem_mask]
+    listing_price[gem_events] *= rng.uniform(0.65, 0.8, len(gem_events))
+    is_undervalued[gem_events] = True
+
+    return pd.DataFrame({
+        'house_id': house_ids.values[house_of_event],
+        'address': addresses.values[house_of_event],
+        'neighborhood_id': nb['id'][nb_idx][house_of_event],
+        'neighborhood_name': nb['name'][nb_idx][house_of_event],
+        'lat': lat[house_of_event],
+        'long': long[house_of_event],
+        'sqft': sqft[house_of_event],
+        'beds': beds[house_of_event],
+        'baths': baths[house_of_event],
+        'hoa_fee': hoa_fee[house_of_event],
+        'date': np.datetime64(start_date) + days_passed.astype('timedelta64[D]'),
+        'price': listing_price,
+        'is_undervalued': is_undervalued
+    })
+
+def iter_synthetic_chunks(num_houses=1000, num_neighborhoods=10, history_days=365, markets=('tampa',),
+                          seed=42, chunk_houses=100_000, end_date=None):
+    """
+    Yield the synthetic history as DataFrame chunks of `chunk_houses` houses,
+    market by market. Output is reproducible for a given seed, chunk size and
+    end_date (default: now, so dates shift with the run time).
+    With several markets, neighborhood ids are offset per market so they stay
+    unique and a `market` column is added.
+    """
+    start_date = (end_date or datetime.now()) - timedelta(days=history_days)
+
+    for market_idx, market_name in enumerate(markets):
+        market = MARKETS[market_name]
+        market_seed = np.random.SeedSequence([seed, market_idx])
+        nb_seed, gem_seed, block_seed = market_seed.spawn(3)
+
+        nb = _make_neighborhoods(np.random.default_rng(nb_seed), market, num_neighborhoods,
+                                 id_offset=market_idx * num_neighborhoods)
+
+        # Gems are picked over the whole market (1.5% of houses), not per chunk
+        gem_count = max(1, int(num_houses * 0.015))
+        gem_houses = np.random.default_rng(gem_seed).choice(num_houses, gem_count, replace=False)
+        gem_mask = np.zeros(num_houses, dtype=bool)
+        gem_mask[gem_houses] = True
+
+        num_blocks = -(-num_houses // chunk_houses)
+        for block_idx, block_rng_seed in enumerate(block_seed.spawn(num_blocks)):
+            first = block_idx * chunk_houses
+            count = min(chunk_houses, num_houses - first)
+            chunk = _generate_block(np.random.default_rng(block_rng_seed), market, nb, first, count,
+                                    history_days, start_date, gem_mask[first:first + count])
+            if len(markets) > 1:
+                chunk['market'] = market_name
+            yield chunk
+
+def generate_synthetic_data(num_houses=1000, num_neighborhoods=10, history_days=365, markets=('tampa',),
+                            seed=42, chunk_houses=100_000, end_date=None):
+    """
+    Generates synthetic real estate data with time-series trends and local clusters.
+    """
+    chunks = iter_synthetic_chunks(num_houses, num_neighborhoods, history_days, markets, seed, chunk_houses,
+                                   end_date)
+    return pd.concat(chunks, ignore_index=True)
+
+def write_synthetic_data(path, num_houses=1000, num_neighborhoods=10, history_days=365, markets=('tampa',),
+                         seed=42, chunk_houses=100_000, end_date=None):
+    """
+    Stream the synthetic history to a CSV chunk by chunk, so memory stays bounded
+    by `chunk_houses` regardless of the total size. Returns (rows, houses) written.
+    """
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    rows = 0
+    for i, chunk in enumerate(iter_synthetic_chunks(num_houses, num_neighborhoods, history_days, markets,
+                                                    seed, chunk_houses, end_date)):
+        chunk.to_csv(path, mode='w' if i == 0 else 'a', header=i == 0, index=False)
+        rows += len(chunk)
+    return rows, num_houses * len(markets)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="main.py generate", description="Generate synthetic historical housing data.")
+    parser.add_argument('--houses', type=int, default=1000, help="Houses per market")
+    parser.add_argument('--neighborhoods', type=int, default=10, help="Neighborhoods per market")
+    parser.add_argument('--history-days', type=int, default=365)
+    parser.add_argument('--markets', default='tampa', help=f"Comma-separated list of: {', '.join(MARKETS)}")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-houses', type=int, default=100_000)
+    parser.add_argument('--output', default="data/housing_data_tampa.csv")
+    args = parser.parse_args(argv)
+
+    markets = [m.strip() for m in args.markets.split(',') if m.strip()]
+    print(f"Generating synthetic real estate data for {', '.join(markets)}...")
+    rows, houses = write_synthetic_data(args.output, args.houses, args.neighborhoods, args.history_days,
+                                        markets, args.seed, args.chunk_houses)
+
+    print(f"Generated {rows} records for {houses} houses.")
+    print(f"Data saved to {args.output}")
+    print("\nSample of listings:")
+    print(pd.read_csv(args.output, nrows=10)[['house_id', 'address', 'neighborhood_name', 'price']])
 
 if __name__ == "__main__":
-    print("Generating synthetic Tampa real estate data...")
-    df = generate_synthetic_data()
-    
-    os.makedirs("data", exist_ok=True)
-    df.to_csv("data/housing_data_tampa.csv", index=False)
-    
-    print(f"Generated {len(df)} records for {df['house_id'].nunique()} houses in Tampa.")
-    print(f"Data saved to data/housing_data_tampa.csv")
-    print("\nSample of Tampa listings:")
-    print(df[['house_id', 'address', 'neighborhood_name', 'price']].tail(10))
+    main()
@@ -0,0 +1,223 @@
+"""
+Background delivery of webhook alerts (Discord-compatible payloads).
+
+Scoring code only calls `AlertDispatcher.enqueue`, which returns immediately.
+A worker thread batches queued alerts into as few webhook posts as possible
+(Discord accepts up to 10 embeds per message), posts them through a pooled
+HttpTransport that honors 429 Retry-After, and keeps undelivered alerts in a
+JSON file so they survive a restart. Every alert carries a stable dedupe key;
+an alert whose key is already pending or was recently delivered is dropped.
+
+Coalescing only covers alerts that are queued together: those enqueued within
+`batch_window_seconds` of each other, and everything that piled up while the
+webhook was down or rate limiting (up to DISCORD_MAX_EMBEDS per post). The
+daemon queues at most one champion alert per scan cycle, so in normal
+operation each champion change is its own post; alerts are never held back
+across cycles just to share a post.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+
+from engine.http_transport import HttpTransport
+from engine.metrics import metrics
+
+DISCORD_MAX_EMBEDS = 10
+DISCORD_MAX_CONTENT = 2000
+
+
+def make_alert(key, content, embed):
+    """
+    An alert as queued and persisted. `key` must be stable for "the same news"
+    (e.g. champion reign, id and price), built from content only, so retries
+    and restarts never post it twice.
+    """
+    return {'key': key, 'content': content, 'embed': embed, 'created_at': time.time()}
+
+
+class AlertDispatcher:
+    def __init__(self, webhook_url, transport=None, queue_path="data/pending_alerts.json",
+                 batch_window_seconds=2.0, retry_seconds=30.0, max_retry_seconds=900.0,
+                 delivered_history=1000, start=True):
+        """
+        webhook_url can point at a local stand-in for tests. queue_path=None keeps
+        the queue in memory only. Alerts enqueued within `batch_window_seconds`
+        of each other go out in one post. With start=False no worker thread is
+        started; call deliver_pending() to send synchronously.
+        """
+        self.webhook_url = webhook_url
+        self.queue_path = queue_path
+        self.batch_window_seconds = batch_window_seconds
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.delivered_history = delivered_history
+        # The transport retries 429s (honoring Retry-After) and 5xx before giving the batch back to us
+        self.transport = transport or HttpTransport(pool_size=2, timeout=10, max_retries=3)
+
+        self._pending = []
+        self._delivered = OrderedDict()
+        self._failures = 0
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._load()
+
+        self._worker = None
+        if start:
+            self._worker = threading.Thread(target=self._run, name="alert-dispatcher", daemon=True)
+            self._worker.start()
+
+    def enqueue(self, alert):
+        """
+        Queue an alert for delivery. Returns False if its key is a duplicate.
+        Never blocks on the network.
+        """
+        with self._condition:
+            if alert['key'] in self._delivered or any(p['key'] == alert['key'] for p in self._pending):
+                metrics.inc('alerts_deduplicated')
+                return False
+            self._pending.append(alert)
+            self._save()
+            metrics.inc('alerts_enqueued')
+            metrics.set_gauge('alerts_pending', len(self._pending))
+            self._condition.notify()
+        return True
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+    def flush(self, timeout=None):
+        """
+        Block until the queue is empty (or `timeout` passes). Returns True if it emptied.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+            return True
+
+    def close(self, timeout=5.0):
+        """
+        Stop the worker. Anything still pending stays on disk for the next start.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+        self.transport.close()
+
+    def deliver_pending(self):
+        """
+        Post the oldest batch of pending alerts (up to DISCORD_MAX_EMBEDS).
+        Returns True if the batch was delivered or rejected for good, False
+        if it should be retried later.
+        """
+        with self._condition:
+            batch = list(self._pending[:DISCORD_MAX_EMBEDS])
+        if not batch:
+            return True
+
+        try:
+            with metrics.timer('alert_post'):
+                response = self.transport.post(self.webhook_url, json=self._payload(batch))
+        except requests.exceptions.RequestException as e:
+            metrics.inc('alert_batches', status='connection_error')
+            print(f"  -> Error sending {len(batch)} alert(s): {e}")
+            return False
+
+        metrics.inc('alert_batches', status=response.status_code)
+        if response.status_code == 429 or response.status_code >= 500:
+            print(f"  -> Alert webhook returned {response.status_code}; keeping {len(batch)} alert(s) queued")
+            return False
+        if response.status_code >= 400:
+            # A rejected payload will never succeed; drop it instead of blocking the queue
+            print(f"  -> Alert webhook rejected {len(batch)} alert(s): {response.status_code} - {response.text}")
+        else:
+            print(f"  -> Delivered {len(batch)} alert(s) in one post")
+            metrics.inc('alerts_delivered', len(batch))
+
+        with self._condition:
+            sent_keys = {alert['key'] for alert in batch}
+            self._pending = [p for p in self._pending if p['key'] not in sent_keys]
+            for key in sent_keys:
+                self._delivered[key] = time.time()
+            while len(self._delivered) > self.delivered_history:
+                self._delivered.popitem(last=False)
+            self._save()
+            metrics.set_gauge('alerts_pending', len(self._pending))
+            self._condition.notify_all()
+        return True
+
+    def _payload(self, batch):
+        if len(batch) == 1:
+            content = batch[0]['content']
+        else:
+            content = "\n".join(alert['content'] for alert in batch)
+        return {
+            'content': content[:DISCORD_MAX_CONTENT],
+            'embeds': [alert['embed'] for alert in batch],
+        }
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    return
+                # Give closely spaced alerts a moment to arrive so they share one post
+                while len(self._pending) < DISCORD_MAX_EMBEDS:
+                    window_left = self._pending[-1]['created_at'] + self.batch_window_seconds - time.time()
+                    if window_left <= 0:
+                        break
+                    self._condition.wait(window_left)
+                    if self._stopping:
+                        return
+
+            if self.deliver_pending():
+                self._failures = 0
+                continue
+
+            self._failures += 1
+            delay = min(self.max_retry_seconds, self.retry_seconds * (2 ** (self._failures - 1)))
+            with self._condition:
+                if not self._stopping:
+                    self._condition.wait(delay)
+
+    def _load(self):
+        if not self.queue_path or not os.path.exists(self.queue_path):
+            return
+        try:
+            with open(self.queue_path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable alert queue {self.queue_path}: {e}")
+            return
+        self._pending = list(data.get('pending', []))
+        self._delivered = OrderedDict((key, sent_at) for key, sent_at in data.get('delivered', []))
+        if self._pending:
+            print(f"Loaded {len(self._pending)} undelivered alert(s) from {self.queue_path}")
+
+    def _save(self):
+        if not self.queue_path:
+            return
+        directory = os.path.dirname(self.queue_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'pending': self._pending, 'delivered': list(self._delivered.items())}, f)
+            os.replace(tmp_path, self.queue_path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"WARNING: Could not persist alert queue to {self.queue_path}: {e}")
@@ -2,7 +2,23 @@ import requests
 import pandas as pd
 import os
 import json
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
+from engine.http_transport import HttpTransport, TokenBucket
+from engine.filters import EXCLUDED_TYPES
+from engine.metrics import metrics
+
+def _run_now(fn, *args):
+    """
+    Run fn synchronously but hand back a Future, mirroring executor.submit.
+    """
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
 
 class RentCastClient:
     """
@@ -10,73 +26,116 @@ class RentCastClient:
     API Docs: https://rentcast.io/api
     """
     BASE_URL = "https://api.rentcast.io/v1"
+    PAGE_SIZE = 50
 
-    def __init__(self, api_key):
+    def __init__(self, api_key, base_url=None, transport=None, requests_per_second=None):
+        """
+        base_url (or RENTCAST_BASE_URL) lets tests point the client at a local stub.
+        Requests go through a pooled, rate-limited, retrying HttpTransport.
+        """
         self.api_key = api_key
+        self.base_url = base_url or os.getenv("RENTCAST_BASE_URL", self.BASE_URL)
         self.headers = {
             "Accept": "application/json",
             "X-Api-Key": api_key
         }
+        if transport is None:
+            if requests_per_second is None:
+                requests_per_second = float(os.getenv("RENTCAST_REQUESTS_PER_SECOND", "5"))
+            transport = HttpTransport(
+                headers=self.headers,
+                rate_limiter=TokenBucket(requests_per_second)
+            )
+        self.transport = transport
+        # Page requests sent so far; each one counts against the monthly API quota
+        self.requests_made = 0
 
-    def fetch_listings(self, city="Tampa", state="FL", limit=500):
+    def fetch_listings(self, city="Tampa", state="FL", limit=500, prefetch=True):
         """
         Fetch active sale listings for the given area using pagination.
+        With prefetch=True the next page is requested while the current one is normalized.
+        If a page still fails after retries, the pages fetched so far are kept.
         """
         if self.api_key == "YOUR_API_KEY_HERE" or not self.api_key:
             print("WARNING: No valid RentCast API key provided. Using mock data.")
-            return self._get_mock_data()
+            mock = self._get_mock_data()
+            metrics.inc('listings_fetched', len(mock), source='mock')
+            return mock
 
-        url = f"{self.BASE_URL}/listings/sale"
-        all_raw_data = []
+        url = f"{self.base_url}/listings/sale"
+        frames = []
+        fetched = 0
         offset = 0
-        chunk_size = 50
-        
-        while len(all_raw_data) < limit:
-            params = {
-                "city": city,
-                "state": state,
-                "status": "Active",
-                "limit": chunk_size,
-                "offset": offset
-            }
 
-            try:
-                response = requests.get(url, headers=self.headers, params=params, timeout=15)
-                response.raise_for_status()
-                data = response.json()
-                
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            submit = prefetcher.submit if prefetch else _run_now
+            pending = submit(self._fetch_page, url, city, state, offset)
+
+            while pending is not None:
+                try:
+                    data = pending.result()
+                    metrics.inc('rentcast_pages')
+                except requests.exceptions.HTTPError as e:
+                    metrics.inc('rentcast_page_errors')
+                    print(f"HTTP Error fetching from RentCast API: {e}")
+                    print(f"Response Content: {e.response.text}")
+                    print(f"Keeping {fetched} listings fetched before the error.")
+                    break
+                except Exception as e:
+                    metrics.inc('rentcast_page_errors')
+                    print(f"Error fetching from RentCast API: {e}")
+                    print(f"Keeping {fetched} listings fetched before the error.")
+                    break
+                pending = None
+
                 if not data:
                     break # No more properties
-                    
-                all_raw_data.extend(data)
-                offset += chunk_size
-                
-                if len(data) < chunk_size:
-                    break # Reached the end of the available active listings
-                    
-            except requests.exceptions.HTTPError as e:
-                print(f"HTTP Error fetching from RentCast API: {e}")
-                print(f"Response Content: {e.response.text}")
-                break
-            except Exception as e:
-                print(f"Error fetching from RentCast API: {e}")
-                break
-                
-        return self._normalize_listings(all_raw_data[:limit])
+
+                data = data[:limit - fetched]
+                fetched += len(data)
+                offset += self.PAGE_SIZE
+
+                # A short page means we reached the end of the available active listings
+                if len(data) == self.PAGE_SIZE and fetched < limit:
+                    pending = submit(self._fetch_page, url, city, state, offset)
+
+                frames.append(self._normalize_listings(data))
+
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return self._normalize_listings([])
+        return pd.concat(frames, ignore_index=True)
+
+    def _fetch_page(self, url, city, state, offset):
+        params = {
+            "city": city,
+            "state": state,
+            "status": "Active",
+            "limit": self.PAGE_SIZE,
+            "offset": offset
+        }
+        self.requests_made += 1
+        with metrics.timer('rentcast_page'):
+            response = self.transport.get(url, params=params)
+            response.raise_for_status()
+            return response.json()
 
     def _normalize_listings(self, raw_data):
         """
         Convert RentCast response into the internal engine DataFrame format.
         """
         print(f"DEBUG: RentCast API returned {len(raw_data)} raw properties before filtering.")
+        started = time.perf_counter()
+        metrics.inc('listings_fetched', len(raw_data), source='rentcast')
         normalized = []
         for item in raw_data:
             prop_type = item.get('propertyType', 'Unknown')
             dom = item.get('daysOnMarket', 0)
             
             # STRICT FILTERING: Prevent "Cash Only", 55+, and Land traps
-            if prop_type in ['Manufactured', 'Mobile', 'Land']:
+            if prop_type in EXCLUDED_TYPES:
                 print(f"DEBUG: Dropping {item.get('address')} - Invalid Property Type ({prop_type})")
+                metrics.inc('listings_dropped', reason='property_type')
                 continue
                 
             # If a property has been on the market for more than 6 months (180 days)
@@ -84,13 +143,14 @@ class RentCastClient:
             # entangled in probate, or a complete gut job. We discard these.
             if dom is not None and dom > 180:
                 print(f"DEBUG: Dropping {item.get('address')} - High DOM ({dom} days)")
+                metrics.inc('listings_dropped', reason='days_on_market')
                 continue
                 
             # RentCast 'hoaFee' is usually monthly
             normalized.append({
                 'house_id': item.get('id'),
                 'address': item.get('address'),
-                'neighborhood_id': 0, # Placeholder, can be derived from zip
+                'neighborhood_id': None, # Assigned from lat/long/zip by the engine's ClusterLocator
                 'neighborhood_name': item.get('zipCode'), # Use zip as proxy
                 'lat': item.get('latitude'),
                 'long': item.get('longitude'),
@@ -106,7 +166,9 @@ class RentCastClient:
                 'price': item.get('price', 0),
                 'is_undervalued': False # Calculated by engine
             })
-        return pd.DataFrame(normalized)
+        normalized_df = pd.DataFrame(normalized)
+        metrics.observe('normalize_listings', time.perf_counter() - started)
+        return normalized_df
 
     def _get_mock_data(self):
         """
@@ -0,0 +1,294 @@
+"""
+Offline re-scoring of large listing exports (MLS dumps) with the current models.
+
+The input is read in chunks (CSV, a columnar directory from engine.columnar,
+or Parquet when pyarrow is installed). Chunks are scored across worker
+processes that each receive one scoring-only copy of the trained engine
+(see UndervaluationEngine.scoring_copy). Scored chunks are appended to the
+output in input order as soon as they are ready, so memory stays bounded by
+the number of chunks in flight.
+
+The LLM stage is never called: by default the llm_* columns are left empty,
+`--llm stub` folds a flat repair estimate into every row and `--llm prescreen`
+folds in the rule-based estimate of engine.prescreen, adding its
+disqualification and needs-LLM flags so a later pass can send only the
+ambiguous rows to the LLM.
+
+Usage:
+    python main.py score exports/mls_dump.csv -o data/mls_scored.csv
+    python main.py score exports/mls_dump.parquet -o data/mls_scored.parquet --workers 4 --chunksize 100000
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from engine.metrics import metrics
+from engine.streaming import history_chunk_factory
+
+REQUIRED_COLUMNS = ['price', 'sqft', 'beds', 'baths']
+
+# How the LLM repair-estimate stage is handled offline
+LLM_MODES = ('skip', 'stub', 'prescreen')
+
+# Scored chunks waiting to be written, per worker
+CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
+# The engine each worker process scores with, set by _init_worker
+_worker_engine = None
+
+
+def is_parquet(path):
+    return path.lower().endswith(('.parquet', '.pq'))
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ValueError("Parquet input/output needs pyarrow (pip install pyarrow); use CSV instead")
+    return pyarrow
+
+
+def iter_listing_chunks(path, chunksize=50_000):
+    """
+    Yield the listings at `path` as DataFrame chunks of up to `chunksize` rows.
+    """
+    if is_parquet(path):
+        pyarrow = _import_pyarrow()
+        for batch in pyarrow.parquet.ParquetFile(path).iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from history_chunk_factory(path, chunksize=chunksize)()
+
+
+def count_rows(path):
+    """
+    Total listings in `path` when it is cheap to know up front, else None.
+    """
+    if is_parquet(path):
+        return _import_pyarrow().parquet.ParquetFile(path).metadata.num_rows
+    return None
+
+
+def prepare_chunk(chunk):
+    """
+    Fill the columns scoring expects but exports often lack. Export ids are
+    not the engine's cluster ids, so they are cleared and every listing is
+    routed to a trained cluster by location.
+    """
+    missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"Input is missing required column(s) {missing}")
+    if 'date' not in chunk.columns:
+        chunk['date'] = datetime.now().strftime('%Y-%m-%d')
+    if 'hoa_fee' not in chunk.columns:
+        chunk['hoa_fee'] = 0.0
+    else:
+        chunk['hoa_fee'] = chunk['hoa_fee'].fillna(0.0)
+    for column in ('lat', 'long'):
+        if column not in chunk.columns:
+            chunk[column] = np.nan
+    if 'neighborhood_name' not in chunk.columns:
+        chunk['neighborhood_name'] = None
+    chunk['neighborhood_id'] = np.nan
+    return chunk
+
+
+def apply_stub_repair_estimate(scored, repair_estimate):
+    """
+    Vectorized apply_repair_estimate with the same flat estimate for every row.
+    """
+    from engine.discovery_engine import apply_repair_estimates
+
+    return apply_repair_estimates(scored, float(repair_estimate), "Flat repair estimate (bulk scoring stub)")
+
+
+def apply_prescreen(engine, scored):
+    """
+    Fold the pre-screen's provisional repair estimate into every row and add
+    its PRESCREEN_COLUMNS. Disqualified rows are kept, flagged.
+    """
+    from engine.discovery_engine import apply_repair_estimates
+    from engine.prescreen import PreScreen, prescreen_reasoning
+
+    if engine.prescreen is None:
+        engine.prescreen = PreScreen()
+    screen = engine.screen_candidates(scored)
+    for column in screen.columns:
+        scored[column] = screen[column].to_numpy()
+    return apply_repair_estimates(scored, screen['prescreen_repair_estimate'].to_numpy(),
+                                  prescreen_reasoning(screen['prescreen_reasons']))
+
+
+def score_chunk(engine, chunk, llm='skip', repair_estimate=0.0):
+    """
+    Model and finance stage for one chunk, with the LLM columns of
+    evaluate_candidates filled according to `llm`.
+    """
+    scored = engine.score_candidates(prepare_chunk(chunk))
+    if llm == 'stub':
+        return apply_stub_repair_estimate(scored, repair_estimate)
+    if llm == 'prescreen':
+        return apply_prescreen(engine, scored)
+    scored['llm_repair_estimate'] = np.nan
+    scored['llm_reasoning'] = None
+    return scored
+
+
+def _init_worker(engine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _score_in_worker(chunk, llm, repair_estimate):
+    return score_chunk(_worker_engine, chunk, llm=llm, repair_estimate=repair_estimate)
+
+
+class ScoredOutputWriter:
+    """
+    Appends scored chunks to a CSV or Parquet file. The first chunk fixes the
+    columns (and the Parquet schema).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.columns = None
+        self._parquet = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if is_parquet(path):
+            _import_pyarrow()
+        elif os.path.exists(path):
+            os.remove(path)
+
+    def write(self, scored):
+        if self.columns is None:
+            self.columns = list(scored.columns)
+        scored = scored.reindex(columns=self.columns)
+        if is_parquet(self.path):
+            pyarrow = _import_pyarrow()
+            if self._parquet is None:
+                table = pyarrow.Table.from_pandas(scored, preserve_index=False)
+                self._parquet = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            else:
+                table = pyarrow.Table.from_pandas(scored, schema=self._parquet.schema, preserve_index=False)
+            self._parquet.write_table(table)
+        else:
+            scored.to_csv(self.path, mode='a', header=not os.path.exists(self.path), index=False)
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+
+def bulk_score(engine, input_path, output_path, chunksize=50_000, workers=1, llm='skip', repair_estimate=0.0,
+               progress_seconds=5.0):
+    """
+    Score every listing in `input_path` and write them to `output_path` in
+    input order. `workers` > 1 (or -1 for all cores) scores chunks in a
+    process pool. Returns a summary dict.
+    """
+    if llm not in LLM_MODES:
+        raise ValueError(f"llm must be one of {LLM_MODES}")
+    max_workers = os.cpu_count() or 1
+    if workers is None or workers == 0:
+        workers = 1
+    if workers < 0 or workers > max_workers:
+        workers = max_workers
+
+    scoring_engine = engine.scoring_copy()
+    total = count_rows(input_path)
+    writer = ScoredOutputWriter(output_path)
+    rows = 0
+    chunks = 0
+    started = time.perf_counter()
+    last_report = started
+
+    def record(scored):
+        nonlocal rows, chunks, last_report
+        writer.write(scored)
+        rows += len(scored)
+        chunks += 1
+        metrics.inc('bulk_rows_scored', len(scored))
+        now = time.perf_counter()
+        if now - last_report >= progress_seconds:
+            last_report = now
+            done = f"{rows:,}" if total is None else f"{rows:,}/{total:,} ({rows / max(1, total):.0%})"
+            print(f"  Scored {done} listings in {now - started:.1f}s ({rows / (now - started):,.0f} rows/s)")
+
+    print(f"Scoring {input_path} in chunks of {chunksize:,} rows with {workers} worker(s)...")
+    try:
+        with metrics.timer('bulk_score', workers=workers):
+            if workers == 1:
+                for chunk in iter_listing_chunks(input_path, chunksize):
+                    record(score_chunk(scoring_engine, chunk, llm=llm, repair_estimate=repair_estimate))
+            else:
+                # Each worker receives the engine once; chunks are the only per-task payload
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                         initargs=(scoring_engine,)) as pool:
+                    pending = deque()
+                    for chunk in iter_listing_chunks(input_path, chunksize):
+                        pending.append(pool.submit(_score_in_worker, chunk, llm, repair_estimate))
+                        # Write in input order and bound how many scored chunks sit in memory
+                        while len(pending) >= workers * CHUNKS_IN_FLIGHT_PER_WORKER:
+                            record(pending.popleft().result())
+                    while pending:
+                        record(pending.popleft().result())
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        'rows': rows,
+        'chunks': chunks,
+        'seconds': elapsed,
+        'rows_per_second': rows / elapsed if elapsed > 0 else 0.0,
+        'workers': workers,
+        'output': output_path,
+    }
+    print(f"Scored {rows:,} listings ({chunks} chunks) in {elapsed:.1f}s "
+          f"({summary['rows_per_second']:,.0f} rows/s) -> {output_path}")
+    return summary
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    from engine.discovery_engine import UndervaluationEngine
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="main.py score",
+                                     description="Re-score a listing export with the current models")
+    parser.add_argument("input", help="Listings to score: CSV, columnar directory or Parquet")
+    parser.add_argument("-o", "--output", required=True, help="Scored output (.csv or .parquet)")
+    parser.add_argument("--data", default="data/housing_data_tampa.csv", help="Training history (CSV or columnar)")
+    parser.add_argument("--snapshot-dir", default=os.getenv("MODEL_SNAPSHOT_DIR", "data/model_snapshots"))
+    parser.add_argument("--chunksize", type=int, default=50_000, help="Listings per chunk")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SCORING_N_JOBS", "-1")),
+                        help="Scoring processes (-1 = all cores)")
+    parser.add_argument("--llm", choices=LLM_MODES, default='skip',
+                        help="skip: leave llm_* columns empty; stub: apply --repair-estimate to every row; "
+                             "prescreen: apply the rule-based pre-screen estimate and flags")
+    parser.add_argument("--repair-estimate", type=float, default=0.0, help="Flat repair cost for --llm stub")
+    args = parser.parse_args(argv)
+
+    engine = UndervaluationEngine.from_env(args.data, snapshot_dir=args.snapshot_dir)
+    # TRAINING_N_JOBS only matters when no snapshot matches and the models are retrained
+    engine.run_pipeline(n_jobs=int(os.getenv("TRAINING_N_JOBS", "1")))
+    try:
+        bulk_score(engine, args.input, args.output, chunksize=args.chunksize, workers=args.workers,
+                   llm=args.llm, repair_estimate=args.repair_estimate)
+    except ValueError as e:
+        raise SystemExit(f"Error: {e}")
+
+
+if __name__ == "__main__":
+    main()
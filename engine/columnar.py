@@ -0,0 +1,205 @@
+"""
+Columnar on-disk format for historical training data.
+
+A dataset is a directory holding `meta.json` plus one `.npy` file per column:
+- numeric columns are stored as float32 (integers as int32)
+- string columns are stored as int32 category codes plus a `<column>.categories.npy` table
+- `date` is stored pre-parsed as datetime64[ns], alongside a precomputed `days_since_start`
+
+Columns are memory-mapped on load, and `columns=` projects the read down to
+just what training needs.
+
+Usage:
+    python -m engine.columnar convert data/housing_data_tampa.csv data/housing_data_tampa.npcol
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+META_FILE = "meta.json"
+DATE_COLUMN = "date"
+
+
+def is_columnar(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, META_FILE))
+
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE), 'r') as f:
+        return json.load(f)
+
+
+def _column_kind(series):
+    if series.name == DATE_COLUMN:
+        return 'datetime'
+    if pd.api.types.is_bool_dtype(series):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(series):
+        return 'int32'
+    if pd.api.types.is_float_dtype(series):
+        return 'float32'
+    return 'category'
+
+
+def _merge_kinds(kind, other):
+    """
+    The kind that holds both `kind` and `other`, when chunks of one column
+    were inferred differently (e.g. a chunk with a blank cell reads as float).
+    """
+    if kind is None or kind == other:
+        return other
+    if {kind, other} == {'int32', 'float32'}:
+        return 'float32'
+    return 'category'
+
+
+def _storage_dtype(kind):
+    return {
+        'datetime': np.dtype('datetime64[ns]'),
+        'bool': np.dtype(bool),
+        'int32': np.dtype(np.int32),
+        'float32': np.dtype(np.float32),
+        'category': np.dtype(np.int32),
+    }[kind]
+
+
+def convert_csv(csv_path, out_dir, chunksize=1_000_000):
+    """
+    Convert a CSV into the columnar format without holding it in memory:
+    one pass to count rows, find the start date and pick every column's
+    type from the whole file, one pass to fill preallocated memory-mapped
+    columns chunk by chunk.
+
+    A column is stored as int32 only if every value is an integer in int32
+    range; columns with blanks or fractions are float32.
+    """
+    num_rows = 0
+    start_date = None
+    kinds = {}
+    int_ranges = {}
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        num_rows += len(chunk)
+        chunk_min = pd.to_datetime(chunk[DATE_COLUMN]).min()
+        start_date = chunk_min if start_date is None else min(start_date, chunk_min)
+        for name in chunk.columns:
+            kind = _column_kind(chunk[name])
+            kinds[name] = _merge_kinds(kinds.get(name), kind)
+            if kind == 'int32' and len(chunk):
+                low, high = int_ranges.get(name, (chunk[name].min(), chunk[name].max()))
+                int_ranges[name] = (min(low, chunk[name].min()), max(high, chunk[name].max()))
+    int32 = np.iinfo(np.int32)
+    for name, (low, high) in int_ranges.items():
+        if kinds[name] == 'int32' and (low < int32.min or high > int32.max):
+            raise ValueError(f"Column {name!r} has integers outside the int32 range ({low}..{high})")
+
+    os.makedirs(out_dir, exist_ok=True)
+    columns = {}
+    arrays = {}
+    category_codes = {}
+    offset = 0
+
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        if not columns:
+            # Column types were picked from the whole file in the first pass
+            for name in chunk.columns:
+                kind = kinds[name]
+                columns[name] = {'kind': kind, 'file': f"{name}.npy"}
+                arrays[name] = np.lib.format.open_memmap(
+                    os.path.join(out_dir, f"{name}.npy"), mode='w+',
+                    dtype=_storage_dtype(kind), shape=(num_rows,)
+                )
+                if kind == 'category':
+                    category_codes[name] = {}
+            columns['days_since_start'] = {'kind': 'int32', 'file': "days_since_start.npy"}
+            arrays['days_since_start'] = np.lib.format.open_memmap(
+                os.path.join(out_dir, "days_since_start.npy"), mode='w+', dtype=np.int32, shape=(num_rows,)
+            )
+
+        end = offset + len(chunk)
+        for name, spec in columns.items():
+            if name == 'days_since_start':
+                continue
+            kind = spec['kind']
+            if kind == 'datetime':
+                dates = pd.to_datetime(chunk[name])
+                arrays[name][offset:end] = dates.values.astype('datetime64[ns]')
+                arrays['days_since_start'][offset:end] = (dates - start_date).dt.days.values
+            elif kind == 'category':
+                # Local codes -> global codes so categories stay consistent across chunks
+                local_codes, uniques = pd.factorize(chunk[name].astype(str))
+                lookup = category_codes[name]
+                global_codes = np.array([lookup.setdefault(value, len(lookup)) for value in uniques], dtype=np.int32)
+                arrays[name][offset:end] = global_codes[local_codes]
+            elif kind == 'int32' and not pd.api.types.is_integer_dtype(chunk[name]):
+                # Only if the file changed between the two passes
+                raise ValueError(f"Column {name!r} has non-integer values in rows {offset}-{end}")
+            else:
+                arrays[name][offset:end] = chunk[name].values.astype(_storage_dtype(kind))
+        offset = end
+
+    for name, lookup in category_codes.items():
+        categories_file = f"{name}.categories.npy"
+        np.save(os.path.join(out_dir, categories_file), np.array(list(lookup), dtype=str))
+        columns[name]['categories_file'] = categories_file
+    for array in arrays.values():
+        array.flush()
+
+    meta = {
+        'format_version': FORMAT_VERSION,
+        'num_rows': num_rows,
+        'start_date': start_date.isoformat() if start_date is not None else None,
+        'columns': columns,
+    }
+    with open(os.path.join(out_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+def load_columnar(path, columns=None, mmap=True):
+    """
+    Load a columnar dataset as a DataFrame. `columns` limits what is read
+    from disk; numeric columns are memory-mapped when `mmap` is True.
+    """
+    meta = read_meta(path)
+    if meta.get('format_version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar format version {meta.get('format_version')} in {path}")
+
+    specs = meta['columns']
+    names = list(specs) if columns is None else list(columns)
+    missing = [name for name in names if name not in specs]
+    if missing:
+        raise KeyError(f"Columns not in {path}: {missing}")
+
+    data = {}
+    mmap_mode = 'r' if mmap else None
+    for name in names:
+        spec = specs[name]
+        values = np.load(os.path.join(path, spec['file']), mmap_mode=mmap_mode)
+        if spec['kind'] == 'category':
+            categories = np.load(os.path.join(path, spec['categories_file']))
+            data[name] = pd.Categorical.from_codes(np.asarray(values), categories=categories)
+        else:
+            data[name] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert historical CSV data to the columnar format.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert = subparsers.add_parser('convert', help="Convert a CSV file")
+    convert.add_argument('csv_path')
+    convert.add_argument('out_dir')
+    convert.add_argument('--chunksize', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        meta = convert_csv(args.csv_path, args.out_dir, chunksize=args.chunksize)
+        print(f"Wrote {meta['num_rows']} rows x {len(meta['columns'])} columns to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+"""
+The discovery daemon: fetch listings, re-score changed ones, enrich the top
+candidates with the LLM, alert on new champions and export the leaderboard,
+each as its own scheduled job. Run it with `python main.py daemon`.
+"""
+from engine.discovery_engine import UndervaluationEngine
+from engine.api_client import RentCastClient
+from engine.llm_evaluator import LLMPropertyEvaluator
+from engine.llm_cache import LLMResponseCache
+from engine.listing_store import ListingStore
+from engine.metrics import metrics
+from engine.scheduler import MonthlyQuota, Scheduler
+from engine.alerts import AlertDispatcher, make_alert
+from engine.profile_matcher import ProfileMatcher, load_profiles
+import pandas as pd
+import numpy as np
+import argparse
+import json
+from datetime import datetime
+
+import os
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# You can move this to config.py later if you prefer
+DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "https://discord.com/api/webhooks/1475344856501981294/U1Ayd3EJAQuLzA5AWsRZOIsUiVQ6Ken9JjQxMIC2Q8o5-9MrPn5RsLQgoHydG2VGQv5i")
+
+def print_financial_advice():
+    print("\n" + "="*50)
+    print("FINANCIAL ADVICE: EQUITY VS. SUNK COSTS")
+    print("="*50)
+    print("1. HOUSE EQUITY: Principal payments are RECOVERABLE wealth.")
+    print("2. HOA FEES: These are SUNK COSTS (like rent) that never return.")
+    print("3. BUYING POWER LOSS: Every $1 in HOA fee reduces your potential")
+    print("   mortgage principal by ~$150. A $500 HOA fee 'costs' you")
+    print("   roughly $75,000 in home-buying power.")
+    print("\nPRO TIP: Focus on 'Alpha' homes with LOW or NO HOA fees to")
+    print("maximize the ratio of wealth-building to sunk-cost spending.")
+
+def build_champion_alert(row, reason="", reign=0):
+    """
+    Discord embed for a Champion property. The dedupe key is built from content
+    only: the reign (a persisted count of champion changes, see save_champion),
+    the listing and its price. Rebuilding the same alert, e.g. after a restart,
+    gives the same key, while a champion that is displaced and later regains
+    the top spot starts a new reign and is announced again.
+    """
+    # Format the numbers
+    price_str = f"${row['price']:,.0f}"
+    market_val_str = f"${row['predicted_price']:,.0f}"
+    alpha_str = f"{row['undervaluation_pct']:.1f}%"
+    mortgage_str = f"${row['monthly_mortgage']:,.0f}/mo"
+    hoa_str = f"${row['hoa_fee']:,.0f}/mo"
+    tax_ins_str = f"${row.get('monthly_tax_ins', 0):,.0f}/mo"
+    total_monthly = row['total_monthly_cost']
+    total_str = f"${total_monthly:,.0f}/mo"
+
+    mortgage_rate = float(os.getenv("MORTGAGE_INTEREST_RATE", "0.06"))
+    mortgage_rate_pct = f"{mortgage_rate * 100:g}%"
+
+    title_prefix = "💎"
+    embed = {
+        "title": f"{title_prefix} {alpha_str} Undervalued",
+        "description": f"The #1 Best Deal currently on the market in Tampa ({row['neighborhood_name']})!\n{reason}\n*Evaluated at 100% Debt Financing ({mortgage_rate_pct} Market Rate)*",
+        "color": 5814783, # A nice green color
+        "fields": [
+            {"name": "Address", "value": row['address'], "inline": False},
+            {"name": "Listed Price", "value": price_str, "inline": True},
+            {"name": "AI Fair Value", "value": market_val_str, "inline": True},
+            {"name": "Alpha Score", "value": alpha_str, "inline": True},
+            {"name": f"Est. Mortgage ({mortgage_rate_pct})", "value": mortgage_str, "inline": True},
+            {"name": "HOA Fee", "value": hoa_str, "inline": True},
+            {"name": "Taxes & Ins.", "value": tax_ins_str, "inline": True},
+            {"name": "TOTAL Carrying Cost", "value": f"**{total_str}**", "inline": True},
+            {"name": "LLM Repair Est.", "value": f"${row.get('llm_repair_estimate', 0):,.0f}", "inline": True},
+            {"name": "LLM Reasoning", "value": str(row.get('llm_reasoning', 'N/A')), "inline": False}
+        ],
+        "footer": {"text": "Undervalued Home Discovery Engine • Continuous Scanner"}
+    }
+
+    content = f"🏆 **New Champion Alert** in {row['neighborhood_name']}! ({row['address']} for {price_str})"
+    return make_alert(f"champion:{reign}:{row['house_id']}:{row['price']:.0f}", content, embed)
+
+def send_discord_alert(gem_df, is_new_champ=False, reason="", dispatcher=None, reign=0):
+    """
+    Sends a formatted alert to Discord for the Champion property.
+    With a dispatcher the alert is queued and delivered in the background;
+    without one it is posted synchronously.
+    """
+    row = gem_df.iloc[0] # We only send the top 1
+    alert = build_champion_alert(row, reason, reign=reign)
+    if dispatcher is not None:
+        with metrics.timer('scan_stage', stage='alert'):
+            dispatcher.enqueue(alert)
+        return
+
+    if not DISCORD_WEBHOOK_URL:
+        return
+    one_off = AlertDispatcher(DISCORD_WEBHOOK_URL, queue_path=None, start=False)
+    try:
+        with metrics.timer('scan_stage', stage='alert'):
+            one_off.enqueue(alert)
+            one_off.deliver_pending()
+    finally:
+        one_off.close()
+
+
+
+CHAMPION_FILE = "data/current_champion.json"
+
+def score_market(engine, store, listings_df, max_score_age_days=7, diff=None):
+    """
+    Re-score only new or changed listings and merge them with cached scores
+    for unchanged ones. Returns the scored market and the store's diff.
+    Pass the `diff` from an earlier store.sync() of the same listings to avoid
+    syncing twice.
+    """
+    if diff is None:
+        diff = store.sync(listings_df)
+    scoring_key = engine.scoring_key()
+    cached_df = store.load_scores(diff['unchanged'], scoring_key, max_age_days=max_score_age_days)
+
+    cached_ids = set(cached_df['house_id'].astype(str)) if not cached_df.empty else set()
+    to_score_df = listings_df[~listings_df['house_id'].astype(str).isin(cached_ids)]
+    fresh_df = engine.score_candidates(to_score_df) if not to_score_df.empty else to_score_df
+    store.save_scores(fresh_df, scoring_key)
+
+    for status in ('new', 'changed', 'unchanged', 'delisted'):
+        metrics.inc('listings_synced', len(diff[status]), status=status)
+    metrics.inc('scores_reused', len(cached_df))
+    print(f"  -> {len(diff['new'])} new, {len(diff['changed'])} changed, {len(diff['unchanged'])} unchanged, "
+          f"{len(diff['delisted'])} delisted. Scored {len(fresh_df)}, reused {len(cached_df)} cached scores.")
+    scored_df = pd.concat([df for df in (fresh_df, cached_df) if not df.empty], ignore_index=True)
+    return scored_df, diff
+
+def load_champion_record():
+    """
+    The saved champion: {'house_id': ..., 'reign': ...}, or {} if there is none.
+    """
+    if os.path.exists(CHAMPION_FILE):
+        try:
+            with open(CHAMPION_FILE, 'r') as f:
+                return json.load(f)
+        except:
+            return {}
+    return {}
+
+def load_champion():
+    return load_champion_record().get('house_id')
+
+def save_champion(house_id, reign=0):
+    """
+    `reign` counts champion changes; it keys the champion alert, so it is
+    saved before the alert is queued.
+    """
+    # Ensure data directory exists
+    os.makedirs("data", exist_ok=True)
+    with open(CHAMPION_FILE, 'w') as f:
+        json.dump({'house_id': house_id, 'reign': reign}, f)
+
+class DaemonState:
+    """
+    Latest results the daemon's jobs hand to each other: the live feed, its
+    pending store diff, the scored market, the LLM-ranked top candidates and
+    the champion. The scheduler runs one job at a time, so no locking is needed.
+    """
+    def __init__(self, engine, client, store, llm_cache, champion_id=None, alerts=None, profiles=None,
+                 champion_reign=0):
+        self.engine = engine
+        self.client = client
+        self.store = store
+        self.llm_cache = llm_cache
+        self.alerts = alerts
+        self.profiles = profiles
+        self.champion_id = champion_id
+        self.champion_reign = champion_reign
+        self.listings_df = None
+        self.pending_diff = None
+        self.scored_df = None
+        self.evaluated_df = None
+        self.last_diff = None
+
+def fetch_step(state, limit=500):
+    """
+    Fetch the live feed and sync it into the listing store.
+    Returns the store diff, or None when the feed came back empty.
+    """
+    timestamp = datetime.now().strftime('%H:%M:%S')
+    print(f"\n[{timestamp}] Fetching latest active listings...")
+    
+    # 2. Fetch Live Candidates
+    with metrics.timer('scan_stage', stage='fetch'):
+        live_listings_df = state.client.fetch_listings(city="Tampa", state="FL", limit=limit) # Deeper Pagination around stale stock
+    metrics.set_gauge('listings_active', len(live_listings_df))
+    
+    if live_listings_df.empty:
+        print(f"[{timestamp}] No active listings returned by API.")
+        return None
+
+    print(f"[{timestamp}] Scanned {len(live_listings_df)} listings. Syncing with listing store...")
+    state.listings_df = live_listings_df
+    state.pending_diff = state.store.sync(live_listings_df)
+    return state.pending_diff
+
+def rescore_step(state):
+    """
+    Score only what changed since the last scan, reusing cached scores for the rest.
+    """
+    if state.listings_df is None:
+        return None
+    diff, state.pending_diff = state.pending_diff, None
+    with metrics.timer('scan_stage', stage='score'):
+        state.scored_df, state.last_diff = score_market(state.engine, state.store, state.listings_df, diff=diff)
+    return state.scored_df
+
+def match_profiles_step(state, top_n=10, path="data/profile_matches.json"):
+    """
+    Re-index the scored market for the buyer profiles, report which profiles
+    each new listing fits and save every profile's best matches.
+    """
+    if state.profiles is None or state.scored_df is None or state.scored_df.empty:
+        return None
+    timestamp = datetime.now().strftime('%H:%M:%S')
+    with metrics.timer('scan_stage', stage='profiles'):
+        state.profiles.index_listings(state.scored_df)
+        new_ids = set(state.last_diff['new']) if state.last_diff else set()
+        new_listings = state.scored_df[state.scored_df['house_id'].astype(str).isin(new_ids)]
+        matched_profiles = set()
+        for listing in new_listings.to_dict('records'):
+            matched = state.profiles.profiles_for_listing(listing)
+            matched_profiles.update(matched)
+            metrics.inc('profile_matches_new_listings', len(matched))
+        if len(new_listings):
+            print(f"[{timestamp}] {len(new_listings)} new listing(s) fit {len(matched_profiles)} buyer profile(s)")
+
+        matches = state.profiles.match_all(top_n=top_n)
+        if 'date' in matches.columns:
+            matches['date'] = matches['date'].astype(str)
+        matches.to_json(path, orient='records', indent=4)
+    print(f"[{timestamp}] Matched {len(state.profiles.profiles)} buyer profile(s); saved to {path}")
+    return matches
+
+def enrich_step(state, top_n=10):
+    """
+    Run OpenAI on the top N scored listings to rank the current Champion.
+    """
+    if state.scored_df is None or state.scored_df.empty:
+        return None
+    timestamp = datetime.now().strftime('%H:%M:%S')
+    with metrics.timer('scan_stage', stage='llm'):
+        state.evaluated_df = state.engine.select_top_candidates(
+            state.scored_df, top_n=top_n, llm_concurrency=int(os.getenv("LLM_CONCURRENCY", "4"))
+        )
+    
+    cache_stats = state.llm_cache.stats()
+    print(f"[{timestamp}] LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+          f"({cache_stats['size']} entries)")
+    
+    if state.evaluated_df.empty:
+        print(f"[{timestamp}] Evaluated properties but result was empty.")
+    return state.evaluated_df
+
+def alert_step(state):
+    """
+    Alert on Discord when the top-ranked listing is a new Champion.
+    """
+    if state.evaluated_df is None or state.evaluated_df.empty:
+        return
+    timestamp = datetime.now().strftime('%H:%M:%S')
+    current_best = state.evaluated_df.iloc[0]
+    best_id = current_best['house_id']
+    metrics.set_gauge('champion_undervaluation_pct', current_best['undervaluation_pct'])
+    
+    if state.champion_id is None:
+        # First run - Establish initial champion
+        state.champion_id = best_id
+        state.champion_reign += 1
+        save_champion(best_id, state.champion_reign)
+        print("\n" + "🏆"*20)
+        print(f"INITIAL MARKET CHAMPION ESTABLISHED: {current_best['address']}")
+        print("🏆"*20)
+        reason = "_Initial Scan - Best property currently available._"
+        send_discord_alert(state.evaluated_df.head(1), is_new_champ=True, reason=reason, dispatcher=state.alerts,
+                           reign=state.champion_reign)
+        
+    elif best_id != state.champion_id:
+        # Champion changed!
+        print("\n" + "🏆"*20)
+        print(f"CHAMPION OVERTHROWN!")
+        print("🏆"*20)
+        
+        if state.listings_df is None or state.champion_id not in state.listings_df['house_id'].values:
+            reason = "*Previous champion sold/delisted - falling to next in line.*"
+        else:
+            reason = "*New property dethroned the previous champion!*"
+        
+        print(f"Reason: {reason}")
+        print(f"New Champion: {current_best['address']} (Alpha: {current_best['undervaluation_pct']:.1f}%)")
+        
+        state.champion_id = best_id
+        state.champion_reign += 1
+        save_champion(best_id, state.champion_reign)
+        send_discord_alert(state.evaluated_df.head(1), is_new_champ=True, reason=reason, dispatcher=state.alerts,
+                           reign=state.champion_reign)
+        
+    else:
+        print(f"[{timestamp}] Champion holding strong: {current_best['address']} (Alpha: {current_best['undervaluation_pct']:.1f}%)")
+
+def export_step(state):
+    """
+    Save the Top 10 Leaderboard and print the current Champion.
+    """
+    if state.evaluated_df is None or state.evaluated_df.empty:
+        return
+    timestamp = datetime.now().strftime('%H:%M:%S')
+
+    # Always save the Top 10 Leaderboard to a JSON file (Information Engine Feature)
+    top_10_df = state.evaluated_df.head(10)
+    # Convert datetime columns to string before exporting to JSON (assign leaves evaluated_df as is)
+    if 'date' in top_10_df.columns:
+         top_10_df = top_10_df.assign(date=top_10_df['date'].astype(str))
+         
+    top_10_json_path = "data/top_10_winners.json"
+    with metrics.timer('scan_stage', stage='export'):
+        top_10_df.to_json(top_10_json_path, orient='records', indent=4)
+    print(f"[{timestamp}] Top 10 Leaderboard saved to {top_10_json_path}")
+
+    # Always print the current champion stats to terminal just so we can see it
+    mortgage_rate = float(os.getenv("MORTGAGE_INTEREST_RATE", "0.06"))
+    mortgage_rate_pct = f"{mortgage_rate * 100:g}%"
+
+    display_df = state.evaluated_df.head(1)[['address', 'neighborhood_name', 'price', 'predicted_price', 'total_monthly_cost', 'undervaluation_pct', 'llm_repair_estimate']]
+    display_df = display_df.rename(columns={
+        'address': 'Address',
+        'neighborhood_name': 'Zip/Area',
+        'price': 'Listed Price',
+        'predicted_price': 'Market Val',
+        'total_monthly_cost': 'Total Cost/mo',
+        'undervaluation_pct': 'Alpha %',
+        'llm_repair_estimate': 'Repair Est'
+    })
+    
+    cols_to_format = ['Listed Price', 'Market Val', 'Total Cost/mo']
+    for col in cols_to_format:
+        display_df[col] = display_df[col].map('${:,.0f}'.format)
+    
+    print("\nLeaderboard (Current Champion):")
+    print(display_df.to_string(index=False))
+    print(f"\nLLM Reasoning: {state.evaluated_df.iloc[0].get('llm_reasoning', 'N/A')}")
+    print_financial_advice()
+
+def run_scan_cycle(engine, client, store, llm_cache, current_champion_id, alerts=None, profiles=None):
+    """
+    One full scan, every step in sequence: fetch, score, LLM-rank, alert on a
+    champion change and export the leaderboard. Returns the (possibly new)
+    champion id.
+    """
+    state = DaemonState(engine, client, store, llm_cache, champion_id=current_champion_id, alerts=alerts,
+                        profiles=profiles, champion_reign=load_champion_record().get('reign', 0))
+    if fetch_step(state) is None:
+        return current_champion_id
+    rescore_step(state)
+    match_profiles_step(state)
+    evaluated_df = enrich_step(state)
+    if evaluated_df is None or evaluated_df.empty:
+        return state.champion_id
+    alert_step(state)
+    export_step(state)
+    return state.champion_id
+
+def build_scheduler(state, metrics_path=None):
+    """
+    The daemon's jobs, each on its own cadence (all intervals in seconds, env-tunable):
+    - fetch: pulls the live feed, paced so the RentCast monthly quota lasts the
+      whole month (and never more often than FETCH_MIN_INTERVAL_SECONDS).
+      New, changed or delisted listings trigger an immediate re-score.
+    - rescore: re-scores the market (RESCORE_INTERVAL_SECONDS), matches it against
+      the buyer profiles (if any, saved to PROFILE_MATCHES_PATH), then triggers enrich
+    - enrich: LLM-ranks the top candidates (ENRICH_INTERVAL_SECONDS), then
+      triggers alerts and export
+    - alerts / export: champion alerts and the Top 10 leaderboard
+    - metrics: writes the metrics snapshot when METRICS_PATH is set
+    Failed jobs back off exponentially instead of waiting out their full interval.
+    """
+    scheduler = Scheduler()
+
+    # SECURITY: The RentCast Free Tier only allows 50 requests per month.
+    # Every page of a fetch is one request, so the cadence is budgeted on what fetches actually cost.
+    quota = MonthlyQuota(int(os.getenv("RENTCAST_MONTHLY_QUOTA", "50")),
+                         path=os.getenv("RENTCAST_QUOTA_PATH", "data/rentcast_quota.json"))
+    fetch_limit = int(os.getenv("FETCH_LIMIT", "500"))
+    profile_matches_path = os.getenv("PROFILE_MATCHES_PATH", "data/profile_matches.json")
+    min_fetch_interval = float(os.getenv("FETCH_MIN_INTERVAL_SECONDS", str(60 * 60 * 15)))
+    # Worst case until the first fetch tells us how many pages the feed needs
+    fetch_cost = {'requests': -(-fetch_limit // RentCastClient.PAGE_SIZE)}
+
+    def fetch_job():
+        if quota.remaining < fetch_cost['requests']:
+            print(f"RentCast quota exhausted ({quota.used}/{quota.monthly_limit} this month); skipping fetch.")
+            return
+        before = state.client.requests_made
+        diff = fetch_step(state, limit=fetch_limit)
+        spent = state.client.requests_made - before
+        quota.spend(spent)
+        if spent:
+            fetch_cost['requests'] = spent
+        if diff is None:
+            raise RuntimeError("No active listings returned by API")
+        if diff['new'] or diff['changed'] or diff['delisted']:
+            scheduler.trigger('rescore')
+
+    def fetch_interval():
+        return max(min_fetch_interval, quota.next_interval(fetch_cost['requests']))
+
+    def rescore_job():
+        if rescore_step(state) is not None:
+            match_profiles_step(state, path=profile_matches_path)
+            scheduler.trigger('enrich')
+
+    def enrich_job():
+        evaluated_df = enrich_step(state)
+        if evaluated_df is not None and not evaluated_df.empty:
+            scheduler.trigger('alerts')
+            scheduler.trigger('export')
+
+    scheduler.add_job('fetch', fetch_job, fetch_interval, jitter_seconds=300,
+                      backoff_seconds=15 * 60, max_backoff_seconds=6 * 3600, run_immediately=True)
+    scheduler.add_job('rescore', rescore_job, float(os.getenv("RESCORE_INTERVAL_SECONDS", str(6 * 3600))),
+                      jitter_seconds=60)
+    scheduler.add_job('enrich', enrich_job, float(os.getenv("ENRICH_INTERVAL_SECONDS", str(24 * 3600))),
+                      jitter_seconds=60)
+    scheduler.add_job('alerts', lambda: alert_step(state), float(os.getenv("ALERT_INTERVAL_SECONDS", str(6 * 3600))),
+                      jitter_seconds=30)
+    scheduler.add_job('export', lambda: export_step(state), float(os.getenv("EXPORT_INTERVAL_SECONDS", str(6 * 3600))),
+                      jitter_seconds=30)
+    if metrics_path:
+        scheduler.add_job('metrics', lambda: metrics.write(metrics_path),
+                          float(os.getenv("METRICS_INTERVAL_SECONDS", "60")))
+    return scheduler
+
+def main(argv=None):
+    argparse.ArgumentParser(prog="main.py daemon",
+                            description="Scan the market on a schedule, re-score, enrich and alert. "
+                                        "Configured through environment variables (see README).").parse_args(argv)
+    print("="*50)
+    print("HOUSE DISCOVERY ENGINE: DAEMON MODE STARTING")
+    print("="*50)
+
+    # METRICS_PATH enables per-stage timers and counters, written every METRICS_INTERVAL_SECONDS:
+    # *.prom for node_exporter's textfile collector, anything else as JSON
+    metrics_path = os.getenv("METRICS_PATH")
+    if metrics_path:
+        # METRICS_TRACK_MEMORY=1 adds per-stage peak memory gauges (tracemalloc; slows scoring)
+        metrics.configure(enabled=True, track_memory=os.getenv("METRICS_TRACK_MEMORY", "0") == "1")
+        print(f"Writing metrics to {metrics_path}.")
+    
+    # 1. Initialize & Train (Done ONCE)
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Booting Engine & Training Memory Models...")
+    historical_data_path = "data/housing_data_tampa.csv"
+    # Trained models are snapshotted here and reused until the CSV or model code changes
+    snapshot_dir = os.getenv("MODEL_SNAPSHOT_DIR", "data/model_snapshots")
+    # Repair estimates are cached on disk so unchanged listings are not re-sent to GPT-4o every scan
+    llm_cache = LLMResponseCache(
+        path=os.getenv("LLM_CACHE_PATH", "data/llm_cache.json"),
+        ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    )
+    # USE_COMPS, STREAMING_TRAINING, BASELINE_BACKEND and LOCAL_BACKEND pick the models
+    engine = UndervaluationEngine.from_env(historical_data_path, snapshot_dir=snapshot_dir,
+                                           llm_evaluator=LLMPropertyEvaluator(cache=llm_cache))
+    # TRAINING_N_JOBS > 1 fits the neighborhood perceptrons in parallel (-1 = all cores)
+    engine.run_pipeline(n_jobs=int(os.getenv("TRAINING_N_JOBS", "1")))
+    
+    
+    rentcast_api_key = os.getenv("RENTCAST_API_KEY", "8efdc915106b4bce818b259f9af58484")
+    # Forcing Mock Data fallback because the RentCast Free API returns only stale >200 day inventory first.
+    client = RentCastClient("")
+    
+    # State tracking: every listing seen, its fingerprint and its last score
+    store = ListingStore(os.getenv("LISTING_STORE_PATH", "data/listings.db"))
+    
+    # Alerts are posted from a background queue so a slow webhook never stalls scoring.
+    # Undelivered alerts are kept in ALERT_QUEUE_PATH and retried after a restart.
+    alerts = None
+    if DISCORD_WEBHOOK_URL:
+        alerts = AlertDispatcher(DISCORD_WEBHOOK_URL, queue_path=os.getenv("ALERT_QUEUE_PATH", "data/pending_alerts.json"))
+    
+    # BUYER_PROFILES_PATH: JSON list of buyer profiles (salary, cash, max_dti, program, zips, ...)
+    # to match against every re-scored market
+    profiles = None
+    profiles_path = os.getenv("BUYER_PROFILES_PATH")
+    if profiles_path:
+        profiles = ProfileMatcher(load_profiles(profiles_path))
+        print(f"Loaded {len(profiles.profiles)} buyer profile(s) from {profiles_path}.")
+    
+    # Load champion from persistent storage so Railway restarts don't trigger duplicate alerts
+    champion = load_champion_record()
+    state = DaemonState(engine, client, store, llm_cache, champion_id=champion.get('house_id'), alerts=alerts,
+                        profiles=profiles, champion_reign=champion.get('reign', 0))
+    if state.champion_id:
+        print(f"Successfully loaded previous champion from memory: {state.champion_id}")
+    
+    scheduler = build_scheduler(state, metrics_path=metrics_path)
+    
+    print("\n==================================================")
+    print("DAEMON ONLINE: Scanning market for the Champion Home")
+    print("==================================================")
+    
+    # Runs until Ctrl+C / SIGTERM; the job in progress finishes first
+    scheduler.run_forever()
+    if alerts is not None:
+        alerts.close()
+    store.close()
+    metrics.write(metrics_path)
+    print("\nShutting down discovery daemon. Goodbye!")
+
+if __name__ == "__main__":
+    main()
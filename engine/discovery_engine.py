@@ -1,71 +1,524 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import copy
 import os
-from engine.models import BaselineRegressor, OverfitPerceptron, TimeTrendRegressor
-from engine.llm_evaluator import LLMPropertyEvaluator
+import time
+from concurrent.futures import ProcessPoolExecutor
+from engine.models import BaselineRegressor, TimeTrendRegressor, make_local_model
+from engine.model_store import ModelSnapshotStore, hash_training_data, snapshot_key
+from engine.spatial import COMP_FEATURES, ComparablesIndex
+from engine.geo_clusters import ClusterLocator
+from engine.columnar import is_columnar, load_columnar
+from engine.streaming import ReservoirSample, StreamingDigest, available_columns, history_chunk_factory
+from engine.metrics import metrics
+from engine.topk import TopKSelector
+from engine.finance import SUNK_COST_MULTIPLE, TAX_INSURANCE_RATE, payment_factor
+from engine.memory import csv_dtypes, downcast_frame
+from engine.prescreen import PRESCREEN_COLUMNS, PreScreen, prescreen_reasoning
+
+# Bump when training or scoring logic changes so saved snapshots get retrained
+MODEL_VERSION = 5
+
+# Feature sets shared by training and scoring
+BASELINE_FEATURES = ['sqft', 'beds', 'baths', 'neighborhood_id']
+LOCAL_FEATURES = ['sqft', 'beds', 'baths', 'days_since_start']
+TRAINING_COLUMNS = ['sqft', 'beds', 'baths', 'neighborhood_id', 'date', 'price']
+LOCATOR_COLUMNS = ['lat', 'long', 'neighborhood_name']
+
+# Neighborhoods with fewer rows than this fall back to baseline + time trend
+MIN_CLUSTER_ROWS = 15
+
+# Everything run_pipeline produces, i.e. what a snapshot has to restore
+SNAPSHOT_ATTRIBUTES = ['baseline', 'time_trend', 'local_models', 'start_date', 'comparables', 'cluster_locator']
+
+# Columns add_finance_columns derives from price, hoa_fee and predicted_price
+FINANCE_COLUMNS = ['monthly_mortgage', 'monthly_tax_ins', 'total_monthly_cost', 'fee_capitalized_cost',
+                   'fee_adjusted_value', 'undervaluation_amount', 'undervaluation_pct']
+
+# Columns apply_repair_estimate(s) rewrite when a repair estimate is folded in
+REPAIR_COLUMNS = ['predicted_price', 'fee_adjusted_value', 'undervaluation_amount', 'undervaluation_pct',
+                  'llm_repair_estimate', 'llm_reasoning']
+
+# How score_candidates fills `neighborhood_id` from lat/long/zip:
+# 'missing' only fills blanks, 'always' overrides placeholder ids, 'never' trusts the input
+CLUSTER_ASSIGNMENT_MODES = ('missing', 'always', 'never')
+
+
+def undervaluation_pct(price, hoa_fee, predicted_price):
+    """
+    The `undervaluation_pct` that add_finance_columns produces, computed on
+    plain arrays without adding any columns. Used to rank streamed chunks.
+    """
+    price = np.asarray(price, dtype=float)
+    monthly_tax_ins = (price * TAX_INSURANCE_RATE) / 12
+    fee_capitalized_cost = (np.asarray(hoa_fee, dtype=float) + monthly_tax_ins) * SUNK_COST_MULTIPLE
+    fee_adjusted_value = np.asarray(predicted_price, dtype=float) - fee_capitalized_cost
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return ((fee_adjusted_value - price) / price) * 100
+
+def apply_repair_estimate(row, eval_result):
+    """
+    Fold an LLM repair estimate into one scored row (a Series or dict with the
+    finance columns) and recompute everything downstream of predicted_price.
+    Updates and returns `row`.
+    """
+    # Subtract the absolute repair cost estimate from the predicted baseline price
+    updated_predicted_price = row['predicted_price'] - eval_result['repair_cost_estimate']
+    
+    # Recalculate everything downstream
+    updated_fee_adjusted = updated_predicted_price - row['fee_capitalized_cost']
+    updated_underv_amt = updated_fee_adjusted - row['price']
+    updated_underv_pct = (updated_underv_amt / row['price']) * 100 if row['price'] != 0 else 0
+    
+    row['predicted_price'] = updated_predicted_price
+    row['fee_adjusted_value'] = updated_fee_adjusted
+    row['undervaluation_amount'] = updated_underv_amt
+    row['undervaluation_pct'] = updated_underv_pct
+    row['llm_repair_estimate'] = eval_result['repair_cost_estimate']
+    row['llm_reasoning'] = eval_result['reasoning']
+    return row
+
+
+def apply_repair_estimates(scored, estimates, reasoning):
+    """
+    Vectorized apply_repair_estimate: fold per-row (or one flat) repair
+    estimates into a scored frame in place. `reasoning` is a string or an
+    array aligned with the rows. Returns `scored`.
+    """
+    scored['predicted_price'] = scored['predicted_price'] - estimates
+    scored['fee_adjusted_value'] = scored['predicted_price'] - scored['fee_capitalized_cost']
+    scored['undervaluation_amount'] = scored['fee_adjusted_value'] - scored['price']
+    price = scored['price'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = scored['undervaluation_amount'].to_numpy(dtype=float) / price * 100
+    scored['undervaluation_pct'] = np.where(price != 0, pct, 0.0)
+    scored['llm_repair_estimate'] = estimates if np.ndim(estimates) else float(estimates)
+    scored['llm_reasoning'] = reasoning
+    return scored
+
+def _fit_local_model(nb_id, X_local, y_local, backend='mlp'):
+    """
+    Fit a single neighborhood model. Lives at module level so it can be
+    shipped to a process pool. Every local backend pins its own random_state,
+    so the fitted weights do not depend on which worker runs the job.
+    """
+    started = time.perf_counter()
+    local_model = make_local_model(backend)
+    local_model.fit(X_local, y_local)
+    return nb_id, local_model, time.perf_counter() - started
 
 class UndervaluationEngine:
-    def __init__(self, data=None, data_path=None):
-        if data is not None:
-            self.df = data.copy()
+    def __init__(self, data=None, data_path=None, snapshot_dir=None, llm_evaluator=None, use_comps=False,
+                 assign_clusters='missing', columns=None, streaming=False, chunksize=250_000,
+                 reservoir_size=200_000, stream_epochs=1, local_iterations_per_chunk=20,
+                 baseline_backend='random_forest', local_backend='mlp', low_memory=False, prescreen=None):
+        """
+        data_path may be a CSV file or a columnar dataset directory (see engine.columnar).
+        Columnar datasets are read with column projection: only the columns training
+        needs are loaded unless `columns` says otherwise.
+
+        streaming=True never loads the whole history: training reads `data_path` in
+        chunks of `chunksize` rows, fits the baseline and time trend on bounded
+        reservoir samples and trains the local models with partial_fit.
+
+        baseline_backend / local_backend pick the estimators from
+        engine.models.BASELINE_BACKENDS / LOCAL_BACKENDS. Streaming needs a local
+        backend with partial_fit ('mlp').
+
+        low_memory=True keeps the history and scored candidates in float32 and
+        categoricals (see engine.memory), skips defensive frame copies and
+        writes the finance columns into one preallocated float32 block.
+        Columnar histories are memory-mapped already and keep their dtypes.
+
+        prescreen is an engine.prescreen.PreScreen run over every scored
+        candidate before the LLM stage: disqualified listings are dropped,
+        the rest are ranked with its provisional repair estimate and only the
+        ambiguous ones among the top N are sent to the LLM.
+        """
+        # Fail on a bad backend name before any data is read
+        self.baseline = BaselineRegressor(baseline_backend)
+        make_local_model(local_backend, incremental=streaming)
+        self.local_backend = local_backend
+
+        # Optional k-nearest comparable-sales features from lat/long
+        self.comparables = ComparablesIndex() if use_comps else None
+        extra_features = COMP_FEATURES if use_comps else []
+        self.baseline_features = BASELINE_FEATURES + extra_features
+        self.local_features = LOCAL_FEATURES + extra_features
+        # Comparables need house_id to leave each property's own sales out of its training features
+        self.training_columns = TRAINING_COLUMNS + (['lat', 'long', 'house_id'] if use_comps else [])
+        self.low_memory = low_memory
+
+        self.streaming = streaming
+        if streaming:
+            if data_path is None:
+                raise ValueError("Streaming mode reads from data_path")
+            if use_comps:
+                raise ValueError("Comparable-sales features need the full history in memory; disable streaming")
+            self.df = None
+            self.chunksize = chunksize
+            self.reservoir_size = reservoir_size
+            self.stream_epochs = stream_epochs
+            self.local_iterations_per_chunk = local_iterations_per_chunk
+            wanted = self.training_columns + LOCATOR_COLUMNS
+            self._history_chunks = history_chunk_factory(
+                data_path, columns=[c for c in available_columns(data_path) if c in wanted], chunksize=chunksize
+            )
+            self._scan_history()
+        elif data is not None:
+            # Low-memory mode shares unconverted columns with `data` instead of copying them
+            self.df = downcast_frame(data) if low_memory else data.copy()
+        elif data_path is not None and is_columnar(data_path):
+            if columns is None:
+                # The cluster locator also needs coordinates and (zip) names
+                columns = list(dict.fromkeys(self.training_columns + LOCATOR_COLUMNS + ['days_since_start']))
+            self.df = load_columnar(data_path, columns=columns)
         elif data_path is not None:
-            self.df = pd.read_csv(data_path)
+            dtypes = csv_dtypes(data_path, columns) if low_memory else None
+            self.df = pd.read_csv(data_path, usecols=columns, dtype=dtypes)
         else:
             raise ValueError("Must provide either data or data_path")
 
-        self.df['date'] = pd.to_datetime(self.df['date'])
-        self.start_date = self.df['date'].min()
-        self.df['days_since_start'] = (self.df['date'] - self.start_date).dt.days
+        if not streaming:
+            self.df['date'] = pd.to_datetime(self.df['date'])
+            self.start_date = self.df['date'].min()
+            if data_path is None or not is_columnar(data_path) or 'days_since_start' not in self.df.columns:
+                self.df['days_since_start'] = (self.df['date'] - self.start_date).dt.days
         
-        self.baseline = BaselineRegressor()
         self.time_trend = TimeTrendRegressor()
         self.local_models = {}
+        self.local_training_times = {}
+        self.is_trained = False
+
+        # Maps live lat/long or zip to a trained neighborhood_id; built at training time
+        if assign_clusters not in CLUSTER_ASSIGNMENT_MODES:
+            raise ValueError(f"assign_clusters must be one of {CLUSTER_ASSIGNMENT_MODES}")
+        self.assign_clusters = assign_clusters
+        self.cluster_locator = None
+
+        # Optional on-disk model snapshots so restarts skip retraining
+        self.snapshot_store = ModelSnapshotStore(snapshot_dir) if snapshot_dir else None
+        self._snapshot_key = None
+
+        # Created on first use unless one is injected (e.g. a stub for benchmarks)
+        self.llm_evaluator = llm_evaluator
+        self.prescreen = prescreen
+
+    @classmethod
+    def from_env(cls, data_path, snapshot_dir=None, llm_evaluator=None):
+        """
+        The engine the daemon and services run, configured from the environment:
+        USE_COMPS, STREAMING_TRAINING, BASELINE_BACKEND, LOCAL_BACKEND, LOW_MEMORY
+        PRESCREEN and PRESCREEN_STALE_DAYS.
+        Live listing neighborhood ids are placeholders, so they are always routed
+        to a trained cluster by location.
+        """
+        return cls(data_path=data_path, snapshot_dir=snapshot_dir, llm_evaluator=llm_evaluator,
+                   # USE_COMPS=1 adds k-nearest comparable-sales features computed from lat/long
+                   use_comps=os.getenv("USE_COMPS", "0") == "1",
+                   assign_clusters='always',
+                   # STREAMING_TRAINING=1 trains out-of-core on histories too big for memory
+                   streaming=os.getenv("STREAMING_TRAINING", "0") == "1",
+                   # Model backends (see engine.models and benchmarks/compare_backends.py)
+                   baseline_backend=os.getenv("BASELINE_BACKEND", "random_forest"),
+                   local_backend=os.getenv("LOCAL_BACKEND", "mlp"),
+                   # LOW_MEMORY=1 trades float64 precision for roughly half the frame memory
+                   low_memory=os.getenv("LOW_MEMORY", "0") == "1",
+                   # PRESCREEN=0 sends every top candidate to the LLM, skipping the rule-based tier
+                   # PRESCREEN_STALE_DAYS=180 disqualifies listings on the market longer, without an LLM check
+                   prescreen=PreScreen(stale_days=int(os.getenv("PRESCREEN_STALE_DAYS", "0")) or None)
+                   if os.getenv("PRESCREEN", "1") == "1" else None)
+
+    def model_config(self):
+        """
+        Hyperparameters and code version that determine the trained models.
+        """
+        return {
+            'model_version': MODEL_VERSION,
+            'baseline_features': self.baseline_features,
+            'local_features': self.local_features,
+            'comparables': None if self.comparables is None else {
+                'k': self.comparables.k,
+                'radius_km': self.comparables.radius_km,
+            },
+            'min_cluster_rows': MIN_CLUSTER_ROWS,
+            'baseline_backend': self.baseline.backend,
+            'baseline': self.baseline.model.get_params(),
+            'time_trend': self.time_trend.model.get_params(),
+            'local_backend': self.local_backend,
+            'local': make_local_model(self.local_backend, incremental=self.streaming).model.get_params(),
+            'streaming': None if not self.streaming else {
+                'chunksize': self.chunksize,
+                'reservoir_size': self.reservoir_size,
+                'stream_epochs': self.stream_epochs,
+                'local_iterations_per_chunk': self.local_iterations_per_chunk,
+            },
+        }
+
+    @property
+    def snapshot_key(self):
+        if self._snapshot_key is None:
+            if self.streaming:
+                data_hash = self._stream_data_hash
+            else:
+                data_hash = hash_training_data(self.df, self.training_columns)
+            self._snapshot_key = snapshot_key(data_hash, self.model_config())
+        return self._snapshot_key
+
+    def load_snapshot(self):
+        """
+        Restore trained models from the snapshot store. Returns True on a hit.
+        """
+        if self.snapshot_store is None:
+            return False
+        state = self.snapshot_store.load(self.snapshot_key)
+        if state is None or any(attr not in state for attr in SNAPSHOT_ATTRIBUTES):
+            return False
+        for attr in SNAPSHOT_ATTRIBUTES:
+            setattr(self, attr, state[attr])
+        self.is_trained = True
+        return True
+
+    def save_snapshot(self):
+        if self.snapshot_store is None or not self.is_trained:
+            return None
+        state = {attr: getattr(self, attr) for attr in SNAPSHOT_ATTRIBUTES}
+        path = self.snapshot_store.save(self.snapshot_key, state)
+        # Every data, config or sklearn change writes a new multi-MB snapshot; keep only the recent ones
+        removed = self.snapshot_store.prune(keep_key=self.snapshot_key)
+        if removed:
+            print(f"Pruned {len(removed)} old model snapshot(s)")
+        return path
+
+    def ensure_trained(self, n_jobs=1):
+        """
+        Lazily load the snapshot (or train) the first time the models are needed.
+        """
+        if not self.is_trained:
+            self.run_pipeline(n_jobs=n_jobs)
+
+    def scoring_copy(self):
+        """
+        A shallow copy that keeps only what scoring needs (trained models,
+        cluster locator, settings) and drops the training history and LLM
+        client, so it is cheap to ship to worker processes.
+        """
+        self.ensure_trained()
+        # Resolve the key while the training data is still attached
+        self.snapshot_key
+        clone = copy.copy(self)
+        clone.df = None
+        clone._history_chunks = None
+        clone.llm_evaluator = None
+        clone.snapshot_store = None
+        return clone
+
+    def run_pipeline(self, n_jobs=1, use_snapshot=True):
+        """
+        Train the baseline, time trend and per-neighborhood perceptrons.
+        n_jobs > 1 (or -1 for all cores) fits the local models in a process pool.
+        If a snapshot matching the current data and hyperparameters exists it is
+        loaded instead of retraining.
+        """
+        if use_snapshot and self.load_snapshot():
+            metrics.inc('model_snapshot_loads', result='hit')
+            print(f"Loaded trained models from snapshot {self.snapshot_key} (skipping training).")
+            return
+        if use_snapshot and self.snapshot_store is not None:
+            metrics.inc('model_snapshot_loads', result='miss')
+
+        with metrics.timer('pipeline', mode='streaming' if self.streaming else 'in_memory'):
+            if self.streaming:
+                self._run_streaming_pipeline()
+            else:
+                self._run_in_memory_pipeline(n_jobs=n_jobs)
+        self.is_trained = True
+        metrics.set_gauge('local_models', len(self.local_models))
+        for nb_id, fit_time in self.local_training_times.items():
+            metrics.set_gauge('local_model_fit_seconds', fit_time, cluster=nb_id)
+
+        if use_snapshot and self.snapshot_store is not None:
+            path = self.save_snapshot()
+            print(f"Saved model snapshot to {path}")
+            
+        print("Pipeline execution complete.")
+
+    def _run_in_memory_pipeline(self, n_jobs=1):
+        if self.comparables is not None:
+            print("Indexing comparable sales...")
+            with metrics.timer('pipeline_stage', stage='comparables'):
+                self.comparables.fit(self.df['lat'], self.df['long'], self.df['price'], self.df['sqft'],
+                                     ids=self.df['house_id'])
+                # Exclude each property's own sales so the features don't leak its price
+                comps = self.comparables.query(self.df['lat'], self.df['long'], exclude_ids=self.df['house_id'])
+                self.df[COMP_FEATURES] = comps[COMP_FEATURES].values
+
+        with metrics.timer('pipeline_stage', stage='cluster_locator'):
+            self.cluster_locator = self._build_cluster_locator(self.df)
 
-    def run_pipeline(self):
         print("Starting pipeline: Training Baseline...")
-        # Features for baseline: sqft, beds, baths, neighborhood
-        X_baseline = self.df[['sqft', 'beds', 'baths', 'neighborhood_id']]
+        # Features for baseline: sqft, beds, baths, neighborhood (+ comps when enabled)
+        X_baseline = self.df[self.baseline_features]
         y = self.df['price']
-        self.baseline.fit(X_baseline, y)
-        
-        # Calculate Resids
-        baseline_pred = self.baseline.predict(X_baseline)
-        residuals = y - baseline_pred
-        
+        with metrics.timer('pipeline_stage', stage='baseline'):
+            self.baseline.fit(X_baseline, y)
+    
+            # Calculate Resids
+            baseline_pred = self.baseline.predict(X_baseline)
+            residuals = y - baseline_pred
+    
         print("Training Time Trend...")
-        self.time_trend.fit(self.df['days_since_start'].values, residuals)
-        
+        with metrics.timer('pipeline_stage', stage='time_trend'):
+            self.time_trend.fit(self.df['days_since_start'].values, residuals)
+    
         # Local Overfitting
-        print("Training Local Perceptrons (Neighborhood Clusters)...")
-        for nb_id in self.df['neighborhood_id'].unique():
-            nb_data = self.df[self.df['neighborhood_id'] == nb_id]
-            
-            if len(nb_data) < 15:
+        print(f"Training Local Models (Neighborhood Clusters, {self.local_backend})...")
+        with metrics.timer('pipeline_stage', stage='local_models'):
+            self._fit_local_models(n_jobs=n_jobs)
+
+    def _scan_history(self):
+        """
+        Streaming pass 0: start date and content hash of the history, so the
+        snapshot key is known before any training happens.
+        """
+        digest = StreamingDigest(self.training_columns)
+        self.start_date = None
+        self.history_rows = 0
+        for chunk in self._history_chunks():
+            chunk['date'] = pd.to_datetime(chunk['date'])
+            digest.update(chunk)
+            chunk_start = chunk['date'].min()
+            self.start_date = chunk_start if self.start_date is None else min(self.start_date, chunk_start)
+            self.history_rows += len(chunk)
+        self._stream_data_hash = digest.hexdigest()
+
+    def _iter_history(self):
+        for chunk in self._history_chunks():
+            chunk['date'] = pd.to_datetime(chunk['date'])
+            chunk['days_since_start'] = (chunk['date'] - self.start_date).dt.days
+            yield chunk
+
+    def _run_streaming_pipeline(self):
+        # Pass 1: reservoir sample for the baseline, per-cluster row counts and scalers
+        print(f"Streaming pass 1: sampling {self.reservoir_size:,} of {self.history_rows:,} rows and fitting scalers...")
+        reservoir = ReservoirSample(self.reservoir_size)
+        local_models = {}
+        cluster_rows = {}
+        for chunk in self._iter_history():
+            reservoir.add(chunk)
+            for nb_id, nb_data in chunk.groupby('neighborhood_id', sort=False):
+                cluster_rows[nb_id] = cluster_rows.get(nb_id, 0) + len(nb_data)
+                if nb_id not in local_models:
+                    local_models[nb_id] = make_local_model(self.local_backend, incremental=True)
+                local_model = local_models[nb_id]
+                local_model.partial_fit_scalers(nb_data[self.local_features].values, nb_data['price'].values)
+        sample = reservoir.to_frame()
+
+        self.cluster_locator = self._build_cluster_locator(sample)
+
+        print(f"Training Baseline on {len(sample):,} sampled rows...")
+        self.baseline.fit(sample[self.baseline_features], sample['price'])
+        del sample
+
+        # Pass 2+: baseline residuals for the time trend, incremental local perceptron updates
+        print("Streaming pass 2: time trend residuals and local perceptron updates...")
+        eligible = {nb_id for nb_id, rows in cluster_rows.items() if rows >= MIN_CLUSTER_ROWS}
+        residual_reservoir = ReservoirSample(self.reservoir_size, seed=43)
+        self.local_training_times = {nb_id: 0.0 for nb_id in eligible}
+        for epoch in range(self.stream_epochs):
+            for chunk in self._iter_history():
+                if epoch == 0:
+                    residuals = chunk['price'].values - self.baseline.predict(chunk[self.baseline_features])
+                    residual_reservoir.add(pd.DataFrame({
+                        'days_since_start': chunk['days_since_start'].values,
+                        'residual': residuals
+                    }))
+                for nb_id, nb_data in chunk.groupby('neighborhood_id', sort=False):
+                    if nb_id not in eligible:
+                        continue
+                    started = time.perf_counter()
+                    X_local = nb_data[self.local_features].values
+                    y_local = nb_data['price'].values
+                    for _ in range(self.local_iterations_per_chunk):
+                        local_models[nb_id].partial_fit(X_local, y_local)
+                    self.local_training_times[nb_id] += time.perf_counter() - started
+
+        # Huber regression has no partial_fit; fit it on the bounded residual sample instead
+        print("Training Time Trend...")
+        trend_sample = residual_reservoir.to_frame()
+        self.time_trend.fit(trend_sample['days_since_start'].values, trend_sample['residual'].values)
+
+        self.local_models = {nb_id: model for nb_id, model in local_models.items() if nb_id in eligible}
+        print(f"  Trained {len(self.local_models)} incremental local models "
+              f"in {sum(self.local_training_times.values()):.2f}s")
+
+    def _build_cluster_locator(self, frame):
+        """
+        ClusterLocator over the training rows' coordinates and zips. Histories
+        with neither (no lat/long columns, all-NaN coordinates, no zip names)
+        get no locator, and live listings keep the ids they arrive with.
+        """
+        nan = np.full(len(frame), np.nan)
+        lat = frame['lat'] if 'lat' in frame.columns else nan
+        long = frame['long'] if 'long' in frame.columns else nan
+        zips = frame['neighborhood_name'] if 'neighborhood_name' in frame.columns else None
+        print("Building cluster locator...")
+        locator = ClusterLocator().fit(lat, long, frame['neighborhood_id'], zips=zips)
+        if locator.is_empty():
+            print("  No coordinates or zip codes in the training data; skipping the cluster locator")
+            return None
+        return locator
+
+    def _fit_local_models(self, n_jobs=1):
+        # Group once instead of re-masking self.df for every cluster.
+        # sort=False keeps the first-seen cluster order of the original loop.
+        jobs = []
+        for nb_id, nb_data in self.df.groupby('neighborhood_id', sort=False):
+            if len(nb_data) < MIN_CLUSTER_ROWS:
                 continue
-            
-            local_model = OverfitPerceptron()
-            # Local models
-            X_local = nb_data[['sqft', 'beds', 'baths', 'days_since_start']]
-            y_local = nb_data['price']
-            
-            local_model.fit(X_local, y_local)
+            # float64 per cluster even in low-memory mode: the networks train noticeably differently in float32
+            jobs.append((nb_id, nb_data[self.local_features].to_numpy(dtype=np.float64),
+                         nb_data['price'].to_numpy(dtype=np.float64), self.local_backend))
+
+        if n_jobs is None or n_jobs == 0:
+            n_jobs = 1
+        # Never oversubscribe: each MLP fit is CPU bound
+        max_workers = os.cpu_count() or 1
+        if n_jobs < 0 or n_jobs > max_workers:
+            n_jobs = max_workers
+        n_jobs = min(n_jobs, max(1, len(jobs)))
+
+        started = time.perf_counter()
+        if n_jobs == 1:
+            results = [_fit_local_model(*job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+                futures = [pool.submit(_fit_local_model, *job) for job in jobs]
+                # Collect in submission order so results match the serial run
+                results = [future.result() for future in futures]
+        wall_time = time.perf_counter() - started
+
+        self.local_models = {}
+        self.local_training_times = {}
+        for nb_id, local_model, fit_time in results:
             self.local_models[nb_id] = local_model
-            
-        print("Pipeline execution complete.")
+            self.local_training_times[nb_id] = fit_time
 
-    def evaluate_candidates(self, candidates_df, top_n=10):
+        if results:
+            # Wall time only: per-worker fit times inflate when workers share CPUs, so their sum
+            # over the wall time is not a speedup. Compare n_jobs=1 and n_jobs=N runs for that.
+            print(f"  Fitted {len(results)} local models with n_jobs={n_jobs} in {wall_time:.2f}s "
+                  f"({wall_time / len(results):.3f}s wall per cluster)")
+
+    def _predict_prices_rowwise(self, candidates):
         """
-        Evaluate a set of 'Live' candidates from the API against the trained models.
+        Original per-row scoring path. Kept for parity testing against the batched path.
         """
-        candidates = candidates_df.copy()
-        candidates['date'] = pd.to_datetime(candidates['date'])
-        candidates['days_since_start'] = (candidates['date'] - self.start_date).dt.days
-        
         predictions = []
         for idx, row in candidates.iterrows():
             # Get baseline
-            base_p = self.baseline.predict(row[['sqft', 'beds', 'baths', 'neighborhood_id']].values.reshape(1, -1))[0]
+            base_p = self.baseline.predict(row[self.baseline_features].values.reshape(1, -1))[0]
             
             # Get time adjustment
             time_p = self.time_trend.predict(np.array([row['days_since_start']]))[0]
@@ -73,36 +526,227 @@ class UndervaluationEngine:
             # Get local model prediction (default to baseline+time if no local cluster)
             nb_id = row['neighborhood_id']
             if nb_id in self.local_models:
-                local_p = self.local_models[nb_id].predict(row[['sqft', 'beds', 'baths', 'days_since_start']].values.reshape(1, -1))[0]
+                local_p = self.local_models[nb_id].predict(row[self.local_features].values.reshape(1, -1))[0]
                 final_pred = (base_p + time_p) * 0.3 + local_p * 0.7
             else:
                 final_pred = base_p + time_p
                 
             predictions.append(final_pred)
-            
-        candidates['predicted_price'] = predictions
+        return np.array(predictions, dtype=float)
+
+    def _predict_prices(self, candidates):
+        """
+        Batched scoring path: one baseline call and one time trend call for the whole
+        frame, then one local model call per neighborhood group.
+        Produces the same numbers as `_predict_prices_rowwise`.
+        """
+        if candidates.empty:
+            return np.array([], dtype=float)
+
+        base_p = self.baseline.predict(candidates[self.baseline_features])
+        time_p = self.time_trend.predict(candidates['days_since_start'].values)
+        final_pred = base_p + time_p
+
+        # Blend in the local perceptron for every neighborhood we trained a model for
+        X_local = candidates[self.local_features].to_numpy(dtype=np.float64)
+        for nb_id, positions in candidates.groupby('neighborhood_id').indices.items():
+            if nb_id not in self.local_models:
+                continue
+            local_p = self.local_models[nb_id].predict(X_local[positions])
+            final_pred[positions] = final_pred[positions] * 0.3 + local_p * 0.7
+
+        return final_pred
+
+    def _assign_clusters(self, candidates):
+        """
+        Route candidates to a trained cluster so they reach their local perceptron.
+        Ids that stay unknown (no locator, or nothing to locate by) become -1,
+        which scores with the baseline and time trend only.
+        """
+        if candidates.empty:
+            return
+        if 'neighborhood_id' in candidates.columns:
+            current = pd.to_numeric(candidates['neighborhood_id'], errors='coerce')
+        else:
+            current = pd.Series(np.nan, index=candidates.index)
+        if self.assign_clusters == 'never' or self.cluster_locator is None:
+            needs_assignment = np.zeros(len(candidates), dtype=bool)
+        elif self.assign_clusters == 'missing':
+            needs_assignment = current.isna().values
+        else:
+            needs_assignment = np.ones(len(candidates), dtype=bool)
+        if needs_assignment.any():
+            zips = candidates['neighborhood_name'] if 'neighborhood_name' in candidates.columns else None
+            nan = np.full(len(candidates), np.nan)
+            assigned = self.cluster_locator.assign(
+                candidates['lat'].values if 'lat' in candidates.columns else nan,
+                candidates['long'].values if 'long' in candidates.columns else nan,
+                zips=None if zips is None else zips.values
+            )
+            current = current.where(~needs_assignment, assigned)
+        candidates['neighborhood_id'] = current.fillna(-1).astype(np.int64).values
+
+    def scoring_key(self):
+        """
+        Identifies the models and finance assumptions behind a score, so cached
+        scores can be reused only while both are unchanged.
+        """
+        return f"{self.snapshot_key}:{self.assign_clusters}:{os.getenv('MORTGAGE_INTEREST_RATE', '0.06')}"
+
+    def evaluate_candidates(self, candidates_df, top_n=10, batch_scoring=True, llm_concurrency=4):
+        """
+        Evaluate a set of 'Live' candidates from the API against the trained models.
+        Set batch_scoring=False to fall back to the original per-row scoring loop.
+        llm_concurrency bounds how many LLM calls are in flight for the top N.
+        """
+        scored = self.score_candidates(candidates_df, batch_scoring=batch_scoring)
+        return self.select_top_candidates(scored, top_n=top_n, llm_concurrency=llm_concurrency)
+
+    def evaluate_candidate_stream(self, chunks, top_n=10, batch_scoring=True, llm_concurrency=4):
+        """
+        evaluate_candidates for feeds too large to hold in memory: `chunks` is any
+        iterable of candidate DataFrames (e.g. pd.read_csv(..., chunksize=...)).
+        Only the running top N are kept between chunks.
+        """
+        survivors, _ = self.stream_top_candidates(chunks, top_n=top_n, batch_scoring=batch_scoring)
+        if survivors.empty:
+            return survivors
+        return self.select_top_candidates(survivors, top_n=top_n, llm_concurrency=llm_concurrency)
+
+    def stream_top_candidates(self, chunks, top_n=10, top_per_zip=None, zip_column='neighborhood_name',
+                              batch_scoring=True):
+        """
+        Model stage over a stream of candidate chunks, keeping a bounded heap of
+        the `top_n` best by undervaluation_pct (and the best `top_per_zip` per
+        `zip_column` value when set). Finance columns are only added to the
+        survivors, so memory stays constant in the size of the feed. With a
+        prescreen, disqualified listings are skipped and the rest ranked net of
+        the provisional repair estimate (the returned columns stay unadjusted).
+
+        Returns (top, per_zip): scored frames ranked best-first like
+        score_candidates output; per_zip is None unless top_per_zip is set.
+        """
+        selector = TopKSelector(top_n, group_column=zip_column if top_per_zip else None,
+                                k_per_group=top_per_zip)
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            predicted = self.predict_candidates(chunk, batch_scoring=batch_scoring)
+            predicted_price = predicted['predicted_price'].to_numpy(dtype=float)
+            if self.prescreen is not None:
+                screen = self.screen_candidates(predicted)
+                predicted_price = predicted_price - screen['prescreen_repair_estimate'].to_numpy()
+            with metrics.timer('scoring_stage', stage='select'):
+                scores = undervaluation_pct(predicted['price'], predicted['hoa_fee'], predicted_price)
+                if self.prescreen is not None:
+                    # The selector skips NaN scores, so disqualified listings never survive
+                    scores[screen['prescreen_disqualified'].to_numpy()] = np.nan
+                selector.add(predicted, scores)
+        metrics.inc('candidates_streamed', selector.rows_seen)
+
+        with metrics.timer('scoring_stage', stage='finance'):
+            top = selector.to_frame()
+            if not top.empty:
+                top = self.add_finance_columns(top)
+            per_zip = None
+            if top_per_zip:
+                per_zip = selector.group_frame()
+                if not per_zip.empty:
+                    per_zip = self.add_finance_columns(per_zip)
+        return top, per_zip
+
+    def score_candidates(self, candidates_df, batch_scoring=True):
+        """
+        Model and finance stage: predicted price, carrying costs and undervaluation
+        for every candidate. No LLM calls.
+        """
+        candidates = self.predict_candidates(candidates_df, batch_scoring=batch_scoring)
+        with metrics.timer('scoring_stage', stage='finance'):
+            return self.add_finance_columns(candidates)
+
+    def prescreen_candidates(self, candidates_df, batch_scoring=True):
+        """
+        evaluate_candidates without the LLM stage, for every candidate: the same
+        columns, in the same order. With a prescreen, decisive listings get the
+        rule-based repair estimate exactly as evaluate_candidates applies it
+        (repair_source 'prescreen'), disqualified ones are kept but flagged, and
+        ambiguous ones are left unadjusted with no repair_source, pending the LLM.
+        """
+        scored = self.score_candidates(candidates_df, batch_scoring=batch_scoring)
+        if self.prescreen is not None:
+            screen = self.screen_candidates(scored)
+            for column in PRESCREEN_COLUMNS:
+                scored[column] = screen[column].to_numpy()
+        scored['llm_repair_estimate'] = np.nan
+        scored['llm_reasoning'] = None
+        if self.prescreen is None:
+            return scored
+
+        scored['repair_source'] = None
+        decided = ~(scored['prescreen_needs_llm'] | scored['prescreen_disqualified']).to_numpy()
+        if decided.any():
+            rows = scored[decided].copy()
+            apply_repair_estimates(rows, rows['prescreen_repair_estimate'].to_numpy(),
+                                   prescreen_reasoning(rows['prescreen_reasons']))
+            rows['repair_source'] = 'prescreen'
+            for column in REPAIR_COLUMNS + ['repair_source']:
+                scored.loc[decided, column] = rows[column].to_numpy()
+        return scored
+
+    def predict_candidates(self, candidates_df, batch_scoring=True):
+        """
+        Model stage: a copy of the candidates with `predicted_price` (and the
+        derived model features) filled in.
+        """
+        self.ensure_trained()
+        with metrics.timer('scoring_stage', stage='model'):
+            candidates = self._predict_candidates(candidates_df, batch_scoring)
+        metrics.inc('candidates_scored', len(candidates))
+        return candidates
+
+    def _predict_candidates(self, candidates_df, batch_scoring):
+        # Either way the caller's frame is left untouched: columns are only ever replaced
+        candidates = downcast_frame(candidates_df) if self.low_memory else candidates_df.copy()
+        candidates['date'] = pd.to_datetime(candidates['date'])
+        candidates['days_since_start'] = (candidates['date'] - self.start_date).dt.days
+        self._assign_clusters(candidates)
+        if self.comparables is not None:
+            comps = self.comparables.query(candidates['lat'], candidates['long'])
+            candidates[COMP_FEATURES] = comps[COMP_FEATURES].values
         
+        if batch_scoring:
+            predictions = self._predict_prices(candidates)
+        else:
+            predictions = self._predict_prices_rowwise(candidates)
+            
+        candidates['predicted_price'] = predictions.astype(np.float32) if self.low_memory else predictions
+        return candidates
+
+    def add_finance_columns(self, candidates):
+        """
+        Finance stage: carrying costs, capitalized fees and undervaluation,
+        added in place to frames that already have `predicted_price`.
+        """
         # Financial Modeling: 100% Debt & Total Carrying Cost
-        # Assume an interest rate on a 30-year fixed mortgage based on MORGAGE_INTEREST_RATE env (default 6%)
+        # Assume an interest rate on a 30-year fixed mortgage based on MORGAGE_INTEREST_RATE env (default 6%).
+        # This is the 'full_financing' scenario of engine.finance; use evaluate_scenarios for rate/term/down sweeps.
         # Mortgage math: M = P [ i(1 + i)^n ] / [ (1 + i)^n - 1 ]
         mortgage_rate = float(os.getenv("MORTGAGE_INTEREST_RATE", "0.06"))
-        monthly_interest_rate = mortgage_rate / 12
-        num_payments = 30 * 12
+        if self.low_memory:
+            return self._add_finance_columns_lean(candidates, mortgage_rate)
         
         # Calculate monthly mortgage payment for 100% of the listed price
-        candidates['monthly_mortgage'] = candidates['price'] * (
-            monthly_interest_rate * (1 + monthly_interest_rate)**num_payments
-        ) / ((1 + monthly_interest_rate)**num_payments - 1)
+        candidates['monthly_mortgage'] = candidates['price'] * payment_factor(mortgage_rate, 30)
         
         # Estimate Taxes (1.25% annually) and Insurance (0.5% annually)
-        candidates['monthly_tax_ins'] = (candidates['price'] * 0.0175) / 12
+        candidates['monthly_tax_ins'] = (candidates['price'] * TAX_INSURANCE_RATE) / 12
         
         # Total carrying cost = Mortgage + HOA + Taxes/Insurance
         candidates['total_monthly_cost'] = candidates['monthly_mortgage'] + candidates['hoa_fee'] + candidates['monthly_tax_ins']
         
         # FIX THE FATAL ERROR: Mortgage principal builds equity, while HOA/Taxes/Insurance are 100% sunk cost.
         # We capitalize the sunk costs. Every $1/mo in sunk cost reduces buying power by ~$150.
-        candidates['fee_capitalized_cost'] = (candidates['hoa_fee'] + candidates['monthly_tax_ins']) * 150
+        candidates['fee_capitalized_cost'] = (candidates['hoa_fee'] + candidates['monthly_tax_ins']) * SUNK_COST_MULTIPLE
         
         # Adjusted Fair Value = AI Predicted Value minus the Sunk Cost burden
         candidates['fee_adjusted_value'] = candidates['predicted_price'] - candidates['fee_capitalized_cost']
@@ -113,33 +757,68 @@ class UndervaluationEngine:
         # Percentage margin of safety (Positive % = Good Deal)
         candidates['undervaluation_pct'] = (candidates['undervaluation_amount'] / candidates['price']) * 100
         
+        return candidates
+
+    def _add_finance_columns_lean(self, candidates, mortgage_rate):
+        """
+        add_finance_columns for low-memory mode: the same formulas, evaluated
+        in place into one preallocated float32 block instead of a float64
+        temporary per intermediate.
+        """
+        price = candidates['price'].to_numpy(dtype=np.float32)
+        hoa_fee = candidates['hoa_fee'].to_numpy(dtype=np.float32)
+        block = np.empty((len(FINANCE_COLUMNS), len(candidates)), dtype=np.float32)
+        mortgage, tax_ins, total, fee_capitalized, fee_adjusted, amount, pct = block
+
+        np.multiply(price, np.float32(payment_factor(mortgage_rate, 30)), out=mortgage)
+        np.multiply(price, np.float32(TAX_INSURANCE_RATE / 12), out=tax_ins)
+        np.add(mortgage, hoa_fee, out=total)
+        total += tax_ins
+        # Sunk costs (HOA, taxes, insurance) capitalized at ~$150 of buying power per $1/mo
+        np.add(hoa_fee, tax_ins, out=fee_capitalized)
+        fee_capitalized *= np.float32(SUNK_COST_MULTIPLE)
+        np.subtract(candidates['predicted_price'].to_numpy(dtype=np.float32), fee_capitalized, out=fee_adjusted)
+        np.subtract(fee_adjusted, price, out=amount)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.divide(amount, price, out=pct)
+        pct *= np.float32(100)
+
+        for name, values in zip(FINANCE_COLUMNS, block):
+            candidates[name] = values
+        return candidates
+
+    def screen_candidates(self, candidates):
+        """
+        Pre-screen stage: the prescreen's PRESCREEN_COLUMNS for every candidate.
+        """
+        with metrics.timer('scoring_stage', stage='prescreen'):
+            screen = self.prescreen.screen(candidates)
+        metrics.inc('candidates_prescreened', len(screen))
+        metrics.inc('prescreen_disqualified', int(screen['prescreen_disqualified'].sum()))
+        return screen
+
+    def select_top_candidates(self, candidates, top_n=10, llm_concurrency=4):
+        """
+        LLM stage: take the top N scored candidates, apply the LLM repair estimate
+        and re-rank. With a prescreen, every candidate is screened first and
+        only the ambiguous ones among the top N are sent to the LLM.
+        """
+        if self.prescreen is not None:
+            return self._select_prescreened(candidates, top_n, llm_concurrency)
+
         # Sort to get the preliminary top N
-        results = candidates.sort_values('undervaluation_pct', ascending=False)
-        top_preliminary = results.head(top_n).copy()
+        if self.low_memory:
+            # Selects N rows without materializing a sorted copy of every candidate
+            top_preliminary = candidates.nlargest(top_n, 'undervaluation_pct')
+        else:
+            results = candidates.sort_values('undervaluation_pct', ascending=False)
+            top_preliminary = results.head(top_n).copy()
         
         # Now apply the LLM Condition/Risk Evaluation on the top candidates
-        llm = LLMPropertyEvaluator()
-        
         updated_rows = []
-        for idx, row in top_preliminary.iterrows():
-            eval_result = llm.evaluate_property(row.to_dict())
-            
-            # Subtract the absolute repair cost estimate from the predicted baseline price
-            updated_predicted_price = row['predicted_price'] - eval_result['repair_cost_estimate']
-            
-            # Recalculate everything downstream
-            updated_fee_adjusted = updated_predicted_price - row['fee_capitalized_cost']
-            updated_underv_amt = updated_fee_adjusted - row['price']
-            updated_underv_pct = (updated_underv_amt / row['price']) * 100 if row['price'] != 0 else 0
-            
-            row['predicted_price'] = updated_predicted_price
-            row['fee_adjusted_value'] = updated_fee_adjusted
-            row['undervaluation_amount'] = updated_underv_amt
-            row['undervaluation_pct'] = updated_underv_pct
-            row['llm_repair_estimate'] = eval_result['repair_cost_estimate']
-            row['llm_reasoning'] = eval_result['reasoning']
-            
-            updated_rows.append(row)
+        for (idx, row), eval_result in zip(top_preliminary.iterrows(),
+                                           self._evaluate_with_llm(top_preliminary, llm_concurrency)):
+            updated_rows.append(apply_repair_estimate(row, eval_result))
             
         final_results = pd.DataFrame(updated_rows)
         # Re-sort in case the LLM significantly penalized the old #1
@@ -147,7 +826,63 @@ class UndervaluationEngine:
         
         return final_results
 
+    def _evaluate_with_llm(self, rows, llm_concurrency):
+        if self.llm_evaluator is None:
+            # Deferred so scoring-only entry points never load the OpenAI SDK
+            from engine.llm_evaluator import LLMPropertyEvaluator
+            self.llm_evaluator = LLMPropertyEvaluator()
+        with metrics.timer('scoring_stage', stage='llm'):
+            eval_results = self.llm_evaluator.evaluate_properties(
+                [row.to_dict() for _, row in rows.iterrows()],
+                max_concurrency=llm_concurrency
+            )
+        metrics.inc('llm_evaluations', len(rows))
+        return eval_results
+
+    def _select_prescreened(self, candidates, top_n, llm_concurrency):
+        """
+        select_top_candidates with the pre-screen cascade: drop disqualified
+        listings, rank the whole market net of the provisional repair
+        estimate, then let the LLM replace the estimate only where the rules
+        were not decisive.
+        """
+        screen = self.screen_candidates(candidates)
+        eligible = ~screen['prescreen_disqualified'].to_numpy()
+        estimates = screen['prescreen_repair_estimate'].to_numpy()
+        price = candidates['price'].to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            provisional_pct = (candidates['undervaluation_amount'].to_numpy(dtype=float) - estimates) / price * 100
+        provisional_pct = np.where(eligible, np.nan_to_num(provisional_pct, nan=-np.inf), np.nan)
+
+        # Positions of the top N eligible candidates, best first
+        ranked = np.argsort(-provisional_pct, kind='stable')[:min(top_n, int(eligible.sum()))]
+        top = candidates.iloc[ranked].copy()
+        for column in PRESCREEN_COLUMNS:
+            top[column] = screen[column].to_numpy()[ranked]
+        needs_llm = top['prescreen_needs_llm'].to_numpy()
+        metrics.inc('llm_calls_avoided', int((~needs_llm).sum()))
+
+        # Decisive listings keep the rule-based estimate
+        decided = apply_repair_estimates(top[~needs_llm].copy(), estimates[ranked][~needs_llm],
+                                         prescreen_reasoning(top['prescreen_reasons'][~needs_llm]))
+        decided['repair_source'] = 'prescreen'
+        ambiguous = top[needs_llm]
+        updated_rows = []
+        if not ambiguous.empty:
+            for (idx, row), eval_result in zip(ambiguous.iterrows(),
+                                               self._evaluate_with_llm(ambiguous, llm_concurrency)):
+                updated_rows.append(apply_repair_estimate(row, eval_result))
+        evaluated = pd.DataFrame(updated_rows, columns=ambiguous.columns.tolist() + ['llm_repair_estimate', 'llm_reasoning'])
+        evaluated['repair_source'] = 'llm'
+
+        parts = [frame for frame in (decided, evaluated) if not frame.empty]
+        final_results = pd.concat(parts) if parts else decided
+        # Re-sort in case the LLM significantly penalized the old #1
+        return final_results.sort_values('undervaluation_pct', ascending=False)
+
     def find_undervalued_homes(self, top_n=20):
+        if self.streaming:
+            raise ValueError("find_undervalued_homes needs the full history in memory; disable streaming")
         # Compatibility wrapper for internal historical data
         latest_entries = self.df.sort_values('date').groupby('house_id').tail(1).copy()
         return self.evaluate_candidates(latest_entries, top_n=top_n)
@@ -0,0 +1,35 @@
+"""
+Listing filters shared by the API client, the profile matcher and the
+finance reports, so every entry point drops the same listings.
+"""
+import numpy as np
+
+# Property types skipped before any financing math, with the reason shown
+EXCLUDED_TYPES = {
+    # Frequently in 55+ parks with hidden "Lot Rents" (e.g. an $89/mo promo)
+    # that destroy the equity creation model.
+    'Manufactured': 'Manufactured/55+ Risk',
+    'Mobile': 'Manufactured/55+ Risk',
+    # You can't live there easily and standard FHA/Conv loans don't apply.
+    'Land': 'Vacant Land',
+}
+
+DEFAULT_EXCLUDED_TYPES = tuple(EXCLUDED_TYPES)
+
+
+def excluded_type_mask(listings, excluded_types=DEFAULT_EXCLUDED_TYPES):
+    """
+    Boolean array marking listings whose property_type is excluded. Frames
+    without a property_type column exclude nothing.
+    """
+    if 'property_type' not in listings:
+        return np.zeros(len(listings), dtype=bool)
+    return listings['property_type'].isin(list(excluded_types)).to_numpy()
+
+
+def drop_excluded_types(listings, excluded_types=DEFAULT_EXCLUDED_TYPES):
+    """
+    (kept, dropped) frames split on excluded_type_mask.
+    """
+    excluded = excluded_type_mask(listings, excluded_types)
+    return listings[~excluded], listings[excluded]
@@ -0,0 +1,219 @@
+"""
+Vectorized financing scenarios.
+
+A ScenarioGrid is M financing scenarios (rate, term, down payment, loan
+program, tax rate) stored as parallel arrays. evaluate_scenarios broadcasts N
+candidates against all M scenarios in one NumPy pass and returns a
+ScenarioCube of float32 (N, M) arrays, so a rate sweep over the whole market
+is a handful of array operations instead of a Python loop per house.
+
+The engine's default scoring (add_finance_columns) is the single scenario
+"full_financing at MORTGAGE_INTEREST_RATE for 30 years".
+"""
+import itertools
+
+import numpy as np
+import pandas as pd
+
+# Annual property tax and homeowner's insurance, as a fraction of price
+TAX_RATE = 0.0125
+INSURANCE_RATE = 0.005
+TAX_INSURANCE_RATE = TAX_RATE + INSURANCE_RATE
+
+# Every $1/mo of sunk cost (HOA, taxes, insurance, mortgage insurance) reduces buying power by ~$150
+SUNK_COST_MULTIPLE = 150
+
+# Loan program assumptions:
+# - min_down_pct: smallest down payment the program allows
+# - upfront_mi_pct: upfront mortgage insurance, financed into the loan
+# - annual_mi_pct: yearly mortgage insurance on the loan amount
+# - mi_until_down_pct: no annual mortgage insurance at or above this down payment
+LOAN_PROGRAMS = {
+    # The engine's historical assumption: 100% of the price borrowed, no mortgage insurance
+    'full_financing': {'min_down_pct': 0.0, 'upfront_mi_pct': 0.0, 'annual_mi_pct': 0.0, 'mi_until_down_pct': 0.0},
+    'conventional': {'min_down_pct': 0.03, 'upfront_mi_pct': 0.0, 'annual_mi_pct': 0.005, 'mi_until_down_pct': 0.20},
+    'fha': {'min_down_pct': 0.035, 'upfront_mi_pct': 0.0175, 'annual_mi_pct': 0.0055, 'mi_until_down_pct': 1.0},
+}
+
+# Per-candidate, per-scenario outputs of evaluate_scenarios
+CUBE_METRICS = ['down_payment', 'loan_amount', 'monthly_mortgage', 'monthly_mi', 'monthly_tax_ins',
+                'total_monthly_cost', 'fee_capitalized_cost', 'undervaluation_amount', 'undervaluation_pct']
+
+
+def payment_factor(annual_rate, term_years):
+    """
+    Monthly payment per $1 borrowed: i(1+i)^n / ((1+i)^n - 1). Broadcasts over
+    arrays of rates and terms; a 0% rate is plain principal / n.
+    """
+    monthly_rate = np.asarray(annual_rate, dtype=float) / 12
+    num_payments = np.asarray(term_years, dtype=float) * 12
+    growth = (1 + monthly_rate) ** num_payments
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = monthly_rate * growth / (growth - 1)
+    return np.where(monthly_rate == 0, 1 / num_payments, factor)
+
+
+class ScenarioGrid:
+    """
+    M financing scenarios as parallel arrays. Build the cartesian product of
+    parameter lists with ScenarioGrid.product, or pass equal-length lists.
+    Down payments below a program's minimum are raised to that minimum.
+    """
+    def __init__(self, rates, terms, down_pcts, programs, tax_rates=None, insurance_rates=None):
+        self.programs = np.asarray(programs, dtype=object)
+        count = len(self.programs)
+        unknown = set(self.programs) - set(LOAN_PROGRAMS)
+        if unknown:
+            raise ValueError(f"Unknown loan program(s) {sorted(unknown)}; expected one of {sorted(LOAN_PROGRAMS)}")
+
+        self.rates = np.broadcast_to(np.asarray(rates, dtype=float), (count,)).copy()
+        self.terms = np.broadcast_to(np.asarray(terms, dtype=float), (count,)).copy()
+        tax_rates = TAX_RATE if tax_rates is None else tax_rates
+        insurance_rates = INSURANCE_RATE if insurance_rates is None else insurance_rates
+        self.tax_rates = np.broadcast_to(np.asarray(tax_rates, dtype=float), (count,)).copy()
+        self.insurance_rates = np.broadcast_to(np.asarray(insurance_rates, dtype=float), (count,)).copy()
+
+        def program_values(field):
+            return np.array([LOAN_PROGRAMS[program][field] for program in self.programs], dtype=float)
+
+        requested = np.broadcast_to(np.asarray(down_pcts, dtype=float), (count,))
+        self.down_pcts = np.maximum(requested, program_values('min_down_pct'))
+        self.upfront_mi_pcts = program_values('upfront_mi_pct')
+        self.annual_mi_pcts = np.where(self.down_pcts < program_values('mi_until_down_pct'),
+                                       program_values('annual_mi_pct'), 0.0)
+
+    @classmethod
+    def product(cls, rates, terms=(30,), down_pcts=(0.0,), programs=('full_financing',), tax_rates=(TAX_RATE,)):
+        """
+        Every combination of the given parameter values.
+        """
+        combos = list(itertools.product(rates, terms, down_pcts, programs, tax_rates))
+        rates, terms, down_pcts, programs, tax_rates = zip(*combos)
+        return cls(rates, terms, down_pcts, programs, tax_rates=tax_rates)
+
+    def __len__(self):
+        return len(self.programs)
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'rate': self.rates,
+            'term_years': self.terms,
+            'down_pct': self.down_pcts,
+            'program': self.programs,
+            'tax_rate': self.tax_rates,
+            'insurance_rate': self.insurance_rates,
+        })
+
+    def labels(self):
+        return [f"{program} {down:.1%} down, {rate:.2%} x {term:.0f}y, tax {tax:.2%}"
+                for program, down, rate, term, tax in
+                zip(self.programs, self.down_pcts, self.rates, self.terms, self.tax_rates)]
+
+    def index_of(self, program, down_pct=None, rate=None, term_years=None):
+        """
+        Position of the first scenario matching the given parameters.
+        """
+        mask = self.programs == program
+        for values, wanted in ((self.down_pcts, down_pct), (self.rates, rate), (self.terms, term_years)):
+            if wanted is not None:
+                mask &= np.isclose(values, wanted)
+        matches = np.flatnonzero(mask)
+        if len(matches) == 0:
+            raise KeyError(f"No scenario for program={program} down_pct={down_pct} rate={rate} term={term_years}")
+        return int(matches[0])
+
+
+class ScenarioCube:
+    """
+    Results of evaluate_scenarios: one float32 (N candidates, M scenarios)
+    array per metric in CUBE_METRICS, plus the grid and candidate index.
+    """
+    def __init__(self, grid, index, values):
+        self.grid = grid
+        self.index = index
+        self.values = values
+
+    def __getitem__(self, metric):
+        return self.values[metric]
+
+    @property
+    def shape(self):
+        return (len(self.index), len(self.grid))
+
+    @property
+    def nbytes(self):
+        return sum(array.nbytes for array in self.values.values())
+
+    def rankings(self, metric='undervaluation_pct', top_n=None, descending=True, mask=None):
+        """
+        (top_n, M) array of candidate positions, best first, for every scenario.
+        Candidates where `mask` (an (N, M) boolean array, e.g. from
+        affordable()) is False sort last.
+        """
+        values = self.values[metric].astype(float)
+        if descending:
+            values = -values
+        values = np.where(np.isnan(values), np.inf, values)
+        if mask is not None:
+            values = np.where(mask, values, np.inf)
+        n = values.shape[0]
+        if top_n is None or top_n >= n:
+            return np.argsort(values, axis=0, kind='stable')
+        # Partition first so each scenario only sorts its own top_n
+        top = np.argpartition(values, top_n - 1, axis=0)[:top_n]
+        order = np.argsort(np.take_along_axis(values, top, axis=0), axis=0, kind='stable')
+        return np.take_along_axis(top, order, axis=0)
+
+    def affordable(self, gross_monthly_income, cash_available, max_dti=0.43):
+        """
+        (N, M) mask: the down payment fits in `cash_available` and the total
+        monthly cost stays within `max_dti` of gross monthly income.
+        """
+        return ((self.values['down_payment'] <= cash_available) &
+                (self.values['total_monthly_cost'] <= gross_monthly_income * max_dti))
+
+    def scenario_frame(self, scenario):
+        """
+        One scenario's metrics as a DataFrame indexed like the candidates.
+        """
+        return pd.DataFrame({metric: self.values[metric][:, scenario] for metric in CUBE_METRICS}, index=self.index)
+
+
+def evaluate_scenarios(candidates, grid, dtype=np.float32):
+    """
+    Broadcast N candidates (needs price, hoa_fee and predicted_price) against
+    every scenario in `grid`. Mortgage insurance counts as sunk cost alongside
+    HOA, taxes and insurance when capitalizing fees.
+    """
+    # Work in the output dtype throughout so no float64 (N, M) temporaries are made
+    price = candidates['price'].to_numpy(dtype=dtype)[:, None]
+    hoa_fee = candidates['hoa_fee'].fillna(0).to_numpy(dtype=dtype)[:, None]
+    predicted_price = candidates['predicted_price'].to_numpy(dtype=dtype)[:, None]
+    grid_values = {name: getattr(grid, name).astype(dtype) for name in
+                   ('down_pcts', 'upfront_mi_pcts', 'annual_mi_pcts', 'tax_rates', 'insurance_rates')}
+
+    down_payment = price * grid_values['down_pcts']
+    loan_amount = (price - down_payment) * (1 + grid_values['upfront_mi_pcts'])
+    monthly_mortgage = loan_amount * payment_factor(grid.rates, grid.terms).astype(dtype)
+    monthly_mi = loan_amount * (grid_values['annual_mi_pcts'] / 12)
+    monthly_tax_ins = price * ((grid_values['tax_rates'] + grid_values['insurance_rates']) / 12)
+    total_monthly_cost = monthly_mortgage + monthly_mi + monthly_tax_ins + hoa_fee
+    fee_capitalized_cost = (hoa_fee + monthly_tax_ins + monthly_mi) * SUNK_COST_MULTIPLE
+    undervaluation_amount = predicted_price - fee_capitalized_cost - price
+    with np.errstate(divide='ignore', invalid='ignore'):
+        undervaluation_pct = undervaluation_amount / price * 100
+
+    computed = {
+        'down_payment': down_payment,
+        'loan_amount': loan_amount,
+        'monthly_mortgage': monthly_mortgage,
+        'monthly_mi': monthly_mi,
+        'monthly_tax_ins': monthly_tax_ins,
+        'total_monthly_cost': total_monthly_cost,
+        'fee_capitalized_cost': fee_capitalized_cost,
+        'undervaluation_amount': undervaluation_amount,
+        'undervaluation_pct': undervaluation_pct,
+    }
+    shape = (len(price), len(grid))
+    values = {metric: np.broadcast_to(computed[metric], shape).astype(dtype, copy=False) for metric in CUBE_METRICS}
+    return ScenarioCube(grid, candidates.index, values)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+from engine.spatial import to_unit_xyz
+
+
+def _is_zip(value):
+    return isinstance(value, str) and len(value) == 5 and value.isdigit()
+
+
+class ClusterLocator:
+    """
+    Maps live listings to the trained neighborhood clusters.
+    Built once at training time from the training rows:
+    - a grid-cell table (cell of `cell_size_deg` degrees -> majority cluster id)
+    - a zip table (zip code -> majority cluster id), when the training data has zips
+    - the cluster centroids, as a fallback for cells never seen in training
+    Lookups are hash-table hits, so a whole batch is assigned in O(1) per row.
+    """
+    def __init__(self, cell_size_deg=0.01):
+        self.cell_size_deg = cell_size_deg
+        self.cell_index = None
+        self.cell_clusters = None
+        self.zip_index = None
+        self.zip_clusters = None
+        self.centroid_tree = None
+        self.centroid_clusters = None
+
+    def _cell_keys(self, lat, long):
+        lat_cells = np.floor(np.asarray(lat, dtype=float) / self.cell_size_deg)
+        long_cells = np.floor(np.asarray(long, dtype=float) / self.cell_size_deg)
+        # |long_cells| < 50,000 for any cell size >= 0.004 deg, so this packing is unique
+        keys = lat_cells * 100000 + long_cells
+        return np.where(np.isfinite(keys), keys, np.nan)
+
+    @staticmethod
+    def _majority_table(keys, cluster_ids):
+        table = pd.DataFrame({'key': keys, 'cluster': cluster_ids}).dropna()
+        if table.empty:
+            return pd.Index([]), np.array([], dtype=np.int64)
+        counts = table.groupby(['key', 'cluster']).size().reset_index(name='n')
+        majority = counts.sort_values(['key', 'n'], ascending=[True, False]).drop_duplicates('key')
+        return pd.Index(majority['key'].values), majority['cluster'].values.astype(np.int64)
+
+    def fit(self, lat, long, cluster_ids, zips=None):
+        lat = np.asarray(lat, dtype=float)
+        long = np.asarray(long, dtype=float)
+        cluster_ids = np.asarray(cluster_ids)
+
+        self.cell_index, self.cell_clusters = self._majority_table(self._cell_keys(lat, long), cluster_ids)
+
+        if zips is not None:
+            zips = pd.Series(zips).astype(str).str.strip()
+            zips = zips.where(zips.map(_is_zip))
+            self.zip_index, self.zip_clusters = self._majority_table(zips.values, cluster_ids)
+        else:
+            self.zip_index, self.zip_clusters = pd.Index([]), np.array([], dtype=np.int64)
+
+        centroids = pd.DataFrame({'lat': lat, 'long': long, 'cluster': cluster_ids}).dropna()
+        centroids = centroids.groupby('cluster')[['lat', 'long']].mean()
+        if centroids.empty:
+            # No training row has coordinates: zip lookups only
+            self.centroid_tree = None
+            self.centroid_clusters = np.array([], dtype=np.int64)
+        else:
+            self.centroid_tree = KDTree(to_unit_xyz(centroids['lat'].values, centroids['long'].values))
+            self.centroid_clusters = centroids.index.values.astype(np.int64)
+        return self
+
+    def is_empty(self):
+        """
+        True when fit saw neither coordinates nor zips, so nothing can be assigned.
+        """
+        return self.centroid_tree is None and not len(self.zip_index)
+
+    def assign(self, lat, long, zips=None):
+        """
+        Cluster id per row: grid cell first, then zip code, then nearest centroid.
+        Rows without coordinates or a known zip get -1.
+        """
+        lat = np.asarray(lat, dtype=float)
+        long = np.asarray(long, dtype=float)
+        assigned = np.full(len(lat), -1, dtype=np.int64)
+
+        cell_pos = self.cell_index.get_indexer(self._cell_keys(lat, long))
+        hit = cell_pos >= 0
+        assigned[hit] = self.cell_clusters[cell_pos[hit]]
+
+        if zips is not None and len(self.zip_index):
+            remaining = assigned < 0
+            zip_pos = self.zip_index.get_indexer(pd.Series(zips).astype(str).str.strip().values)
+            zip_hit = remaining & (zip_pos >= 0)
+            assigned[zip_hit] = self.zip_clusters[zip_pos[zip_hit]]
+
+        remaining = (assigned < 0) & np.isfinite(lat) & np.isfinite(long)
+        if remaining.any() and self.centroid_tree is not None:
+            _, nearest = self.centroid_tree.query(to_unit_xyz(lat[remaining], long[remaining]), k=1)
+            assigned[remaining] = self.centroid_clusters[nearest[:, 0]]
+
+        return assigned
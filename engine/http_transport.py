@@ -0,0 +1,124 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from engine.metrics import metrics
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket. `acquire()` blocks until a token is available,
+    so callers never exceed `rate_per_second` on average or `capacity` in a burst.
+    """
+    def __init__(self, rate_per_second, capacity=None):
+        self.rate_per_second = float(rate_per_second)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate_per_second))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate_per_second)
+                self._updated_at = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate_per_second
+            time.sleep(wait)
+
+
+def parse_retry_after(value):
+    """
+    Retry-After is either a number of seconds or an HTTP date. Returns seconds or None.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HttpTransport:
+    """
+    Pooled HTTP session with optional rate limiting and retries.
+    Retryable statuses and connection errors are retried with exponential
+    backoff (plus jitter), using the server's Retry-After when it sends one.
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, headers=None, pool_size=10, timeout=15, max_retries=4,
+                 backoff_seconds=1.0, max_backoff_seconds=60.0, rate_limiter=None, session=None):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.rate_limiter = rate_limiter
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if headers:
+            self.session.headers.update(headers)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method, url, **kwargs):
+        """
+        Send a request, retrying transient failures. Returns the final response
+        (callers decide whether to raise_for_status) or re-raises the last
+        connection error once retries are exhausted.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        attempt = 0
+        while True:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            try:
+                with metrics.timer('http_request', method=method):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.inc('http_requests', method=method, status='connection_error')
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                print(f"  -> {method} {url} failed ({e}); retrying in {delay:.1f}s")
+            else:
+                metrics.inc('http_requests', method=method, status=response.status_code)
+                if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                    return response
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                if delay is None:
+                    delay = self._backoff(attempt)
+                delay = min(delay, self.max_backoff_seconds)
+                print(f"  -> {method} {url} returned {response.status_code}; retrying in {delay:.1f}s")
+            metrics.inc('http_retries', method=method)
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self):
+        self.session.close()
+
+    def _backoff(self, attempt):
+        delay = self.backoff_seconds * (2 ** attempt)
+        return min(self.max_backoff_seconds, delay * (1 + random.random() * 0.25))
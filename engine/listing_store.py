@@ -0,0 +1,183 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# Listing fields that affect scoring or the LLM prompt. `date` and
+# `days_on_market` tick forward every day, so they are left out; otherwise
+# every listing would look "changed" on every scan.
+FINGERPRINT_COLUMNS = [
+    'address', 'neighborhood_id', 'neighborhood_name', 'lat', 'long', 'sqft',
+    'beds', 'baths', 'hoa_fee', 'year_built', 'property_type', 'description', 'price'
+]
+
+
+def fingerprint_listings(listings_df):
+    """
+    Vectorized per-row fingerprint of the normalized listing fields.
+    """
+    columns = [c for c in FINGERPRINT_COLUMNS if c in listings_df.columns]
+    hashed = pd.util.hash_pandas_object(listings_df[columns].astype(str), index=False)
+    return hashed.map('{:016x}'.format).values
+
+
+class ListingStore:
+    """
+    SQLite store of every listing the daemon has seen, indexed by house_id.
+    Tracks a fingerprint per listing so a scan can tell new, changed,
+    unchanged and delisted properties apart, and caches the last score
+    computed for each fingerprint.
+    """
+    def __init__(self, path="data/listings.db"):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS listings (
+                house_id TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_seen TEXT NOT NULL,
+                delisted_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_listings_active ON listings (delisted_at);
+            CREATE TABLE IF NOT EXISTS scores (
+                house_id TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                scoring_key TEXT NOT NULL,
+                scored_at TEXT NOT NULL,
+                row_json TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def sync(self, listings_df, seen_at=None):
+        """
+        Record the current feed. Returns a dict of house_id lists:
+        `new`, `changed`, `unchanged` and `delisted` (active before, missing now).
+        Relisted properties count as new.
+        """
+        seen_at = (seen_at or datetime.now()).isoformat()
+        house_ids = listings_df['house_id'].astype(str).tolist()
+        fingerprints = fingerprint_listings(listings_df) if len(listings_df) else []
+
+        known = {
+            house_id: (fingerprint, delisted_at)
+            for house_id, fingerprint, delisted_at in
+            self.conn.execute("SELECT house_id, fingerprint, delisted_at FROM listings")
+        }
+
+        diff = {'new': [], 'changed': [], 'unchanged': [], 'delisted': []}
+        for house_id, fingerprint in zip(house_ids, fingerprints):
+            previous = known.get(house_id)
+            if previous is None or previous[1] is not None:
+                diff['new'].append(house_id)
+            elif previous[0] != fingerprint:
+                diff['changed'].append(house_id)
+            else:
+                diff['unchanged'].append(house_id)
+
+        current = set(house_ids)
+        diff['delisted'] = [
+            house_id for house_id, (_, delisted_at) in known.items()
+            if delisted_at is None and house_id not in current
+        ]
+
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT INTO listings (house_id, fingerprint, first_seen, last_seen, delisted_at)
+                VALUES (?, ?, ?, ?, NULL)
+                ON CONFLICT(house_id) DO UPDATE SET
+                    fingerprint = excluded.fingerprint,
+                    last_seen = excluded.last_seen,
+                    delisted_at = NULL
+                """,
+                [(house_id, fingerprint, seen_at, seen_at) for house_id, fingerprint in zip(house_ids, fingerprints)]
+            )
+            self.conn.executemany(
+                "UPDATE listings SET delisted_at = ? WHERE house_id = ?",
+                [(seen_at, house_id) for house_id in diff['delisted']]
+            )
+        return diff
+
+    def load_scores(self, house_ids, scoring_key, max_age_days=None):
+        """
+        Cached scored rows for `house_ids` whose fingerprint still matches the
+        listing and that were produced under `scoring_key`. Rows older than
+        `max_age_days` are treated as missing so the time trend stays fresh.
+        """
+        if not house_ids:
+            return pd.DataFrame()
+        min_scored_at = None
+        if max_age_days is not None:
+            min_scored_at = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+
+        wanted = {str(house_id) for house_id in house_ids}
+        rows = []
+        query = """
+            SELECT s.house_id, s.scored_at, s.row_json FROM scores s
+            JOIN listings l ON l.house_id = s.house_id AND l.fingerprint = s.fingerprint
+            WHERE s.scoring_key = ?
+        """
+        for house_id, scored_at, row_json in self.conn.execute(query, (scoring_key,)):
+            if house_id not in wanted:
+                continue
+            if min_scored_at is None or scored_at >= min_scored_at:
+                rows.append(json.loads(row_json))
+
+        cached = pd.DataFrame(rows)
+        if 'date' in cached.columns:
+            cached['date'] = pd.to_datetime(cached['date'])
+        return cached
+
+    def save_scores(self, scored_df, scoring_key, scored_at=None):
+        """
+        Cache scored rows under the fingerprint the listing was synced with.
+        Scoring rewrites fields such as `neighborhood_id`, so the scored row
+        itself cannot be fingerprinted. Rows for listings that were never
+        synced are skipped.
+        """
+        if scored_df.empty:
+            return
+        scored_at = (scored_at or datetime.now()).isoformat()
+        records = json.loads(scored_df.to_json(orient='records', date_format='iso', double_precision=15))
+        with self.conn:
+            self.conn.executemany(
+                """
+                INSERT OR REPLACE INTO scores (house_id, fingerprint, scoring_key, scored_at, row_json)
+                SELECT house_id, fingerprint, ?, ?, ? FROM listings WHERE house_id = ?
+                """,
+                [
+                    (scoring_key, scored_at, json.dumps(record), str(record['house_id']))
+                    for record in records
+                ]
+            )
+
+    def find_listing(self, house_id=None, address=None):
+        """
+        The last scored row stored for a listing, looked up by house_id or by
+        address (case-insensitive), as a dict. Active listings win over
+        delisted ones. Returns None if nothing matches.
+        """
+        if house_id is not None:
+            condition, value = "s.house_id = ?", str(house_id)
+        elif address:
+            condition, value = "lower(json_extract(s.row_json, '$.address')) = lower(?)", address.strip()
+        else:
+            return None
+        row = self.conn.execute(f"""
+            SELECT s.row_json FROM scores s JOIN listings l ON l.house_id = s.house_id
+            WHERE {condition}
+            ORDER BY l.delisted_at IS NOT NULL, s.scored_at DESC LIMIT 1
+        """, (value,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def active_count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM listings WHERE delisted_at IS NULL").fetchone()[0]
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,136 @@
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from engine.metrics import metrics
+
+
+class LLMResponseCache:
+    """
+    Disk-backed LRU cache for LLM repair estimates with a TTL.
+    Entries are keyed by a hash of the prompt version, model and the exact
+    user prompt, so any change to a field the prompt uses (price, description,
+    days on market, ...) is a different key.
+
+    set() only updates memory; flush() writes the file (atomically, via a
+    temp file) when anything changed. The evaluator flushes after each batch
+    of properties, and the cache flushes once more at interpreter exit.
+    """
+    def __init__(self, path="data/llm_cache.json", ttl_seconds=7 * 24 * 3600, max_entries=5000):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes file writes without blocking get/set on the disk I/O
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._load()
+        if self.path:
+            atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(prompt_version, model, user_prompt):
+        payload = json.dumps([prompt_version, model, user_prompt]).encode()
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                metrics.inc('llm_cache_lookups', result='miss')
+                return None
+            if self._is_expired(entry):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                metrics.inc('llm_cache_lookups', result='expired')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            metrics.inc('llm_cache_lookups', result='hit')
+            return dict(entry['value'])
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = {'stored_at': time.time(), 'value': dict(value)}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._dirty = True
+
+    def flush(self):
+        """
+        Write the cache to disk if it changed since the last flush.
+        """
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = list(self._entries.items())
+                self._dirty = False
+            if not self._save(entries):
+                with self._lock:
+                    self._dirty = True
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'size': len(self._entries),
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _is_expired(self, entry):
+        return self.ttl_seconds is not None and time.time() - entry['stored_at'] > self.ttl_seconds
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable LLM cache {self.path}: {e}")
+            return
+        # Stored oldest-first so LRU order survives a restart
+        for key, entry in data.get('entries', []):
+            if not self._is_expired(entry):
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self, entries):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'entries': entries}, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"WARNING: Could not persist LLM cache to {self.path}: {e}")
+            return False
@@ -1,37 +1,29 @@
 import os
 import json
-from openai import OpenAI
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-class LLMPropertyEvaluator:
-    def __init__(self, api_key=None):
-        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
-        if self.api_key:
-            self.client = OpenAI(api_key=self.api_key)
-        else:
-            self.client = None
+from engine.metrics import metrics
 
-    def evaluate_property(self, property_data):
-        """
-        Takes property metadata and asks GPT-4o to generate a qualitative repair cost estimate in dollars.
-        Returns a dict with `repair_cost_estimate` (int) and `reasoning` (str).
-        """
-        if not self.client:
-            return {"repair_cost_estimate": 0, "reasoning": "No OpenAI API key provided."}
+# Bump whenever SYSTEM_PROMPT or build_user_prompt changes so cached answers are not reused
+PROMPT_VERSION = 1
 
-        system_prompt = """
-You are an expert real estate investor and flipper. 
+SYSTEM_PROMPT = """
+You are an expert real estate investor and flipper.
 Your job is to analyze property metadata, especially the listing description, and determine if the property is likely a "turnkey" ready-to-move-in home ($0 repair cost) or a "fixer-upper" requiring significant capital expenditure.
 Estimate the absolute dollar amount of repairs needed to bring the property to market standard.
 If the description mentions "TLC", "investor special", "as-is", or it's very old without recent updates, estimate a higher cost (e.g. $20k - $100k+).
 
 Respond strictly with a JSON object in the following format:
 {
-    "repair_cost_estimate": 25000, 
+    "repair_cost_estimate": 25000,
     "reasoning": "A concise 1-sentence explanation of why you estimated this repair cost."
 }
 """
-        
-        user_prompt = f"""
+
+def build_user_prompt(property_data):
+    return f"""
 Please evaluate the following property for hidden risk / condition issues:
 - Address: {property_data.get('address')}
 - Area/Zip: {property_data.get('neighborhood_name')}
@@ -45,29 +37,121 @@ Please evaluate the following property for hidden risk / condition issues:
 - Public Description: {property_data.get('description', 'Not provided')}
 """
 
+class LLMPropertyEvaluator:
+    def __init__(self, api_key=None, base_url=None, model="gpt-4o", timeout=30.0,
+                 max_retries=3, backoff_seconds=1.0, cache=None):
+        """
+        base_url (or OPENAI_BASE_URL) points the client at any OpenAI-compatible
+        server, e.g. a local fake for tests. `timeout` applies to each call and
+        rate-limited calls are retried `max_retries` times with exponential backoff.
+        An optional LLMResponseCache short-circuits repeat questions.
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.cache = cache
+        # Errors worth retrying; stays empty (matches nothing) without a client
+        self._retryable_errors = ()
+        if self.api_key:
+            # Imported only when a key is configured: the SDK is slow to import
+            from openai import OpenAI, RateLimitError, APITimeoutError
+            # Retries are handled here so backoff is under our control
+            self.client = OpenAI(api_key=self.api_key, base_url=self.base_url,
+                                 timeout=timeout, max_retries=0)
+            self._retryable_errors = (RateLimitError, APITimeoutError)
+        else:
+            self.client = None
+
+    def evaluate_property(self, property_data):
+        """
+        Takes property metadata and asks GPT-4o to generate a qualitative repair cost estimate in dollars.
+        Returns a dict with `repair_cost_estimate` (int) and `reasoning` (str).
+        """
+        if not self.client:
+            metrics.inc('llm_calls', outcome='no_api_key')
+            return {"repair_cost_estimate": 0, "reasoning": "No OpenAI API key provided."}
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(PROMPT_VERSION, self.model, build_user_prompt(property_data))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        attempt = 0
+        while True:
+            try:
+                with metrics.timer('llm_request', model=self.model):
+                    result = self._request_estimate(property_data)
+                metrics.inc('llm_calls', outcome='success')
+                # Only successful answers are cached; failures are retried next cycle
+                if cache_key is not None:
+                    self.cache.set(cache_key, result)
+                return result
+            except self._retryable_errors as e:
+                if attempt >= self.max_retries:
+                    metrics.inc('llm_calls', outcome='failed')
+                    print(f"LLM Evaluation failed: {e}")
+                    return {"repair_cost_estimate": 0, "reasoning": f"LLM evaluation failed: {e}"}
+                metrics.inc('llm_retries', reason=type(e).__name__)
+                time.sleep(self._retry_delay(e, attempt))
+                attempt += 1
+            except Exception as e:
+                metrics.inc('llm_calls', outcome='failed')
+                print(f"LLM Evaluation failed: {e}")
+                return {"repair_cost_estimate": 0, "reasoning": f"LLM evaluation failed: {e}"}
+
+    def evaluate_properties(self, properties, max_concurrency=4):
+        """
+        Evaluate many properties with at most `max_concurrency` requests in flight.
+        Results are returned in the same order as `properties`.
+        """
+        properties = list(properties)
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                response_format={ "type": "json_object" },
-                temperature=0.2
-            )
-            
-            result_str = response.choices[0].message.content
-            result = json.loads(result_str)
-            
-            # Default to 0 if there's an issue parsing
-            repair_cost = int(result.get("repair_cost_estimate", 0))
-            reasoning = result.get("reasoning", "No clear reasoning provided.")
-            
-            return {
-                "repair_cost_estimate": repair_cost,
-                "reasoning": reasoning
-            }
-            
-        except Exception as e:
-            print(f"LLM Evaluation failed: {e}")
-            return {"repair_cost_estimate": 0, "reasoning": f"LLM evaluation failed: {e}"}
+            if max_concurrency <= 1 or len(properties) <= 1:
+                return [self.evaluate_property(p) for p in properties]
+
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(properties))) as pool:
+                return list(pool.map(self.evaluate_property, properties))
+        finally:
+            # One cache write per batch instead of one per call
+            if self.cache is not None:
+                self.cache.flush()
+
+    def _request_estimate(self, property_data):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": SYSTEM_PROMPT},
+                {"role": "user", "content": build_user_prompt(property_data)}
+            ],
+            response_format={ "type": "json_object" },
+            temperature=0.2,
+            timeout=self.timeout
+        )
+
+        result_str = response.choices[0].message.content
+        result = json.loads(result_str)
+
+        # Default to 0 if there's an issue parsing
+        repair_cost = int(result.get("repair_cost_estimate", 0))
+        reasoning = result.get("reasoning", "No clear reasoning provided.")
+
+        return {
+            "repair_cost_estimate": repair_cost,
+            "reasoning": reasoning
+        }
+
+    def _retry_delay(self, error, attempt):
+        # Honor the server's Retry-After hint on 429s, otherwise back off exponentially with jitter
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        return self.backoff_seconds * (2 ** attempt) * (1 + random.random() * 0.25)
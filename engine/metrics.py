@@ -0,0 +1,263 @@
+"""
+Lightweight in-process metrics: counters, gauges and timers with optional labels.
+
+Every module records into the shared `metrics` registry, which starts disabled.
+While disabled each call is a single attribute check, so instrumentation can
+stay in hot paths. The daemon enables it with METRICS_PATH and writes a
+snapshot after every scan cycle:
+- `*.prom` / `*.txt` paths get the Prometheus text format (for node_exporter's
+  textfile collector)
+- anything else gets JSON
+
+Usage:
+    from engine.metrics import metrics
+
+    with metrics.timer('scan_stage', stage='fetch'):
+        ...
+    metrics.inc('listings_dropped', reason='property_type')
+
+configure(track_memory=True) also records, for every timed block, the peak
+Python-heap growth during the block as a `<name>_peak_bytes` gauge (via
+tracemalloc, which numpy and pandas buffers report to). Tracing slows
+allocation-heavy code, so it is off unless asked for. The peak is process
+wide: blocks that overlap in other threads share it.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+PROMETHEUS_PREFIX = "house_discovery_"
+PROMETHEUS_EXTENSIONS = ('.prom', '.txt')
+
+
+class _NullTimer:
+    """
+    Shared no-op context manager handed out while metrics are disabled.
+    """
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.started = None
+        # Traced bytes when the block started and the highest seen since
+        self.memory_start = None
+        self.memory_peak = None
+
+    def __enter__(self):
+        if self.registry.track_memory:
+            self.registry._open_memory(self)
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.registry.observe(self.name, time.perf_counter() - self.started, **self.labels)
+        if self.memory_start is not None:
+            self.registry._close_memory(self)
+        return False
+
+
+def _series_key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+class MetricsRegistry:
+    """
+    Thread-safe store of counters, gauges and timers. Counters and timers are
+    cumulative for the life of the process, as Prometheus expects; gauges hold
+    the last value set.
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.track_memory = False
+        self._counters = {}
+        self._gauges = {}
+        # (name, labels) -> [count, total_seconds, max_seconds, last_seconds]
+        self._timers = {}
+        self._lock = threading.Lock()
+        # Timers currently tracking memory, innermost last
+        self._memory_timers = []
+
+    def configure(self, enabled=True, track_memory=None):
+        """
+        track_memory=True starts tracemalloc (if needed) and adds per-block
+        peak memory gauges to every timer; None leaves the setting unchanged.
+        """
+        self.enabled = enabled
+        if track_memory is not None:
+            self.track_memory = track_memory and enabled
+            if self.track_memory and not tracemalloc.is_tracing():
+                tracemalloc.start()
+        return self
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._timers.clear()
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = _series_key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._gauges[_series_key(name, labels)] = value
+
+    def observe(self, name, seconds, **labels):
+        if not self.enabled:
+            return
+        key = _series_key(name, labels)
+        with self._lock:
+            stats = self._timers.get(key)
+            if stats is None:
+                self._timers[key] = [1, seconds, seconds, seconds]
+            else:
+                stats[0] += 1
+                stats[1] += seconds
+                stats[2] = max(stats[2], seconds)
+                stats[3] = seconds
+
+    def _memory_checkpoint(self):
+        """
+        Fold the tracemalloc peak since the last checkpoint into every open
+        timer and start a new peak window. Returns the traced bytes now.
+        Call with the lock held.
+        """
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for timer in self._memory_timers:
+            timer.memory_peak = max(timer.memory_peak, peak)
+        return current
+
+    def _open_memory(self, timer):
+        if not tracemalloc.is_tracing():
+            return
+        with self._lock:
+            timer.memory_start = timer.memory_peak = self._memory_checkpoint()
+            self._memory_timers.append(timer)
+
+    def _close_memory(self, timer):
+        with self._lock:
+            if tracemalloc.is_tracing():
+                self._memory_checkpoint()
+            self._memory_timers.remove(timer)
+        self.set_gauge(f"{timer.name}_peak_bytes", timer.memory_peak - timer.memory_start, **timer.labels)
+
+    def timer(self, name, **labels):
+        """
+        Context manager that records the wall time of its block under `name`
+        (and its peak memory growth under `<name>_peak_bytes` when tracking memory).
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def snapshot(self):
+        """
+        Plain-dict view of every series, suitable for JSON.
+        """
+        with self._lock:
+            return {
+                'timestamp': time.time(),
+                'counters': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self._counters.items()],
+                'gauges': [{'name': n, 'labels': dict(l), 'value': v} for (n, l), v in self._gauges.items()],
+                'timers': [
+                    {'name': n, 'labels': dict(l), 'count': s[0], 'sum_seconds': s[1],
+                     'max_seconds': s[2], 'last_seconds': s[3]}
+                    for (n, l), s in self._timers.items()
+                ],
+            }
+
+    def to_prometheus(self):
+        """
+        Prometheus text exposition format. Timers become `<name>_seconds`
+        summaries (sum and count) plus `_max` and `_last` gauges.
+        """
+        snapshot = self.snapshot()
+        lines = []
+        declared = set()
+
+        def declare(name, kind):
+            if name not in declared:
+                declared.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for series in sorted(snapshot['counters'], key=lambda s: s['name']):
+            name = f"{PROMETHEUS_PREFIX}{series['name']}_total"
+            declare(name, 'counter')
+            lines.append(f"{name}{_format_labels(series['labels'])} {series['value']}")
+        for series in sorted(snapshot['gauges'], key=lambda s: s['name']):
+            name = f"{PROMETHEUS_PREFIX}{series['name']}"
+            declare(name, 'gauge')
+            lines.append(f"{name}{_format_labels(series['labels'])} {series['value']}")
+        for series in sorted(snapshot['timers'], key=lambda s: s['name']):
+            name = f"{PROMETHEUS_PREFIX}{series['name']}_seconds"
+            labels = _format_labels(series['labels'])
+            declare(name, 'summary')
+            lines.append(f"{name}_sum{labels} {series['sum_seconds']:.6f}")
+            lines.append(f"{name}_count{labels} {series['count']}")
+        for suffix, field in (('max', 'max_seconds'), ('last', 'last_seconds')):
+            for series in sorted(snapshot['timers'], key=lambda s: s['name']):
+                name = f"{PROMETHEUS_PREFIX}{series['name']}_seconds_{suffix}"
+                declare(name, 'gauge')
+                lines.append(f"{name}{_format_labels(series['labels'])} {series[field]:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Atomically write a snapshot to `path` (Prometheus text or JSON by extension).
+        Returns the path, or None while disabled.
+        """
+        if not self.enabled or not path:
+            return None
+        if path.endswith(PROMETHEUS_EXTENSIONS):
+            content = self.to_prometheus()
+        else:
+            content = json.dumps(self.snapshot(), indent=2)
+
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"WARNING: Could not write metrics to {path}: {e}")
+            return None
+        return path
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    parts = []
+    for key, value in sorted(labels.items()):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+# Process-wide registry; disabled until configure() is called
+metrics = MetricsRegistry()
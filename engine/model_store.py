@@ -0,0 +1,110 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+import pandas as pd
+import sklearn
+
+# Bump whenever the layout of the pickled state changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+# Snapshots kept per directory after each save, newest first (MODEL_SNAPSHOTS_KEEP).
+# More than one, so engines with different data or configs sharing a directory don't evict each other.
+KEEP_SNAPSHOTS = int(os.getenv("MODEL_SNAPSHOTS_KEEP", "3"))
+
+
+def hash_training_data(df, columns):
+    """
+    Content hash of the columns the models are trained on. Row order matters,
+    the index does not.
+    """
+    hashed = pd.util.hash_pandas_object(df[columns], index=False).values
+    digest = hashlib.sha256(hashed.tobytes())
+    digest.update(json.dumps(list(columns)).encode())
+    return digest.hexdigest()
+
+
+def snapshot_key(data_hash, config):
+    """
+    Combine the data hash with the model hyperparameters and the code versions
+    that affect the pickled objects. Any change produces a new key, so stale
+    snapshots are never loaded.
+    """
+    payload = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'sklearn_version': sklearn.__version__,
+        'data_hash': data_hash,
+        'config': config,
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:24]
+
+
+class ModelSnapshotStore:
+    """
+    Directory of pickled model snapshots, one file per snapshot key.
+    """
+    def __init__(self, directory="data/model_snapshots", keep=KEEP_SNAPSHOTS):
+        self.directory = directory
+        self.keep = keep
+
+    def path_for(self, key):
+        return os.path.join(self.directory, f"engine_{key}.pkl")
+
+    def exists(self, key):
+        return os.path.exists(self.path_for(key))
+
+    def load(self, key):
+        """
+        Return the stored state dict, or None if there is no usable snapshot.
+        """
+        path = self.path_for(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                state = pickle.load(f)
+        except Exception as e:
+            print(f"WARNING: Could not read model snapshot {path}: {e}")
+            return None
+        if state.get('key') != key:
+            return None
+        # prune() keeps the most recently used snapshots
+        os.utime(path)
+        return state
+
+    def save(self, key, state):
+        """
+        Atomically write a snapshot. Older snapshots are left in place; call
+        prune() to remove them.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        state = dict(state, key=key)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.path_for(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return self.path_for(key)
+
+    def prune(self, keep_key, keep=None):
+        """
+        Delete old snapshots, keeping `keep_key` and the most recently saved
+        or loaded others up to `keep` snapshots in total (default: the store's `keep`). Returns the
+        deleted paths.
+        """
+        keep = self.keep if keep is None else keep
+        kept = os.path.basename(self.path_for(keep_key))
+        others = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                  if name.startswith('engine_') and name.endswith('.pkl') and name != kept]
+        others.sort(key=os.path.getmtime, reverse=True)
+        removed = others[max(0, keep - 1):]
+        for path in removed:
+            os.remove(path)
+        return removed
@@ -1,29 +1,53 @@
 import numpy as np
 import pandas as pd
-from sklearn.ensemble import RandomForestRegressor
+from sklearn.ensemble import HistGradientBoostingRegressor, RandomForestRegressor
 from sklearn.neural_network import MLPRegressor
-from sklearn.linear_model import HuberRegressor
+from sklearn.linear_model import HuberRegressor, Ridge
 from sklearn.preprocessing import StandardScaler
 from sklearn.base import BaseEstimator, RegressorMixin
 
-class BaselineRegressor:
+class ScaledRegressor:
     """
-    Baseline ensemble model to capture general property value based on 
-    features like sqft, beds, and baths.
+    A scikit-learn regressor with optional standardization of the features
+    and/or the target. Tree models split on thresholds, so new backends can skip
+    scaling.
     """
-    def __init__(self):
-        self.model = RandomForestRegressor(n_estimators=100, random_state=42)
-        self.scaler = StandardScaler()
+    def __init__(self, model, scale_features=True, scale_target=False):
+        self.model = model
+        self.scaler = StandardScaler() if scale_features else None
+        self.y_scaler = StandardScaler() if scale_target else None
 
     def fit(self, X, y):
         X_vals = X.values if hasattr(X, 'values') else X
-        X_scaled = self.scaler.fit_transform(X_vals)
-        self.model.fit(X_scaled, y)
+        y_vals = np.asarray(y.values if hasattr(y, 'values') else y, dtype=float)
+        if self.scaler is not None:
+            X_vals = self.scaler.fit_transform(X_vals)
+        if self.y_scaler is not None:
+            y_vals = self.y_scaler.fit_transform(y_vals.reshape(-1, 1)).ravel()
+        self.model.fit(X_vals, y_vals)
+        return self
 
     def predict(self, X):
         X_vals = X.values if hasattr(X, 'values') else X
-        X_scaled = self.scaler.transform(X_vals)
-        return self.model.predict(X_scaled)
+        if self.scaler is not None:
+            X_vals = self.scaler.transform(X_vals)
+        predictions = self.model.predict(X_vals)
+        if self.y_scaler is not None:
+            predictions = self.y_scaler.inverse_transform(predictions.reshape(-1, 1)).ravel()
+        return predictions
+
+class BaselineRegressor(ScaledRegressor):
+    """
+    Baseline model to capture general property value based on features like
+    sqft, beds, and baths. `backend` picks the estimator from BASELINE_BACKENDS;
+    the default is the original 100-tree random forest.
+    """
+    def __init__(self, backend='random_forest'):
+        if backend not in BASELINE_BACKENDS:
+            raise ValueError(f"Unknown baseline backend '{backend}'; expected one of {sorted(BASELINE_BACKENDS)}")
+        factory, scale_features = BASELINE_BACKENDS[backend]
+        super().__init__(factory(), scale_features=scale_features)
+        self.backend = backend
 
 class OverfitPerceptron:
     """
@@ -72,3 +96,64 @@ class TimeTrendRegressor:
 
     def predict(self, days_since_start):
         return self.model.predict(days_since_start.reshape(-1, 1))
+
+class IncrementalPerceptron(OverfitPerceptron):
+    """
+    Same network as OverfitPerceptron, trained chunk by chunk with partial_fit
+    so a cluster's history never has to be in memory at once. The scalers are
+    fitted incrementally in a first pass, before any weights are trained.
+    """
+    def __init__(self):
+        super().__init__()
+        # sklearn's partial_fit does not support early stopping
+        self.model.set_params(early_stopping=False)
+
+    def partial_fit_scalers(self, X, y):
+        X_vals = X.values if hasattr(X, 'values') else X
+        y_vals = y.values if hasattr(y, 'values') else y
+        self.scaler.partial_fit(X_vals)
+        self.y_scaler.partial_fit(y_vals.reshape(-1, 1))
+
+    def partial_fit(self, X, y):
+        X_vals = X.values if hasattr(X, 'values') else X
+        y_vals = y.values if hasattr(y, 'values') else y
+        X_scaled = self.scaler.transform(X_vals)
+        y_scaled = self.y_scaler.transform(y_vals.reshape(-1, 1)).ravel()
+        self.model.partial_fit(X_scaled, y_scaled)
+
+
+# Baseline backends: name -> (estimator factory, standardize features first)
+BASELINE_BACKENDS = {
+    # The production model. Its split thresholds were learned on standardized features and
+    # dropping the scaler moves predictions (by up to ~$1k on the Tampa history), so it keeps it
+    'random_forest': (lambda: RandomForestRegressor(n_estimators=100, random_state=42), True),
+    # A fifth of the trees, shallower and on half-size bootstrap samples: much smaller and faster
+    'compact_forest': (lambda: RandomForestRegressor(n_estimators=30, max_depth=16, min_samples_leaf=3,
+                                                     max_samples=0.5, random_state=42), False),
+    'hist_gb': (lambda: HistGradientBoostingRegressor(max_iter=300, random_state=42), False),
+    'linear': (lambda: Ridge(alpha=1.0), True),
+}
+
+# Per-neighborhood backends: name -> factory for an unfitted model with fit/predict
+LOCAL_BACKENDS = {
+    'mlp': OverfitPerceptron,
+    'hist_gb': lambda: ScaledRegressor(HistGradientBoostingRegressor(max_iter=100, min_samples_leaf=5,
+                                                                     random_state=42), scale_features=False),
+    'compact_forest': lambda: ScaledRegressor(RandomForestRegressor(n_estimators=30, min_samples_leaf=2,
+                                                                    random_state=42), scale_features=False),
+    'linear': lambda: ScaledRegressor(Ridge(alpha=1.0)),
+}
+
+# Only these local backends can be trained chunk by chunk (streaming mode)
+INCREMENTAL_LOCAL_BACKENDS = {'mlp': IncrementalPerceptron}
+
+
+def make_local_model(backend='mlp', incremental=False):
+    """
+    A fresh, unfitted per-neighborhood model for `backend`.
+    """
+    registry = INCREMENTAL_LOCAL_BACKENDS if incremental else LOCAL_BACKENDS
+    if backend not in registry:
+        kind = "incremental local" if incremental else "local"
+        raise ValueError(f"Unknown {kind} backend '{backend}'; expected one of {sorted(registry)}")
+    return registry[backend]()
@@ -0,0 +1,174 @@
+"""
+Rule-based pre-screen that runs in front of the LLM evaluator.
+
+Every scored candidate (not just the top N) is checked with compiled
+keyword rules on its description plus year_built / days_on_market
+heuristics, all vectorized over the frame:
+
+- disqualify rules catch listings a financed buyer cannot close on:
+  "CASH ONLY", non-warrantable condos, 55+ communities and lot rents
+  (see handling_cash_only_trap.md); optionally, listings stale enough that
+  they likely have one of those flaws
+- repair rules give a provisional repair estimate from the same phrases
+  the LLM prompt keys off ("TLC", "investor special", "as-is", gut jobs)
+- turnkey phrases and recent construction mark listings as needing no repairs
+
+A listing is decisive when it is disqualified, has a distress phrase and no
+turnkey phrase, or is turnkey/new without any distress phrase and has not
+sat on the market. Everything else (no description, conflicting phrases,
+old homes with no signal, slow sellers) is ambiguous and goes to the LLM.
+
+Usage:
+    screen = PreScreen().screen(scored_df)
+    screen[['prescreen_repair_estimate', 'prescreen_disqualified', 'prescreen_needs_llm', 'prescreen_reasons']]
+"""
+import re
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+# name -> (pattern, reason): listings a buyer with a loan cannot close on
+DISQUALIFY_RULES = {
+    'cash_only': (r"cash\s*(?:buyers?\s*)?only|no financing(?! contingenc)|"
+                  r"(?:does not|doesn't|won't|will not) qualify for (?:a |any )?(?:loans?|financing|mortgages?)",
+                  "Cash only"),
+    'non_warrantable': (r"non[- ]?warrantable", "Non-warrantable condo"),
+    'age_restricted': (r"\b55\s*\+|\b55 (?:and|&) (?:over|older|up)\b|age[- ]restricted|senior (?:community|living)",
+                       "55+ community"),
+    'lot_rent': (r"lot rent|land lease", "Lot rent / land lease"),
+}
+
+# name -> (pattern, provisional repair estimate in dollars); a listing gets the largest match
+REPAIR_RULES = {
+    'gut_rehab': (r"\bgut(?:ted)?\b|gut job|(?:complete|full|total) (?:rehab|renovation|remodel)|"
+                  r"down to the studs|tear[- ]?down", 100_000),
+    'structural': (r"foundation (?:issues?|problems?|repairs?)|structural (?:issues?|damage)|"
+                   r"(?:fire|water|flood) damage|\bmold\b|needs (?:a )?(?:new )?roof", 60_000),
+    'investor_special': (r"investor special|handyman special|contractor special|fixer[- ]?upper|"
+                         r"bring your (?:contractor|imagination)", 50_000),
+    'tlc': (r"\btlc\b|needs (?:some |a little )?(?:work|updating|updates|repairs?|love)|\brehab\b", 30_000),
+    'as_is': (r"\bas[- ]is\b", 25_000),
+}
+
+# Phrases that mean the listing should need no repairs
+TURNKEY_PATTERN = (r"turn[- ]?key|move[- ]in ready|brand new|new construction|"
+                   r"recent(?:ly)? (?:build|built|renovated|remodeled|updated)|"
+                   r"fully (?:renovated|remodeled|updated)")
+
+# Descriptions that carry no text
+EMPTY_DESCRIPTIONS = ('', 'not provided', 'none', 'nan')
+
+# Homes at least this old with no turnkey phrase get OLD_HOME_ESTIMATE
+OLD_HOME_AGE = 50
+OLD_HOME_ESTIMATE = 15_000
+# Homes at most this old with no distress phrase count as turnkey
+NEW_HOME_AGE = 10
+
+# A financeable, fairly priced home sells in 30-90 days (see handling_cash_only_trap.md)
+SLOW_DAYS_ON_MARKET = 90
+# Suggested hard cut for PreScreen(stale_days=...); off by default, stale listings go to the LLM
+STALE_DAYS_ON_MARKET = 180
+
+# Columns screen() returns
+PRESCREEN_COLUMNS = ['prescreen_repair_estimate', 'prescreen_disqualified', 'prescreen_needs_llm',
+                     'prescreen_reasons']
+
+
+def _numeric_column(frame, column):
+    if column not in frame:
+        return np.full(len(frame), np.nan)
+    values = pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float)
+    # The API reports unknown year_built / days_on_market as 0
+    values[values <= 0] = np.nan
+    return values
+
+
+def prescreen_reasoning(reasons):
+    """
+    llm_reasoning text for rows whose repair estimate came from the pre-screen.
+    """
+    reasons = np.asarray(reasons, dtype=object)
+    return np.where(reasons == '', "Pre-screen: no rule matched", "Pre-screen: " + reasons)
+
+
+class PreScreen:
+    def __init__(self, disqualify_rules=None, repair_rules=None, turnkey_pattern=TURNKEY_PATTERN,
+                 stale_days=None, slow_days=SLOW_DAYS_ON_MARKET, current_year=None):
+        """
+        Rules default to the module tables; patterns are compiled once,
+        case-insensitive. Listings on the market over `slow_days` go to the
+        LLM; set `stale_days` (e.g. STALE_DAYS_ON_MARKET) to disqualify those
+        over it outright instead.
+        """
+        disqualify_rules = DISQUALIFY_RULES if disqualify_rules is None else disqualify_rules
+        repair_rules = REPAIR_RULES if repair_rules is None else repair_rules
+        self.disqualify_rules = {name: (re.compile(pattern, re.IGNORECASE), reason)
+                                 for name, (pattern, reason) in disqualify_rules.items()}
+        self.repair_rules = {name: (re.compile(pattern, re.IGNORECASE), estimate)
+                             for name, (pattern, estimate) in repair_rules.items()}
+        self.turnkey = re.compile(turnkey_pattern, re.IGNORECASE)
+        self.stale_days = stale_days
+        self.slow_days = slow_days
+        self.current_year = current_year or datetime.now().year
+
+    def screen(self, frame):
+        """
+        Pre-screen every row of `frame`. Returns a DataFrame on the same index
+        with PRESCREEN_COLUMNS:
+        - prescreen_repair_estimate: provisional repair cost in dollars
+        - prescreen_disqualified: hard fail, never worth an LLM call
+        - prescreen_needs_llm: ambiguous, the LLM should decide
+        - prescreen_reasons: matched rules and heuristics, '; '-separated
+        """
+        n = len(frame)
+        if 'description' in frame:
+            descriptions = frame['description'].astype(object).fillna('').astype(str)
+        else:
+            descriptions = pd.Series('', index=frame.index)
+        has_text = ~descriptions.str.strip().str.lower().isin(EMPTY_DESCRIPTIONS).to_numpy()
+        reasons = np.full(n, '', dtype=object)
+
+        def note(mask, text):
+            if mask.any():
+                reasons[mask] = reasons[mask] + (text + '; ')
+
+        disqualified = np.zeros(n, dtype=bool)
+        for name, (pattern, reason) in self.disqualify_rules.items():
+            matched = descriptions.str.contains(pattern).to_numpy()
+            disqualified |= matched
+            note(matched, reason)
+
+        estimate = np.zeros(n)
+        distressed = np.zeros(n, dtype=bool)
+        for name, (pattern, rule_estimate) in self.repair_rules.items():
+            matched = descriptions.str.contains(pattern).to_numpy()
+            distressed |= matched
+            estimate = np.where(matched, np.maximum(estimate, rule_estimate), estimate)
+            note(matched, f"{name} (${rule_estimate:,.0f})")
+        turnkey = descriptions.str.contains(self.turnkey).to_numpy()
+        note(turnkey, "turnkey")
+
+        age = self.current_year - _numeric_column(frame, 'year_built')
+        with np.errstate(invalid='ignore'):
+            old = (age >= OLD_HOME_AGE) & ~turnkey & ~distressed
+            new = (age <= NEW_HOME_AGE) & ~distressed
+        estimate = np.where(old, OLD_HOME_ESTIMATE, estimate)
+        note(old, f"built {OLD_HOME_AGE}+ years ago")
+        note(new, f"built within {NEW_HOME_AGE} years")
+
+        days_on_market = _numeric_column(frame, 'days_on_market')
+        with np.errstate(invalid='ignore'):
+            stale = days_on_market > self.stale_days if self.stale_days is not None else np.zeros(n, dtype=bool)
+            slow = days_on_market > self.slow_days
+        disqualified |= stale
+        note(stale, f"on market over {self.stale_days} days")
+        note(slow & ~stale, f"on market over {self.slow_days} days")
+
+        decisive = disqualified | (has_text & distressed & ~turnkey) | ((turnkey | new) & ~distressed & ~slow)
+        return pd.DataFrame({
+            'prescreen_repair_estimate': estimate,
+            'prescreen_disqualified': disqualified,
+            'prescreen_needs_llm': ~decisive,
+            'prescreen_reasons': pd.Series(reasons, index=frame.index).str.rstrip('; '),
+        }, index=frame.index)
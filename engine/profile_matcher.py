@@ -0,0 +1,311 @@
+"""
+Match many buyer profiles against the scored market.
+
+A BuyerProfile is one subscriber's budget: salary, cash, DTI ceiling, loan
+program, excluded property types and preferred zips. ProfileMatcher indexes
+both sides so neither direction is a cross join:
+
+- listings are bucketed by zip and sorted by monthly cost under each financing
+  scenario the profiles use, so a profile's affordable homes are a
+  searchsorted prefix of its zips' buckets
+- profiles are bucketed by (zip, scenario) and sorted by the largest monthly
+  payment they can carry, so the profiles a new listing fits are a
+  searchsorted suffix of the buckets for its zip (plus the any-zip bucket)
+
+Monthly costs come from engine.finance, so they match the scenario cube.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from engine.filters import DEFAULT_EXCLUDED_TYPES
+from engine.finance import LOAN_PROGRAMS, ScenarioGrid, evaluate_scenarios
+
+# Bucket key for profiles without zip preferences and for the all-zip listing index
+ANY_ZIP = '*'
+
+# Cost ranges up to this many listings are filtered directly; larger ones are
+# walked best-alpha-first until enough matches are found
+RANGE_SCAN_LIMIT = 4096
+
+
+class BuyerProfile:
+    """
+    One buyer's constraints. Buying cash is `cash` plus `savings_months` of
+    `monthly_savings`; `down_pct` defaults to the loan program's minimum.
+    """
+    def __init__(self, profile_id, salary, cash, max_dti=0.43, program='fha', down_pct=None,
+                 excluded_types=DEFAULT_EXCLUDED_TYPES, zips=None, min_undervaluation_pct=None,
+                 monthly_savings=0.0, savings_months=0):
+        if program not in LOAN_PROGRAMS:
+            raise ValueError(f"Unknown loan program '{program}'; expected one of {sorted(LOAN_PROGRAMS)}")
+        self.profile_id = str(profile_id)
+        self.salary = float(salary)
+        self.cash = float(cash)
+        self.max_dti = float(max_dti)
+        self.program = program
+        self.down_pct = max(LOAN_PROGRAMS[program]['min_down_pct'], down_pct or 0.0)
+        self.excluded_types = frozenset(excluded_types or ())
+        self.zips = None if not zips else frozenset(str(z) for z in zips)
+        self.min_undervaluation_pct = min_undervaluation_pct
+        self.monthly_savings = float(monthly_savings)
+        self.savings_months = savings_months
+
+    @property
+    def max_monthly_payment(self):
+        return self.salary / 12 * self.max_dti
+
+    @property
+    def buying_cash(self):
+        return self.cash + self.monthly_savings * self.savings_months
+
+    @property
+    def max_price(self):
+        """
+        Highest price whose down payment fits in buying_cash.
+        """
+        if self.down_pct <= 0:
+            return np.inf
+        return self.buying_cash / self.down_pct
+
+    @property
+    def scenario(self):
+        return (self.program, self.down_pct)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def load_profiles(path):
+    """
+    Profiles from a JSON list of BuyerProfile keyword arguments.
+    """
+    with open(path, 'r') as f:
+        return [BuyerProfile.from_dict(entry) for entry in json.load(f)]
+
+
+class _ProfileBucket:
+    """
+    Profiles sharing a zip bucket and financing scenario, sorted by
+    max_monthly_payment so listing lookups are a searchsorted suffix.
+    """
+    def __init__(self, profiles):
+        profiles = sorted(profiles, key=lambda p: p.max_monthly_payment)
+        self.ids = np.array([p.profile_id for p in profiles], dtype=object)
+        self.max_payments = np.array([p.max_monthly_payment for p in profiles])
+        self.max_prices = np.array([p.max_price for p in profiles])
+        self.min_alphas = np.array([-np.inf if p.min_undervaluation_pct is None else p.min_undervaluation_pct
+                                    for p in profiles])
+        # property type -> which profiles in this bucket exclude it
+        self.excludes = {}
+        for position, profile in enumerate(profiles):
+            for property_type in profile.excluded_types:
+                self.excludes.setdefault(property_type, np.zeros(len(profiles), dtype=bool))[position] = True
+
+    def matching(self, monthly_cost, price, alpha, property_type):
+        start = np.searchsorted(self.max_payments, monthly_cost, side='left')
+        if start == len(self.ids):
+            return []
+        mask = (self.max_prices[start:] >= price) & (self.min_alphas[start:] <= alpha)
+        excluded = self.excludes.get(property_type)
+        if excluded is not None:
+            mask &= ~excluded[start:]
+        return list(self.ids[start:][mask])
+
+
+class ProfileMatcher:
+    def __init__(self, profiles=(), rate=None, zip_column='neighborhood_name'):
+        """
+        rate defaults to MORTGAGE_INTEREST_RATE; every profile is priced at
+        that rate over 30 years with its own program and down payment.
+        """
+        self.rate = float(os.getenv("MORTGAGE_INTEREST_RATE", "0.06")) if rate is None else rate
+        self.zip_column = zip_column
+        self.profiles = {}
+        self.listings = None
+        self._listing_index = {}
+        self._profile_buckets = None
+        self._grid = None
+        self._scenario_positions = {}
+        for profile in profiles:
+            self.add_profile(profile)
+
+    def add_profile(self, profile):
+        self.profiles[profile.profile_id] = profile
+        self._profile_buckets = None
+        if profile.scenario not in self._scenario_positions:
+            # A new financing scenario changes the cost columns; listings need re-indexing
+            self._build_grid()
+            if self.listings is not None:
+                self.index_listings(self.listings)
+
+    def remove_profile(self, profile_id):
+        self.profiles.pop(str(profile_id), None)
+        self._profile_buckets = None
+
+    def _build_grid(self):
+        scenarios = sorted({p.scenario for p in self.profiles.values()})
+        self._scenario_positions = {scenario: position for position, scenario in enumerate(scenarios)}
+        programs = [program for program, _ in scenarios]
+        down_pcts = [down_pct for _, down_pct in scenarios]
+        self._grid = ScenarioGrid([self.rate] * len(scenarios), [30] * len(scenarios), down_pcts, programs)
+
+    def _monthly_costs(self, listings):
+        return evaluate_scenarios(listings, self._grid)['total_monthly_cost']
+
+    def index_listings(self, scored_df):
+        """
+        Index a scored market (score_candidates output). Replaces any earlier index.
+        """
+        listings = scored_df.reset_index(drop=True)
+        self.listings = listings
+        self._listing_index = {}
+        if listings.empty or not self._scenario_positions:
+            return
+        # Column arrays the per-profile filters index into, converted once
+        self._prices = listings['price'].to_numpy(dtype=float)
+        self._alphas = listings['undervaluation_pct'].to_numpy(dtype=float)
+        if 'property_type' in listings:
+            self._type_codes, self._type_names = pd.factorize(listings['property_type'])
+        else:
+            self._type_codes, self._type_names = np.full(len(listings), -1), pd.Index([])
+
+        self._costs = self._monthly_costs(listings)
+        zips = listings[self.zip_column].astype(str).to_numpy()
+        buckets = {ANY_ZIP: np.arange(len(listings))}
+        for zip_code, positions in pd.Series(np.arange(len(listings))).groupby(zips):
+            buckets[zip_code] = positions.to_numpy()
+
+        self._alpha_order = {}
+        for zip_code, positions in buckets.items():
+            # NaN alphas sort last
+            self._alpha_order[zip_code] = positions[np.argsort(-self._alphas[positions], kind='stable')]
+            for scenario, column in self._scenario_positions.items():
+                bucket_costs = self._costs[positions, column]
+                order = np.argsort(bucket_costs, kind='stable')
+                self._listing_index[(zip_code, scenario)] = (bucket_costs[order], positions[order])
+
+    def _eligible(self, profile, positions):
+        """
+        The subset of `positions` passing the profile's price, alpha and
+        property-type filters.
+        """
+        mask = self._prices[positions] <= profile.max_price
+        if profile.min_undervaluation_pct is not None:
+            mask &= self._alphas[positions] >= profile.min_undervaluation_pct
+        if profile.excluded_types:
+            # Lookup table over factorized types; the extra last slot covers missing types (code -1)
+            excluded = np.append(self._type_names.isin(list(profile.excluded_types)), False)
+            mask &= ~excluded[self._type_codes[positions]]
+        return positions[mask]
+
+    def _bucket_matches(self, profile, zip_code, top_n):
+        entry = self._listing_index.get((zip_code, profile.scenario))
+        if entry is None:
+            return np.empty(0, dtype=np.int64)
+        sorted_costs, by_cost = entry
+        # Range query: everything up to the profile's monthly ceiling
+        end = np.searchsorted(sorted_costs, profile.max_monthly_payment, side='right')
+        if top_n is None or end <= RANGE_SCAN_LIMIT:
+            return self._eligible(profile, by_cost[:end])
+
+        # A broad budget covers most of the bucket: walk it best-alpha-first and
+        # stop as soon as top_n listings pass every filter
+        column = self._scenario_positions[profile.scenario]
+        by_alpha = self._alpha_order[zip_code]
+        found, count, start, block = [], 0, 0, max(64, top_n * 4)
+        while start < len(by_alpha) and count < top_n:
+            positions = by_alpha[start:start + block]
+            positions = self._eligible(profile, positions[self._costs[positions, column] <= profile.max_monthly_payment])
+            found.append(positions)
+            count += len(positions)
+            start += block
+            block *= 2
+        return np.concatenate(found) if found else np.empty(0, dtype=np.int64)
+
+    def _match_positions(self, profile, top_n):
+        """
+        Listing positions for the profile, best undervaluation_pct first.
+        """
+        zip_buckets = [ANY_ZIP] if profile.zips is None else sorted(profile.zips)
+        positions = np.concatenate([self._bucket_matches(profile, zip_code, top_n) for zip_code in zip_buckets])
+        alphas = self._alphas[positions]
+        if top_n is not None and len(positions) > top_n:
+            best = np.argpartition(-alphas, top_n - 1)[:top_n]
+            positions, alphas = positions[best], alphas[best]
+        return positions[np.argsort(-alphas, kind='stable')]
+
+    def _matches_frame(self, profile_ids, position_lists):
+        """
+        One row per (profile, matched listing), built with a single take.
+        """
+        counts = [len(found) for found in position_lists]
+        positions = np.concatenate(position_lists)
+        scenario_columns = np.repeat([self._scenario_positions[self.profiles[pid].scenario] for pid in profile_ids], counts)
+        down_pcts = np.repeat([self.profiles[pid].down_pct for pid in profile_ids], counts)
+
+        matches = self.listings.iloc[positions].reset_index(drop=True)
+        matches.insert(0, 'profile_id', np.repeat(profile_ids, counts))
+        matches.insert(1, 'match_rank', np.concatenate([np.arange(1, count + 1) for count in counts]))
+        matches['down_payment'] = self._prices[positions] * down_pcts
+        matches['monthly_cost'] = self._costs[positions, scenario_columns]
+        return matches
+
+    def matches_for_profile(self, profile_id, top_n=10):
+        """
+        The profile's affordable listings, highest undervaluation_pct first,
+        with its down_payment and monthly_cost added.
+        """
+        profile = self.profiles[str(profile_id)]
+        if self.listings is None or self.listings.empty or not self._listing_index:
+            return pd.DataFrame()
+        matches = self._matches_frame([profile.profile_id], [self._match_positions(profile, top_n)])
+        return matches.drop(columns=['profile_id', 'match_rank'])
+
+    def match_all(self, top_n=10):
+        """
+        Every profile's matches as one long frame with `profile_id` and
+        `match_rank` columns (1 = best), built with a single row take.
+        """
+        if self.listings is None or self.listings.empty or not self._listing_index or not self.profiles:
+            return pd.DataFrame()
+        profile_ids = list(self.profiles)
+        position_lists = [self._match_positions(self.profiles[pid], top_n) for pid in profile_ids]
+        return self._matches_frame(profile_ids, position_lists)
+
+    def profiles_for_listing(self, listing):
+        """
+        Ids of the profiles a single scored listing (dict or Series) is
+        affordable for, without touching any other listing.
+        """
+        if not self.profiles:
+            return []
+        if self._profile_buckets is None:
+            self._build_profile_buckets()
+
+        row = pd.DataFrame([dict(listing)])
+        costs = self._monthly_costs(row)[0]
+        zip_code = str(listing.get(self.zip_column))
+        price = float(listing['price'])
+        alpha = float(listing.get('undervaluation_pct', np.nan))
+        if np.isnan(alpha):
+            alpha = -np.inf
+        property_type = listing.get('property_type')
+
+        matched = []
+        for bucket_zip in (zip_code, ANY_ZIP):
+            for scenario, column in self._scenario_positions.items():
+                bucket = self._profile_buckets.get((bucket_zip, scenario))
+                if bucket is not None:
+                    matched.extend(bucket.matching(costs[column], price, alpha, property_type))
+        return matched
+
+    def _build_profile_buckets(self):
+        grouped = {}
+        for profile in self.profiles.values():
+            for zip_code in (profile.zips or (ANY_ZIP,)):
+                grouped.setdefault((zip_code, profile.scenario), []).append(profile)
+        self._profile_buckets = {key: _ProfileBucket(profiles) for key, profiles in grouped.items()}
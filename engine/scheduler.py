@@ -0,0 +1,245 @@
+"""
+Asyncio scheduler for the daemon's recurring jobs.
+
+Each Job has its own interval, jitter and error backoff. Jobs can be woken
+early with `Scheduler.trigger(name)` (e.g. re-score as soon as a fetch finds
+new listings), and `Scheduler.stop()` ends every job loop after the job that
+is currently running finishes.
+
+Job functions are plain blocking callables. They run one at a time on a
+single worker thread, so jobs can share engine and listing-store state
+without locking while the event loop keeps their timers independent.
+"""
+import asyncio
+import json
+import os
+import random
+import signal
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from engine.metrics import metrics
+
+
+class Job:
+    """
+    A recurring job. `interval_seconds` is a number or a callable returning the
+    next interval, so budgets can stretch or shrink the cadence between runs.
+    After a failure the job retries after `backoff_seconds`, doubling per
+    consecutive failure up to `max_backoff_seconds`.
+    """
+    def __init__(self, name, func, interval_seconds, jitter_seconds=0.0, backoff_seconds=60.0,
+                 max_backoff_seconds=3600.0, run_immediately=False):
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.jitter_seconds = jitter_seconds
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.run_immediately = run_immediately
+
+        self.runs = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_run_at = None
+        self.next_run_at = None
+        self._wake = None
+
+    def next_interval(self):
+        interval = self.interval_seconds() if callable(self.interval_seconds) else self.interval_seconds
+        return max(0.0, interval + random.uniform(0, self.jitter_seconds))
+
+    def backoff_delay(self):
+        delay = self.backoff_seconds * (2 ** max(0, self.failures - 1))
+        return min(self.max_backoff_seconds, delay * (1 + random.random() * 0.25))
+
+
+class Scheduler:
+    def __init__(self):
+        self.jobs = {}
+        self._loop = None
+        self._stopping = False
+        self._executor = None
+
+    def add_job(self, name, func, interval_seconds, **kwargs):
+        job = Job(name, func, interval_seconds, **kwargs)
+        self.jobs[name] = job
+        return job
+
+    def trigger(self, name):
+        """
+        Run job `name` as soon as the worker is free instead of waiting for its
+        interval. Safe to call from inside a running job.
+        """
+        job = self.jobs[name]
+        if self._loop is None or job._wake is None:
+            return
+        self._loop.call_soon_threadsafe(job._wake.set)
+
+    def stop(self):
+        """
+        Ask every job loop to exit. Safe to call from any thread or a signal handler.
+        """
+        self._stopping = True
+        if self._loop is None:
+            return
+        for job in self.jobs.values():
+            if job._wake is not None:
+                self._loop.call_soon_threadsafe(job._wake.set)
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = False
+        for job in self.jobs.values():
+            job._wake = asyncio.Event()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scheduler-job")
+        try:
+            await asyncio.gather(*(self._job_loop(job) for job in self.jobs.values()))
+        finally:
+            # Waits for a job that is still running; nothing new is started
+            self._executor.shutdown(wait=True)
+            self._loop = None
+
+    def run_forever(self):
+        """
+        Run until stop() or SIGINT/SIGTERM, then shut down cleanly.
+        """
+        async def main():
+            loop = asyncio.get_running_loop()
+            if threading.current_thread() is threading.main_thread():
+                for sig in (signal.SIGINT, signal.SIGTERM):
+                    try:
+                        loop.add_signal_handler(sig, self.stop)
+                    except (NotImplementedError, RuntimeError):
+                        # Windows: fall back to KeyboardInterrupt for Ctrl+C
+                        pass
+            await self.run()
+
+        try:
+            asyncio.run(main())
+        except KeyboardInterrupt:
+            self.stop()
+
+    async def _job_loop(self, job):
+        delay = 0.0 if job.run_immediately else job.next_interval()
+        while not self._stopping:
+            job.next_run_at = time.time() + delay
+            try:
+                await asyncio.wait_for(job._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                break
+            job._wake.clear()
+
+            job.last_run_at = time.time()
+            job.runs += 1
+            try:
+                with metrics.timer('job', job=job.name):
+                    await self._loop.run_in_executor(self._executor, job.func)
+            except Exception as e:
+                job.failures += 1
+                job.last_error = repr(e)
+                delay = job.backoff_delay()
+                metrics.inc('job_runs', job=job.name, result='error')
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] Job '{job.name}' failed "
+                      f"({job.failures} in a row): {e}. Retrying in {delay:.0f}s.")
+            else:
+                job.failures = 0
+                job.last_error = None
+                delay = job.next_interval()
+                metrics.inc('job_runs', job=job.name, result='ok')
+
+
+class MonthlyQuota:
+    """
+    Persisted count of API requests spent in the current calendar month (UTC).
+    `next_interval` spreads the remaining budget evenly over the rest of the
+    month; once it is spent, the next run waits for the month to roll over.
+    """
+    def __init__(self, monthly_limit, path="data/rentcast_quota.json"):
+        self.monthly_limit = monthly_limit
+        self.path = path
+        self._month = None
+        self._used = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _current_month(now=None):
+        return (now or datetime.now(timezone.utc)).strftime("%Y-%m")
+
+    def _roll_over(self):
+        month = self._current_month()
+        if month != self._month:
+            self._month = month
+            self._used = 0
+
+    @property
+    def used(self):
+        with self._lock:
+            self._roll_over()
+            return self._used
+
+    @property
+    def remaining(self):
+        return max(0, self.monthly_limit - self.used)
+
+    def spend(self, requests):
+        if requests <= 0:
+            return
+        with self._lock:
+            self._roll_over()
+            self._used += requests
+            self._save()
+        metrics.set_gauge('api_quota_remaining', self.remaining)
+
+    @staticmethod
+    def seconds_until_reset(now=None):
+        now = now or datetime.now(timezone.utc)
+        if now.month == 12:
+            reset = now.replace(year=now.year + 1, month=1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        else:
+            reset = now.replace(month=now.month + 1, day=1, hour=0, minute=0, second=0, microsecond=0)
+        return (reset - now).total_seconds()
+
+    def next_interval(self, cost_per_run):
+        """
+        Seconds to wait before a run that costs `cost_per_run` requests.
+        """
+        cost_per_run = max(1, cost_per_run)
+        runs_left = self.remaining // cost_per_run
+        if runs_left < 1:
+            return self.seconds_until_reset()
+        return self.seconds_until_reset() / runs_left
+
+    def _load(self):
+        self._month = self._current_month()
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"WARNING: Ignoring unreadable quota file {self.path}: {e}")
+            return
+        if data.get('month') == self._month:
+            self._used = int(data.get('used', 0))
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'month': self._month, 'used': self._used}, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            print(f"WARNING: Could not persist API quota usage to {self.path}: {e}")
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import KDTree
+
+EARTH_RADIUS_KM = 6371.0
+
+# Comparable-sales features appended to the model feature sets when enabled
+COMP_FEATURES = ['comp_ppsf', 'comp_count']
+
+
+def to_unit_xyz(lat, long):
+    """
+    Project lat/long (degrees) onto the unit sphere. Euclidean distance in this
+    space is the chord length, which is monotonic in great-circle distance, so a
+    plain KDTree gives exact geographic nearest neighbours.
+    """
+    lat_rad = np.radians(np.asarray(lat, dtype=float))
+    long_rad = np.radians(np.asarray(long, dtype=float))
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack([cos_lat * np.cos(long_rad), cos_lat * np.sin(long_rad), np.sin(lat_rad)])
+
+
+def chord_to_km(chord):
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.clip(chord / 2, 0, 1))
+
+
+def km_to_chord(km):
+    return 2 * np.sin(km / (2 * EARTH_RADIUS_KM))
+
+
+def hash_ids(ids):
+    """
+    Stable uint64 hashes of property ids, so the index can match a property's
+    own sales without storing the id strings.
+    """
+    return pd.util.hash_array(np.asarray(ids).astype(str).astype(object))
+
+
+def weighted_median(values, weights):
+    """
+    Row-wise weighted median of two (n, k) arrays. Rows with no weight return NaN.
+    """
+    order = np.argsort(values, axis=1)
+    sorted_values = np.take_along_axis(values, order, axis=1)
+    cumulative = np.cumsum(np.take_along_axis(weights, order, axis=1), axis=1)
+    totals = cumulative[:, -1:]
+    median_pos = np.argmax(cumulative >= totals / 2, axis=1)
+    result = sorted_values[np.arange(len(values)), median_pos]
+    return np.where(totals[:, 0] > 0, result, np.nan)
+
+
+class ComparablesIndex:
+    """
+    KD-tree over the training sales, used to compute k-nearest-comps features
+    for a whole batch of properties in one vectorized query.
+    """
+    # Extra neighbours fetched when excluding a property's own sales
+    SELF_EXCLUSION_SLACK = 8
+
+    def __init__(self, k=10, radius_km=1.0, leaf_size=40):
+        self.k = k
+        self.radius_km = radius_km
+        self.leaf_size = leaf_size
+        self.tree = None
+        self.ppsf = None
+        self.fallback_ppsf = None
+        self.id_hashes = None
+
+    def fit(self, lat, long, price, sqft, ids=None):
+        """
+        Index sales by location, storing their price per sqft. `ids` (e.g.
+        house_id) lets query() leave out a property's own sales.
+        """
+        coords = to_unit_xyz(lat, long)
+        ppsf = np.asarray(price, dtype=float) / np.maximum(np.asarray(sqft, dtype=float), 1.0)
+        valid = np.isfinite(coords).all(axis=1) & np.isfinite(ppsf)
+        self.tree = KDTree(coords[valid], leaf_size=self.leaf_size)
+        self.ppsf = ppsf[valid]
+        self.fallback_ppsf = float(np.median(self.ppsf))
+        self.id_hashes = None if ids is None else hash_ids(ids)[valid]
+        return self
+
+    def query(self, lat, long, exclude_ids=None):
+        """
+        Comparable-sales features for each (lat, long):
+        - comp_ppsf: inverse-distance-weighted median $/sqft of the k nearest sales
+        - comp_count: number of sales within radius_km
+        With exclude_ids (one id per row, matching the ids passed to fit), each
+        property's own sales are ignored, which is what the training rows need.
+        Other sales at the same coordinates (e.g. units in the same condo
+        building) still count, exactly as they do when scoring.
+        Rows without coordinates get the market median and a count of 0.
+        """
+        coords = to_unit_xyz(lat, long)
+        n = len(coords)
+        comp_ppsf = np.full(n, self.fallback_ppsf)
+        comp_count = np.zeros(n)
+
+        valid = np.isfinite(coords).all(axis=1)
+        if not valid.any():
+            return pd.DataFrame({'comp_ppsf': comp_ppsf, 'comp_count': comp_count})
+        coords = coords[valid]
+        exclude_self = exclude_ids is not None
+        if exclude_self:
+            if self.id_hashes is None:
+                raise ValueError("exclude_ids needs an index fitted with ids")
+            query_hashes = hash_ids(exclude_ids)[valid]
+
+        k = self.k + (self.SELF_EXCLUSION_SLACK if exclude_self else 0)
+        k = min(k, len(self.ppsf))
+        distances, indices = self.tree.query(coords, k=k)
+        distances_km = chord_to_km(distances)
+
+        weights = 1.0 / (distances_km + 0.05)
+        if exclude_self:
+            own_sale = self.id_hashes[indices] == query_hashes[:, None]
+            weights[own_sale] = 0.0
+            # Keep only the first k usable neighbours per row
+            usable_rank = np.cumsum(~own_sale, axis=1)
+            weights[usable_rank > self.k] = 0.0
+
+        medians = weighted_median(self.ppsf[indices], weights)
+        comp_ppsf[valid] = np.where(np.isnan(medians), self.fallback_ppsf, medians)
+
+        counts = self.tree.query_radius(coords, km_to_chord(self.radius_km), count_only=True)
+        if exclude_self:
+            # A property's own sales all sit at its location, so all of them are within the radius
+            indexed_ids, own_sales = np.unique(self.id_hashes, return_counts=True)
+            position = np.clip(np.searchsorted(indexed_ids, query_hashes), 0, len(indexed_ids) - 1)
+            counts = counts - np.where(indexed_ids[position] == query_hashes, own_sales[position], 0)
+        comp_count[valid] = counts
+
+        return pd.DataFrame({'comp_ppsf': comp_ppsf, 'comp_count': comp_count})
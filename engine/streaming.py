@@ -0,0 +1,98 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from engine.columnar import is_columnar, load_columnar, read_meta
+
+
+def available_columns(path):
+    """
+    Column names of a CSV or columnar history without reading its rows.
+    """
+    if is_columnar(path):
+        return list(read_meta(path)['columns'])
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def history_chunk_factory(path, columns=None, chunksize=250_000):
+    """
+    Return a callable that yields the history at `path` (CSV or columnar) as
+    DataFrame chunks. Streaming training makes several passes, so each call
+    starts a fresh iterator. Only one chunk is materialized at a time.
+    """
+    if is_columnar(path):
+        def iter_chunks():
+            # Columns are memory-mapped; slicing only pages in the current chunk
+            history = load_columnar(path, columns=columns)
+            for start in range(0, len(history), chunksize):
+                yield history.iloc[start:start + chunksize].copy()
+    else:
+        def iter_chunks():
+            for chunk in pd.read_csv(path, usecols=columns, chunksize=chunksize):
+                yield chunk
+    return iter_chunks
+
+
+class ReservoirSample:
+    """
+    Fixed-size uniform random sample over a stream of DataFrame chunks
+    (Algorithm R, vectorized per chunk).
+    """
+    def __init__(self, capacity, seed=42):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+        self.seen = 0
+        self._sample = None
+
+    def add(self, chunk):
+        chunk = chunk.reset_index(drop=True)
+        n = len(chunk)
+        if n == 0:
+            return
+
+        # Fill the reservoir first
+        fill = 0
+        if self._sample is None or len(self._sample) < self.capacity:
+            current = 0 if self._sample is None else len(self._sample)
+            fill = min(n, self.capacity - current)
+            head = chunk.iloc[:fill]
+            self._sample = head.copy() if self._sample is None else pd.concat([self._sample, head], ignore_index=True)
+            self.seen += fill
+        if fill == n:
+            return
+
+        # Row i of the stream (1-based) replaces a random slot with probability capacity / i
+        rest = chunk.iloc[fill:]
+        stream_pos = self.seen + np.arange(1, len(rest) + 1)
+        slots = np.floor(self.rng.random(len(rest)) * stream_pos).astype(np.int64)
+        accepted = np.flatnonzero(slots < self.capacity)
+        if len(accepted):
+            # When a slot is hit twice in one chunk, the later row wins, as in the sequential algorithm
+            reversed_slots = slots[accepted][::-1]
+            _, first_in_reversed = np.unique(reversed_slots, return_index=True)
+            winners = accepted[::-1][first_in_reversed]
+            replacements = rest.iloc[winners]
+            replacements.index = slots[winners]
+            self._sample.loc[replacements.index] = replacements
+        self.seen += len(rest)
+
+    def to_frame(self):
+        return self._sample.copy() if self._sample is not None else pd.DataFrame()
+
+
+class StreamingDigest:
+    """
+    Order-sensitive content hash over a stream of chunks, used as the
+    snapshot data hash when the full history is never loaded.
+    """
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self._digest = hashlib.sha256()
+
+    def update(self, chunk):
+        hashed = pd.util.hash_pandas_object(chunk[self.columns], index=False).values
+        self._digest.update(hashed.tobytes())
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
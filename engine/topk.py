@@ -0,0 +1,112 @@
+"""
+Bounded top-K selection over a stream of scored DataFrame chunks.
+"""
+import heapq
+import itertools
+
+import numpy as np
+import pandas as pd
+
+
+class TopKSelector:
+    """
+    Keeps the k highest-scoring rows seen across a stream of DataFrame chunks,
+    optionally also the best `k_per_group` rows per value of `group_column`
+    (e.g. per zip code).
+
+    Each chunk is first filtered against the current k-th best score with one
+    vectorized comparison, so once the heaps are warm almost no rows reach the
+    Python-level heap updates. Memory is bounded by k (+ k_per_group per
+    group), never by the number of rows streamed.
+    """
+    def __init__(self, k, group_column=None, k_per_group=None):
+        self.k = k
+        self.group_column = group_column
+        self.k_per_group = k_per_group
+        self.rows_seen = 0
+        # Min-heaps of (score, -sequence, one-row frame): among tied scores the latest arrival
+        # sits at the root, so it is the one evicted and earlier arrivals win ties
+        self._heap = []
+        self._group_heaps = {}
+        self._sequence = itertools.count()
+
+    def add(self, frame, scores):
+        scores = np.asarray(scores, dtype=float)
+        self.rows_seen += len(frame)
+        if len(frame) == 0:
+            return
+        valid = ~np.isnan(scores)
+
+        if self.k > 0:
+            self._add_to_heap(self._heap, self.k, frame, scores, valid)
+
+        if self.group_column is not None and self.k_per_group:
+            self._add_to_groups(frame, scores, valid)
+
+    def _add_to_groups(self, frame, scores, valid):
+        codes, groups = pd.factorize(frame[self.group_column].astype(str), sort=False)
+        if not len(groups):
+            return
+        groups = np.asarray(groups)
+        # One threshold per distinct group in the chunk, broadcast back to its rows
+        group_thresholds = np.array([self._threshold(self._group_heaps.get(group), self.k_per_group)
+                                     for group in groups])
+        # Rows with no group value (code -1) stay out of the per-group heaps
+        passing = np.flatnonzero(valid & (codes >= 0) & (scores > group_thresholds[codes]))
+        if not len(passing):
+            return
+        # Grouped, best-first within each group (stable, so ties keep arrival order)
+        order = passing[np.lexsort((-scores[passing], codes[passing]))]
+        ordered_codes = codes[order]
+        group_starts = np.flatnonzero(np.r_[True, ordered_codes[1:] != ordered_codes[:-1]])
+        rank = np.arange(len(order)) - np.repeat(group_starts, np.diff(np.r_[group_starts, len(order)]))
+        # At most k_per_group per group from this chunk can make its heap
+        order = order[rank < self.k_per_group]
+        selected = frame.iloc[order]
+        for j, position in enumerate(order):
+            heap = self._group_heaps.setdefault(groups[codes[position]], [])
+            self._push(heap, self.k_per_group, scores[position], selected.iloc[j:j + 1])
+
+    def _add_to_heap(self, heap, k, frame, scores, valid):
+        passing = np.flatnonzero(valid & (scores > self._threshold(heap, k)))
+        if len(passing) > k:
+            # Only this chunk's own top k can make the cut; earlier rows win ties, pushed in arrival order
+            passing = np.sort(passing[np.argsort(-scores[passing], kind='stable')[:k]])
+        # One take per chunk; heap entries hold one-row slices so column dtypes survive
+        selected = frame.iloc[passing]
+        for j, position in enumerate(passing):
+            self._push(heap, k, scores[position], selected.iloc[j:j + 1])
+
+    @staticmethod
+    def _threshold(heap, k):
+        if heap is None or len(heap) < k:
+            return -np.inf
+        return heap[0][0]
+
+    def _push(self, heap, k, score, row):
+        entry = (score, -next(self._sequence), row)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    @staticmethod
+    def _heap_frame(entries):
+        if not entries:
+            return pd.DataFrame()
+        # Highest score first; earlier arrivals win ties
+        entries = sorted(entries, key=lambda entry: (-entry[0], -entry[1]))
+        return pd.concat([entry[2] for entry in entries], ignore_index=True)
+
+    def to_frame(self):
+        return self._heap_frame(self._heap)
+
+    def group_frame(self):
+        """
+        Per-group survivors, grouped together and best-first within each group.
+        """
+        frames = [self._heap_frame(heap) for _, heap in sorted(self._group_heaps.items())]
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,428 @@
+"""
+Long-lived local HTTP service for on-demand valuations.
+
+The trained models are loaded once (from a snapshot when one matches). Each
+request's listings go through a MicroBatcher: requests that arrive within a
+few milliseconds of each other are scored together with one vectorized
+score_candidates call, on a single worker thread, so concurrent agents share
+model calls instead of queueing behind each other.
+
+Responses carry the columns and values evaluate_candidates produces, minus
+the LLM step (see UndervaluationEngine.prescreen_candidates): listings the
+pre-screen decides get its repair estimate, disqualified ones are flagged
+rather than dropped. LLM repair estimates are slow, so they are optional: ask
+for `"enrich": true` and poll the returned /enrichment/<id> URL for the
+LLM-adjusted row of each listing the pre-screen left to the LLM.
+
+Endpoints:
+    POST /valuate           {"listing": {...}}, {"listings": [...]} or a bare listing object.
+                            A listing needs price, sqft, beds and baths (plus lat/long or
+                            neighborhood_name to reach its local model). With a listing store,
+                            {"address": "..."} or {"house_id": "..."} re-values a known listing.
+    GET  /enrichment/<id>   {"status": "pending" | "done" | "failed", "result": {...}}
+    GET  /health            model snapshot key and queue depth
+    GET  /metrics           Prometheus text format
+
+Usage:
+    python main.py serve --port 8765
+    curl -s localhost:8765/valuate -d '{"price": 250000, "sqft": 1400, "beds": 3, "baths": 2,
+                                        "lat": 27.95, "long": -82.46, "neighborhood_name": "33606"}'
+"""
+import argparse
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from engine.discovery_engine import apply_repair_estimate
+from engine.metrics import metrics
+
+REQUIRED_FIELDS = ['price', 'sqft', 'beds', 'baths']
+
+# Filled in when a request leaves them out
+LISTING_DEFAULTS = {'hoa_fee': 0.0, 'lat': np.nan, 'long': np.nan, 'neighborhood_name': None}
+
+# Optional fields that must be numbers when given
+NUMERIC_FIELDS = ['hoa_fee', 'lat', 'long']
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 1024 * 1024
+
+
+def prepare_listing(data, store=None):
+    """
+    Validate one requested listing and fill defaults. A request with only an
+    address or house_id is looked up in the listing store. Raises ValueError
+    with a client-facing message.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Each listing must be a JSON object")
+    listing = dict(data)
+    if store is not None and any(field not in listing for field in REQUIRED_FIELDS):
+        known = store.find_listing(house_id=listing.get('house_id'), address=listing.get('address'))
+        if known is not None:
+            # Request fields (e.g. a new asking price) override the stored ones. The stored
+            # date is when it was last scored; it is valued as of now unless the request says so
+            known.pop('date', None)
+            listing = {**known, **listing}
+    missing = [field for field in REQUIRED_FIELDS if listing.get(field) is None]
+    if missing:
+        raise ValueError(f"Listing is missing {', '.join(missing)}")
+    for field in REQUIRED_FIELDS:
+        try:
+            listing[field] = float(listing[field])
+        except (TypeError, ValueError):
+            raise ValueError(f"Listing field '{field}' must be a number")
+    for field, default in LISTING_DEFAULTS.items():
+        if listing.get(field) is None:
+            listing[field] = default
+    # Checked here so one bad listing gets a 400 instead of failing the batch it would join
+    for field in NUMERIC_FIELDS:
+        try:
+            listing[field] = float(listing[field])
+        except (TypeError, ValueError):
+            raise ValueError(f"Listing field '{field}' must be a number")
+    # Scored as of today unless the request says otherwise
+    if listing.get('date') is None:
+        listing['date'] = datetime.now().strftime('%Y-%m-%d')
+    try:
+        date = pd.to_datetime(listing['date'])
+    except (TypeError, ValueError):
+        raise ValueError("Listing field 'date' must be a date, e.g. 2026-02-22")
+    if pd.isna(date):
+        raise ValueError("Listing field 'date' must be a date, e.g. 2026-02-22")
+    listing['date'] = date.strftime('%Y-%m-%d')
+    # Unknown, so the engine routes the listing to a trained cluster by location
+    listing['neighborhood_id'] = np.nan
+    return listing
+
+
+class MicroBatcher:
+    """
+    Collects listings submitted from many threads and scores them in batches
+    on one worker thread. A batch closes when it reaches `max_batch_size` or
+    `max_wait_seconds` after its first listing arrived, whichever is first.
+    """
+    def __init__(self, score_fn, max_batch_size=64, max_wait_seconds=0.005):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_seconds = max_wait_seconds
+        self._pending = []
+        self._condition = threading.Condition()
+        self._stopping = False
+        self._worker = threading.Thread(target=self._run, name="valuation-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, listings):
+        """
+        Queue listings for scoring. Returns one Future per listing, resolving
+        to its scored row as a JSON-ready dict.
+        """
+        futures = [Future() for _ in listings]
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("Batcher is closed")
+            self._pending.extend(zip(listings, futures, [time.perf_counter()] * len(listings)))
+            self._condition.notify()
+        return futures
+
+    def queue_depth(self):
+        with self._condition:
+            return len(self._pending)
+
+    def close(self, timeout=5.0):
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self._worker.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._pending and not self._stopping:
+                    self._condition.wait()
+                if self._stopping and not self._pending:
+                    return
+                # Hold the batch open briefly so concurrent requests share one predict call
+                deadline = self._pending[0][2] + self.max_wait_seconds
+                while len(self._pending) < self.max_batch_size and not self._stopping:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                batch = self._pending[:self.max_batch_size]
+                del self._pending[:self.max_batch_size]
+            self._score_batch(batch)
+
+    def _score_batch(self, batch):
+        metrics.inc('valuation_batches')
+        metrics.inc('valuation_batch_rows', len(batch))
+        metrics.set_gauge('valuation_last_batch_size', len(batch))
+        try:
+            with metrics.timer('valuation_batch'):
+                records = self._score_records([listing for listing, _, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            # Score each listing on its own so only the bad one fails
+            metrics.inc('valuation_batch_fallbacks')
+            for listing, future, _ in batch:
+                try:
+                    future.set_result(self._score_records([listing])[0])
+                except Exception as e:
+                    future.set_exception(e)
+            return
+        for (_, future, _), record in zip(batch, records):
+            future.set_result(record)
+
+    def _score_records(self, listings):
+        scored = self.score_fn(pd.DataFrame(listings))
+        # NaN -> null and timestamps -> ISO strings, once per batch
+        return json.loads(scored.to_json(orient='records', date_format='iso'))
+
+
+class EnrichmentQueue:
+    """
+    Runs LLM repair estimates in the background and keeps the last
+    `max_results` outcomes for polling.
+    """
+    def __init__(self, evaluator, max_workers=4, max_results=10000):
+        self.evaluator = evaluator
+        self.max_results = max_results
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="valuation-llm")
+
+    def submit(self, row):
+        enrichment_id = uuid.uuid4().hex
+        self._store(enrichment_id, {'status': 'pending', 'result': None})
+        self._executor.submit(self._enrich, enrichment_id, dict(row))
+        return enrichment_id
+
+    def get(self, enrichment_id):
+        with self._lock:
+            return self._results.get(enrichment_id)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        cache = getattr(self.evaluator, 'cache', None)
+        if cache is not None:
+            cache.flush()
+
+    def _enrich(self, enrichment_id, row):
+        try:
+            with metrics.timer('valuation_enrichment'):
+                estimate = self.evaluator.evaluate_property(row)
+            result = apply_repair_estimate(row, estimate)
+            if 'repair_source' in result:
+                result['repair_source'] = 'llm'
+            self._store(enrichment_id, {'status': 'done', 'result': result})
+        except Exception as e:
+            print(f"  -> Enrichment {enrichment_id} failed: {e}")
+            self._store(enrichment_id, {'status': 'failed', 'error': str(e), 'result': None})
+
+    def _store(self, enrichment_id, outcome):
+        with self._lock:
+            self._results[enrichment_id] = outcome
+            self._results.move_to_end(enrichment_id)
+            while len(self._results) > self.max_results:
+                self._results.popitem(last=False)
+
+
+class ValuationService:
+    def __init__(self, engine, store=None, llm_evaluator=None, max_batch_size=64, max_wait_seconds=0.005,
+                 llm_concurrency=4, request_timeout=30.0):
+        """
+        `engine` must already be trained (or have a snapshot to load). Without
+        an llm_evaluator, enrichment requests are rejected.
+        """
+        engine.ensure_trained()
+        self.engine = engine
+        self.store = store
+        self.request_timeout = request_timeout
+        self.batcher = MicroBatcher(engine.prescreen_candidates, max_batch_size=max_batch_size,
+                                    max_wait_seconds=max_wait_seconds)
+        self.enrichment = EnrichmentQueue(llm_evaluator, max_workers=llm_concurrency) if llm_evaluator else None
+        self._server = None
+
+    def valuate(self, payload, enrich=False):
+        """
+        Score the listings in a request payload. Returns the response body.
+        """
+        if isinstance(payload, dict) and 'listings' in payload:
+            requested = payload['listings']
+        elif isinstance(payload, dict) and 'listing' in payload:
+            requested = [payload['listing']]
+        else:
+            requested = payload if isinstance(payload, list) else [payload]
+        if not requested:
+            raise ValueError("No listings in request")
+        enrich = enrich or (isinstance(payload, dict) and bool(payload.get('enrich')))
+        if enrich and self.enrichment is None:
+            raise ValueError("LLM enrichment is disabled on this service")
+
+        listings = [prepare_listing(listing, self.store) for listing in requested]
+        futures = self.batcher.submit(listings)
+        results = [future.result(timeout=self.request_timeout) for future in futures]
+        for row in results:
+            # Like evaluate_candidates, only listings the pre-screen left undecided go to the LLM
+            if enrich and row.get('repair_source') is None and not row.get('prescreen_disqualified'):
+                enrichment_id = self.enrichment.submit(row)
+                row['enrichment_id'] = enrichment_id
+                row['enrichment_url'] = f"/enrichment/{enrichment_id}"
+        metrics.inc('valuations', len(results))
+        return {'results': results}
+
+    def health(self):
+        return {
+            'status': 'ok',
+            'snapshot_key': self.engine.snapshot_key,
+            'scoring_key': self.engine.scoring_key(),
+            'queue_depth': self.batcher.queue_depth(),
+            'enrichment': self.enrichment is not None,
+        }
+
+    def serve(self, host="127.0.0.1", port=8765):
+        """
+        Serve until shutdown() (or Ctrl+C). Each connection gets its own thread;
+        scoring itself stays on the batcher's worker.
+        """
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        print(f"Valuation service listening on http://{host}:{self._server.server_address[1]}")
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+            self.close()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+
+    def close(self):
+        self.batcher.close()
+        if self.enrichment is not None:
+            self.enrichment.close()
+
+
+def _handler_for(service):
+    class ValuationHandler(BaseHTTPRequestHandler):
+        # Keep-alive, so agents do not pay a TCP handshake per valuation
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path != '/valuate':
+                return self._send_json(404, {'error': f"Unknown path {url.path}"})
+            length = int(self.headers.get('Content-Length') or 0)
+            if length > MAX_BODY_BYTES:
+                return self._send_json(413, {'error': "Request body too large"})
+            try:
+                payload = json.loads(self.rfile.read(length) or b'null')
+            except json.JSONDecodeError as e:
+                return self._send_json(400, {'error': f"Invalid JSON: {e}"})
+
+            enrich = parse_qs(url.query).get('enrich', ['0'])[0].lower() in ('1', 'true', 'yes')
+            started = time.perf_counter()
+            try:
+                with metrics.timer('valuation_request'):
+                    body = service.valuate(payload, enrich=enrich)
+            except ValueError as e:
+                metrics.inc('valuation_requests', status=400)
+                return self._send_json(400, {'error': str(e)})
+            except Exception as e:
+                metrics.inc('valuation_requests', status=500)
+                print(f"  -> Valuation failed: {e!r}")
+                return self._send_json(500, {'error': "Valuation failed"})
+            metrics.inc('valuation_requests', status=200)
+            body['elapsed_ms'] = (time.perf_counter() - started) * 1000
+            self._send_json(200, body)
+
+        def do_GET(self):
+            path = urlparse(self.path).path
+            if path == '/health':
+                return self._send_json(200, service.health())
+            if path == '/metrics':
+                return self._send_text(200, metrics.to_prometheus())
+            if path.startswith('/enrichment/'):
+                outcome = service.enrichment.get(path.rsplit('/', 1)[-1]) if service.enrichment else None
+                if outcome is None:
+                    return self._send_json(404, {'error': "Unknown enrichment id"})
+                return self._send_json(200, outcome)
+            self._send_json(404, {'error': f"Unknown path {path}"})
+
+        def _send_json(self, status, body):
+            self._send_text(status, json.dumps(body), content_type='application/json')
+
+        def _send_text(self, status, text, content_type='text/plain; version=0.0.4'):
+            encoded = text.encode()
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(encoded)))
+            self.end_headers()
+            self.wfile.write(encoded)
+
+        def log_message(self, format, *args):
+            # Per-request access logs would dominate the output; /metrics has the counts
+            pass
+
+    return ValuationHandler
+
+
+def main(argv=None):
+    from dotenv import load_dotenv
+
+    from engine.discovery_engine import UndervaluationEngine
+    from engine.listing_store import ListingStore
+    from engine.llm_cache import LLMResponseCache
+    from engine.llm_evaluator import LLMPropertyEvaluator
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="main.py serve", description="Serve on-demand valuations over HTTP")
+    parser.add_argument("--host", default=os.getenv("VALUATION_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("VALUATION_PORT", "8765")))
+    parser.add_argument("--data", default="data/housing_data_tampa.csv", help="Training history (CSV or columnar)")
+    parser.add_argument("--snapshot-dir", default=os.getenv("MODEL_SNAPSHOT_DIR", "data/model_snapshots"))
+    parser.add_argument("--listing-store", default=os.getenv("LISTING_STORE_PATH", "data/listings.db"),
+                        help="Daemon listing store for address/house_id lookups ('' to disable)")
+    parser.add_argument("--batch-size", type=int, default=64, help="Most listings per predict call")
+    parser.add_argument("--batch-wait-ms", type=float, default=5.0,
+                        help="How long a batch waits for more requests before scoring")
+    parser.add_argument("--no-llm", action="store_true", help="Disable the optional LLM enrichment")
+    parser.add_argument("--llm-concurrency", type=int, default=int(os.getenv("LLM_CONCURRENCY", "4")))
+    args = parser.parse_args(argv)
+
+    metrics.configure(enabled=True)
+    llm_evaluator = None
+    if not args.no_llm:
+        llm_evaluator = LLMPropertyEvaluator(cache=LLMResponseCache(
+            path=os.getenv("LLM_CACHE_PATH", "data/llm_cache.json"),
+            ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        ))
+    engine = UndervaluationEngine.from_env(args.data, snapshot_dir=args.snapshot_dir, llm_evaluator=llm_evaluator)
+    engine.run_pipeline(n_jobs=int(os.getenv("TRAINING_N_JOBS", "1")))
+
+    store = ListingStore(args.listing_store) if args.listing_store and os.path.exists(args.listing_store) else None
+    service = ValuationService(engine, store=store, llm_evaluator=llm_evaluator,
+                               max_batch_size=args.batch_size, max_wait_seconds=args.batch_wait_ms / 1000,
+                               llm_concurrency=args.llm_concurrency)
+    service.serve(args.host, args.port)
+    if store is not None:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,252 +1,119 @@
-from engine.discovery_engine import UndervaluationEngine
-from engine.api_client import RentCastClient
-import pandas as pd
-import numpy as np
-import requests
-import json
-import time
-from datetime import datetime
-
+"""
+House Discovery Engine command line.
+
+Each subcommand imports its module only when it runs, so e.g. `savings`
+never loads sklearn or the OpenAI SDK. With no subcommand the daemon runs,
+as before.
+
+    python main.py                      # same as `python main.py daemon`
+    python main.py score INPUT -o OUTPUT
+    python main.py serve --port 8765
+    python main.py analyze --salary 85000 --cash 5000
+    python main.py savings
+    python main.py generate --houses 5000
+    python main.py profile-imports      # cold import time of every subcommand
+
+`python main.py COMMAND --help` shows a subcommand's options.
+"""
+import argparse
+import importlib
 import os
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# You can move this to config.py later if you prefer
-DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "https://discord.com/api/webhooks/1475344856501981294/U1Ayd3EJAQuLzA5AWsRZOIsUiVQ6Ken9JjQxMIC2Q8o5-9MrPn5RsLQgoHydG2VGQv5i")
-
-def print_financial_advice():
-    print("\n" + "="*50)
-    print("FINANCIAL ADVICE: EQUITY VS. SUNK COSTS")
-    print("="*50)
-    print("1. HOUSE EQUITY: Principal payments are RECOVERABLE wealth.")
-    print("2. HOA FEES: These are SUNK COSTS (like rent) that never return.")
-    print("3. BUYING POWER LOSS: Every $1 in HOA fee reduces your potential")
-    print("   mortgage principal by ~$150. A $500 HOA fee 'costs' you")
-    print("   roughly $75,000 in home-buying power.")
-    print("\nPRO TIP: Focus on 'Alpha' homes with LOW or NO HOA fees to")
-    print("maximize the ratio of wealth-building to sunk-cost spending.")
-
-def send_discord_alert(gem_df, is_new_champ=False, reason=""):
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Subcommand -> (module with a main(argv) function, help)
+COMMANDS = {
+    'daemon': ('engine.daemon', "Scan the market on a schedule, re-score, enrich and alert (default)"),
+    'score': ('engine.bulk_scoring', "Re-score a large listing export offline"),
+    'serve': ('engine.valuation_service', "Serve on-demand valuations over HTTP"),
+    'analyze': ('analyze_finances', "Financing analysis of the exported winners"),
+    'savings': ('calculate_savings', "Savings timeline to each winner's down payment"),
+    'generate': ('data.generator', "Generate synthetic historical housing data"),
+}
+
+# `python -X importtime` lines: "import time: <self us> | <cumulative us> | <indented module>"
+IMPORT_TIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def load_dotenv_if_available():
     """
-    Sends a formatted alert to Discord for the Champion property.
+    Read .env before any subcommand module reads its settings at import time.
     """
-    if not DISCORD_WEBHOOK_URL:
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
         return
+    load_dotenv()
 
-    row = gem_df.iloc[0] # We only send the top 1
-
-    # Format the numbers
-    price_str = f"${row['price']:,.0f}"
-    market_val_str = f"${row['predicted_price']:,.0f}"
-    alpha_str = f"{row['undervaluation_pct']:.1f}%"
-    mortgage_str = f"${row['monthly_mortgage']:,.0f}/mo"
-    hoa_str = f"${row['hoa_fee']:,.0f}/mo"
-    tax_ins_str = f"${row.get('monthly_tax_ins', 0):,.0f}/mo"
-    total_monthly = row['total_monthly_cost']
-    total_str = f"${total_monthly:,.0f}/mo"
-
-    mortgage_rate = float(os.getenv("MORTGAGE_INTEREST_RATE", "0.06"))
-    mortgage_rate_pct = f"{mortgage_rate * 100:g}%"
-
-    title_prefix = "💎"
-    embed = {
-        "title": f"{title_prefix} {alpha_str} Undervalued",
-        "description": f"The #1 Best Deal currently on the market in Tampa ({row['neighborhood_name']})!\n{reason}\n*Evaluated at 100% Debt Financing ({mortgage_rate_pct} Market Rate)*",
-        "color": 5814783, # A nice green color
-        "fields": [
-            {"name": "Address", "value": row['address'], "inline": False},
-            {"name": "Listed Price", "value": price_str, "inline": True},
-            {"name": "AI Fair Value", "value": market_val_str, "inline": True},
-            {"name": "Alpha Score", "value": alpha_str, "inline": True},
-            {"name": f"Est. Mortgage ({mortgage_rate_pct})", "value": mortgage_str, "inline": True},
-            {"name": "HOA Fee", "value": hoa_str, "inline": True},
-            {"name": "Taxes & Ins.", "value": tax_ins_str, "inline": True},
-            {"name": "TOTAL Carrying Cost", "value": f"**{total_str}**", "inline": True},
-            {"name": "LLM Repair Est.", "value": f"${row.get('llm_repair_estimate', 0):,.0f}", "inline": True},
-            {"name": "LLM Reasoning", "value": str(row.get('llm_reasoning', 'N/A')), "inline": False}
-        ],
-        "footer": {"text": "Undervalued Home Discovery Engine • Continuous Scanner"}
-    }
-
-    payload = {
-        "content": f"🏆 **New Champion Alert** in {row['neighborhood_name']}! ({row['address']} for {price_str})",
-        "embeds": [embed]
-    }
 
-    try:
-        response = requests.post(DISCORD_WEBHOOK_URL, json=payload)
-        if response.status_code == 204:
-            print(f"  -> Successfully sent Discord alert for {row['address']}")
-        else:
-            print(f"  -> Failed to send Discord alert: {response.status_code} - {response.text}")
-    except Exception as e:
-        print(f"  -> Error sending Discord alert: {e}")
-    
-    # Sleep slightly to avoid Discord rate limits
-    time.sleep(1)
-
-
-
-CHAMPION_FILE = "data/current_champion.json"
-
-def load_champion():
-    if os.path.exists(CHAMPION_FILE):
-        try:
-            with open(CHAMPION_FILE, 'r') as f:
-                data = json.load(f)
-                return data.get('house_id')
-        except:
-            return None
-    return None
-
-def save_champion(house_id):
-    # Ensure data directory exists
-    os.makedirs("data", exist_ok=True)
-    with open(CHAMPION_FILE, 'w') as f:
-        json.dump({'house_id': house_id}, f)
-
-def main():
-    print("="*50)
-    print("HOUSE DISCOVERY ENGINE: DAEMON MODE STARTING")
-    print("="*50)
-    
-    # 1. Initialize & Train (Done ONCE)
-    print(f"[{datetime.now().strftime('%H:%M:%S')}] Booting Engine & Training Memory Models...")
-    historical_data_path = "data/housing_data_tampa.csv"
-    engine = UndervaluationEngine(data_path=historical_data_path)
-    engine.run_pipeline()
-    
-    
-    rentcast_api_key = os.getenv("RENTCAST_API_KEY", "8efdc915106b4bce818b259f9af58484")
-    # Forcing Mock Data fallback because the RentCast Free API returns only stale >200 day inventory first.
-    client = RentCastClient("")
-    
-    # State tracking
-    seen_house_ids = set()
-    
-    # Load champion from persistent storage so Railway restarts don't trigger duplicate alerts
-    current_champion_id = load_champion()
-    if current_champion_id:
-        print(f"Successfully loaded previous champion from memory: {current_champion_id}")
-    
-    # SECURITY: The RentCast Free Tier only allows 50 requests per month.
-    # To stay safe, we scan once every 15 hours. 
-    # (30 days * 24 hours / 15 = 48 requests/month)
-    scan_interval_seconds = 60 * 60 * 15
-    
-    print("\n==================================================")
-    print("DAEMON ONLINE: Scanning market for the Champion Home")
-    print("==================================================")
-    
-    while True:
-        try:
-            timestamp = datetime.now().strftime('%H:%M:%S')
-            print(f"\n[{timestamp}] Fetching latest active listings...")
-            
-            # 2. Fetch Live Candidates
-            live_listings_df = client.fetch_listings(city="Tampa", state="FL", limit=500) # Deeper Pagination around stale stock
-            
-            if live_listings_df.empty:
-                print(f"[{timestamp}] No active listings returned by API. Sleeping...")
-                time.sleep(scan_interval_seconds)
-                continue
-                
-            # Track newly found listings for logging purposes
-            new_listings_df = live_listings_df[~live_listings_df['house_id'].isin(seen_house_ids)]
-            if not new_listings_df.empty:
-                print(f"[{timestamp}] Found {len(new_listings_df)} NEW listings. Evaluating total market...")
-                seen_house_ids.update(new_listings_df['house_id'].tolist())
-            else:
-                print(f"[{timestamp}] Scanned {len(live_listings_df)} listings. 0 new. Re-evaluating market...")
-            
-            # 3. Evaluate mathematical candidates and run OpenAI on the Top 10 to find the current Champion
-            evaluated_df = engine.evaluate_candidates(live_listings_df, top_n=10)
-            
-            if evaluated_df.empty:
-                print(f"[{timestamp}] Evaluated properties but result was empty. Sleeping...")
-                time.sleep(scan_interval_seconds)
-                continue
-
-            current_best = evaluated_df.iloc[0]
-            best_id = current_best['house_id']
-            
-            if current_champion_id is None:
-                # First run - Establish initial champion
-                current_champion_id = best_id
-                save_champion(best_id)
-                print("\n" + "🏆"*20)
-                print(f"INITIAL MARKET CHAMPION ESTABLISHED: {current_best['address']}")
-                print("🏆"*20)
-                reason = "_Initial Scan - Best property currently available._"
-                send_discord_alert(evaluated_df.head(1), is_new_champ=True, reason=reason)
-                
-            elif best_id != current_champion_id:
-                # Champion changed!
-                print("\n" + "🏆"*20)
-                print(f"CHAMPION OVERTHROWN!")
-                print("🏆"*20)
-                
-                if current_champion_id not in live_listings_df['house_id'].values:
-                    reason = "*Previous champion sold/delisted - falling to next in line.*"
-                else:
-                    reason = "*New property dethroned the previous champion!*"
-                
-                print(f"Reason: {reason}")
-                print(f"New Champion: {current_best['address']} (Alpha: {current_best['undervaluation_pct']:.1f}%)")
-                
-                current_champion_id = best_id
-                save_champion(best_id)
-                send_discord_alert(evaluated_df.head(1), is_new_champ=True, reason=reason)
-                
-            else:
-                print(f"[{timestamp}] Champion holding strong: {current_best['address']} (Alpha: {current_best['undervaluation_pct']:.1f}%)")
-
-            # Always save the Top 10 Leaderboard to a JSON file (Information Engine Feature)
-            top_10_df = evaluated_df.head(10).copy()
-            # Convert datetime columns to string before exporting to JSON
-            if 'date' in top_10_df.columns:
-                 top_10_df['date'] = top_10_df['date'].astype(str)
-                 
-            top_10_json_path = "data/top_10_winners.json"
-            top_10_df.to_json(top_10_json_path, orient='records', indent=4)
-            print(f"[{timestamp}] Top 10 Leaderboard saved to {top_10_json_path}")
-
-            # Always print the current champion stats to terminal just so we can see it
-            mortgage_rate = float(os.getenv("MORTGAGE_INTEREST_RATE", "0.06"))
-            mortgage_rate_pct = f"{mortgage_rate * 100:g}%"
-
-            display_df = evaluated_df.head(1)[['address', 'neighborhood_name', 'price', 'predicted_price', 'total_monthly_cost', 'undervaluation_pct', 'llm_repair_estimate']]
-            display_df = display_df.rename(columns={
-                'address': 'Address',
-                'neighborhood_name': 'Zip/Area',
-                'price': 'Listed Price',
-                'predicted_price': 'Market Val',
-                'total_monthly_cost': 'Total Cost/mo',
-                'undervaluation_pct': 'Alpha %',
-                'llm_repair_estimate': 'Repair Est'
-            })
-            
-            cols_to_format = ['Listed Price', 'Market Val', 'Total Cost/mo']
-            for col in cols_to_format:
-                display_df[col] = display_df[col].map('${:,.0f}'.format)
-            
-            print("\nLeaderboard (Current Champion):")
-            print(display_df.to_string(index=False))
-            print(f"\nLLM Reasoning: {evaluated_df.iloc[0].get('llm_reasoning', 'N/A')}")
-            print_financial_advice()
-                
-            # Sleep until next cycle
-            time.sleep(scan_interval_seconds)
-            
-        except KeyboardInterrupt:
-            print("\nShutting down discovery daemon. Goodbye!")
-            break
-        except Exception as e:
-            print(f"\n[{datetime.now().strftime('%H:%M:%S')}] ERROR during scan cycle: {e}")
-            print(f"Retrying in {scan_interval_seconds} seconds...")
-            time.sleep(scan_interval_seconds)
+def profile_import(module):
+    """
+    Import `module` in a fresh interpreter under `-X importtime`. Returns
+    (total_ms, {top-level package: ms spent importing it}).
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=REPO_ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    total_us = 0
+    packages = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = int(match[1]), int(match[2]), match[3], match[4]
+        packages[name.split('.')[0]] = packages.get(name.split('.')[0], 0) + self_us
+        if not indent and name == module:
+            total_us = cumulative_us
+    return total_us / 1000, {name: us / 1000 for name, us in packages.items()}
+
+
+def profile_imports(argv):
+    parser = argparse.ArgumentParser(prog="main.py profile-imports",
+                                     description="Cold import time of the CLI and each subcommand's module")
+    parser.add_argument("commands", nargs='*', metavar="COMMAND",
+                        help=f"Subcommands to profile (default: all of {', '.join(COMMANDS)})")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest packages listed per command")
+    parser.add_argument("--max-ms", type=float,
+                        help="Exit with an error if any profiled import takes longer (for CI)")
+    args = parser.parse_args(argv)
+    unknown = [command for command in args.commands if command not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown command(s) {', '.join(unknown)}; expected any of {', '.join(COMMANDS)}")
+
+    targets = [('cli', 'main')] + [(command, COMMANDS[command][0]) for command in args.commands or COMMANDS]
+    print(f"{'command':10s} {'module':26s} {'import ms':>10s}  heaviest packages")
+    too_slow = []
+    for command, module in targets:
+        total_ms, packages = profile_import(module)
+        heaviest = sorted(packages.items(), key=lambda item: -item[1])[:args.top]
+        print(f"{command:10s} {module:26s} {total_ms:10.0f}  "
+              + ", ".join(f"{name} {ms:.0f}" for name, ms in heaviest))
+        if args.max_ms is not None and total_ms > args.max_ms:
+            too_slow.append(command)
+    if too_slow:
+        raise SystemExit(f"Import time over {args.max_ms:.0f} ms: {', '.join(too_slow)}")
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    parser = argparse.ArgumentParser(
+        prog="main.py", description="House Discovery Engine",
+        epilog="Commands: " + "; ".join(f"{name}: {help}" for name, (_, help) in COMMANDS.items())
+               + "; profile-imports: cold import time of every subcommand"
+    )
+    parser.add_argument("command", nargs='?', default='daemon', choices=list(COMMANDS) + ['profile-imports'])
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="Arguments for the command")
+    args = parser.parse_args(argv)
+
+    if args.command == 'profile-imports':
+        return profile_imports(args.args)
+    load_dotenv_if_available()
+    return importlib.import_module(COMMANDS[args.command][0]).main(args.args)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,17 @@
+import pandas as pd
+import pytest
+
+HISTORY_PATH = "data/housing_data_tampa.csv"
+
+
+@pytest.fixture(scope="session")
+def history():
+    return pd.read_csv(HISTORY_PATH)
+
+
+@pytest.fixture(scope="session")
+def latest_listings(history):
+    """
+    The latest sale of every house, scored as if it were a live listing.
+    """
+    return history.sort_values('date').groupby('house_id').tail(1).reset_index(drop=True)
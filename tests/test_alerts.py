@@ -0,0 +1,152 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import pytest
+
+from engine.alerts import AlertDispatcher, make_alert
+from engine import daemon
+from engine.daemon import DaemonState, alert_step, build_champion_alert, load_champion_record
+from engine.http_transport import HttpTransport
+
+
+class WebhookStandIn:
+    """
+    Local webhook that records every post and answers with scripted
+    (status, headers) responses, then 204 once the script runs out.
+    """
+    def __init__(self):
+        self.posts = []
+        self.script = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                stand_in.posts.append((time.monotonic(), json.loads(body)))
+                status, headers = stand_in.script.pop(0) if stand_in.script else (204, {})
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/webhook"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def webhook():
+    stand_in = WebhookStandIn()
+    yield stand_in
+    stand_in.close()
+
+
+def dispatcher_for(webhook, queue_path=None, max_retries=3, **kwargs):
+    transport = HttpTransport(pool_size=1, timeout=5, max_retries=max_retries, backoff_seconds=0.01)
+    return AlertDispatcher(webhook.url, transport=transport, queue_path=queue_path, start=False, **kwargs)
+
+
+def alert(n):
+    return make_alert(f"test:{n}", f"alert {n}", {'title': f"alert {n}"})
+
+
+def test_429_retry_after_is_honored(webhook):
+    webhook.script = [(429, {'Retry-After': '0.3'})]
+    dispatcher = dispatcher_for(webhook)
+    dispatcher.enqueue(alert(1))
+    assert dispatcher.deliver_pending()
+    assert len(webhook.posts) == 2
+    assert webhook.posts[1][0] - webhook.posts[0][0] >= 0.3
+    assert dispatcher.pending_count() == 0
+    dispatcher.close()
+
+
+def test_undelivered_alerts_survive_a_restart(webhook, tmp_path):
+    queue_path = str(tmp_path / "pending_alerts.json")
+    webhook.script = [(503, {})]
+    first = dispatcher_for(webhook, queue_path=queue_path, max_retries=0)
+    first.enqueue(alert(1))
+    assert not first.deliver_pending()
+    first.close()
+
+    second = dispatcher_for(webhook, queue_path=queue_path)
+    assert second.pending_count() == 1
+    assert second.deliver_pending()
+    assert webhook.posts[-1][1]['content'] == "alert 1"
+    second.close()
+
+    # Delivered keys are persisted too, so a third start still drops the duplicate
+    third = dispatcher_for(webhook, queue_path=queue_path)
+    assert not third.enqueue(alert(1))
+    third.close()
+
+
+def test_duplicate_keys_are_dropped_while_pending_and_after_delivery(webhook):
+    dispatcher = dispatcher_for(webhook)
+    assert dispatcher.enqueue(alert(1))
+    assert not dispatcher.enqueue(alert(1))
+    assert dispatcher.deliver_pending()
+    assert not dispatcher.enqueue(alert(1))
+    assert len(webhook.posts) == 1
+    dispatcher.close()
+
+
+def test_alerts_queued_together_share_one_post(webhook):
+    transport = HttpTransport(pool_size=1, timeout=5, max_retries=0)
+    dispatcher = AlertDispatcher(webhook.url, transport=transport, queue_path=None, batch_window_seconds=0.3)
+    for n in range(3):
+        dispatcher.enqueue(alert(n))
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    assert len(webhook.posts) == 1
+    assert len(webhook.posts[0][1]['embeds']) == 3
+
+
+CHAMPION = pd.Series({'house_id': 'TPA_1', 'price': 300000, 'predicted_price': 350000, 'undervaluation_pct': 5.0,
+                      'monthly_mortgage': 1800, 'hoa_fee': 0, 'monthly_tax_ins': 300, 'total_monthly_cost': 2100,
+                      'neighborhood_name': '33629', 'address': '1 Main St', 'llm_repair_estimate': 0,
+                      'llm_reasoning': "fake"})
+
+
+def test_champion_alert_key_depends_only_on_content():
+    first = build_champion_alert(CHAMPION, reign=3)
+    assert build_champion_alert(CHAMPION, reign=3)['key'] == first['key']
+    # Regaining the top spot is a new reign, so it is announced again
+    assert build_champion_alert(CHAMPION, reign=5)['key'] != first['key']
+    assert build_champion_alert(CHAMPION.copy().replace({300000: 290000}), reign=3)['key'] != first['key']
+
+
+def test_regained_champion_is_announced_and_restart_is_not(webhook, tmp_path, monkeypatch):
+    monkeypatch.setattr(daemon, "CHAMPION_FILE", str(tmp_path / "current_champion.json"))
+    dispatcher = dispatcher_for(webhook, queue_path=str(tmp_path / "pending_alerts.json"))
+    state = DaemonState(None, None, None, None, alerts=dispatcher)
+    challenger = CHAMPION.copy()
+    challenger['house_id'] = 'TPA_2'
+    for row in (CHAMPION, challenger, CHAMPION):
+        state.evaluated_df = pd.DataFrame([row])
+        state.listings_df = pd.DataFrame({'house_id': ['TPA_1', 'TPA_2']})
+        alert_step(state)
+        assert dispatcher.deliver_pending()
+    assert len(webhook.posts) == 3
+
+    # A restart reloads the champion and its reign instead of crowning it again
+    record = load_champion_record()
+    restarted = DaemonState(None, None, None, None, champion_id=record['house_id'], alerts=dispatcher,
+                            champion_reign=record['reign'])
+    restarted.evaluated_df = pd.DataFrame([CHAMPION])
+    alert_step(restarted)
+    assert dispatcher.pending_count() == 0
+    # Re-queuing the last alert, as a replay would, is deduplicated
+    assert not dispatcher.enqueue(build_champion_alert(CHAMPION, reign=record['reign']))
+    dispatcher.close()
@@ -0,0 +1,13 @@
+import pandas as pd
+
+from engine.discovery_engine import UndervaluationEngine
+
+
+def test_batched_scoring_matches_the_row_wise_loop(history, latest_listings):
+    engine = UndervaluationEngine(data=history)
+    engine.run_pipeline(n_jobs=1, use_snapshot=False)
+
+    batched = engine.score_candidates(latest_listings)
+    rowwise = engine.score_candidates(latest_listings, batch_scoring=False)
+
+    pd.testing.assert_frame_equal(batched, rowwise, check_exact=False, rtol=1e-9)
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+import pandas as pd
+
+from data.generator import generate_synthetic_data
+
+END_DATE = datetime(2026, 1, 1)
+
+
+def test_same_seed_generates_the_same_history():
+    first = generate_synthetic_data(num_houses=300, seed=7, chunk_houses=100, end_date=END_DATE)
+    second = generate_synthetic_data(num_houses=300, seed=7, chunk_houses=100, end_date=END_DATE)
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_different_seeds_generate_different_histories():
+    first = generate_synthetic_data(num_houses=300, seed=7, end_date=END_DATE)
+    second = generate_synthetic_data(num_houses=300, seed=8, end_date=END_DATE)
+    assert not first['price'].equals(second['price'])
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from engine.llm_cache import LLMResponseCache
+from engine.llm_evaluator import LLMPropertyEvaluator
+
+LISTING = {'address': '1 Main St', 'price': 250000, 'sqft': 1400, 'beds': 3, 'baths': 2, 'year_built': 1980,
+           'days_on_market': 20, 'property_type': 'Single Family', 'description': 'Needs TLC.'}
+
+
+@pytest.fixture
+def evaluator(tmp_path):
+    evaluator = LLMPropertyEvaluator(api_key="test-key", cache=LLMResponseCache(path=str(tmp_path / "cache.json")))
+    evaluator.requests = []
+
+    def fake_request(property_data):
+        evaluator.requests.append(property_data)
+        return {'repair_cost_estimate': 1000 * len(evaluator.requests), 'reasoning': "fake"}
+
+    evaluator._request_estimate = fake_request
+    return evaluator
+
+
+def test_repeat_question_is_served_from_cache(evaluator):
+    first = evaluator.evaluate_properties([LISTING])
+    second = evaluator.evaluate_properties([dict(LISTING)])
+    assert second == first
+    assert len(evaluator.requests) == 1
+
+
+@pytest.mark.parametrize("change", [{'price': 240000}, {'description': "Turnkey, fully renovated."}])
+def test_price_or_description_change_misses_cache(evaluator, change):
+    evaluator.evaluate_properties([LISTING])
+    evaluator.evaluate_properties([{**LISTING, **change}])
+    assert len(evaluator.requests) == 2
+
+
+def test_set_defers_disk_write_until_flush(evaluator, tmp_path):
+    path = tmp_path / "cache.json"
+    evaluator.evaluate_property(LISTING)
+    assert not path.exists()
+
+    evaluator.evaluate_properties([{**LISTING, 'price': 1}, {**LISTING, 'price': 2}], max_concurrency=2)
+    assert len(json.loads(path.read_text())['entries']) == 3
+
+    reloaded = LLMResponseCache(path=str(path))
+    assert len(reloaded) == 3
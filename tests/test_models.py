@@ -0,0 +1,17 @@
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+from sklearn.preprocessing import StandardScaler
+
+from engine.models import BaselineRegressor
+
+
+def test_default_baseline_is_the_scaled_random_forest(history):
+    X = history[['sqft', 'beds', 'baths']].fillna(0).to_numpy()
+    y = history['price'].to_numpy()
+
+    # The production baseline as it was before backends were pluggable
+    scaler = StandardScaler()
+    forest = RandomForestRegressor(n_estimators=100, random_state=42).fit(scaler.fit_transform(X), y)
+
+    baseline = BaselineRegressor().fit(X, y)
+    np.testing.assert_array_equal(baseline.predict(X), forest.predict(scaler.transform(X)))
@@ -0,0 +1,18 @@
+import numpy as np
+
+from engine.discovery_engine import UndervaluationEngine
+
+
+def test_process_pool_fit_matches_serial_fit(history, latest_listings, monkeypatch):
+    serial = UndervaluationEngine(data=history)
+    serial.run_pipeline(n_jobs=1, use_snapshot=False)
+
+    # n_jobs is capped at the CPU count; pretend there are two so the pool path runs
+    monkeypatch.setattr("engine.discovery_engine.os.cpu_count", lambda: 2)
+    parallel = UndervaluationEngine(data=history)
+    parallel.run_pipeline(n_jobs=2, use_snapshot=False)
+
+    assert list(parallel.local_models) == list(serial.local_models)
+    expected = serial.score_candidates(latest_listings)['predicted_price'].to_numpy()
+    actual = parallel.score_candidates(latest_listings)['predicted_price'].to_numpy()
+    np.testing.assert_array_equal(actual, expected)
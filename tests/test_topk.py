@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from engine.topk import TopKSelector
+
+
+def test_streamed_group_survivors_match_a_full_sort():
+    rng = np.random.default_rng(7)
+    n = 5000
+    frame = pd.DataFrame({'zip': rng.integers(0, 40, n).astype(str), 'row': np.arange(n)})
+    frame.loc[::13, 'zip'] = None
+    scores = np.round(rng.normal(size=n), 1)
+    scores[::11] = np.nan
+
+    selector = TopKSelector(10, 'zip', 3)
+    for start in range(0, n, 700):
+        selector.add(frame.iloc[start:start + 700], scores[start:start + 700])
+
+    # Reference: best 3 per zip by score, earlier rows winning ties; rows with no zip are left out
+    ranked = frame.assign(score=scores).dropna(subset=['zip', 'score'])
+    ranked = ranked.sort_values(['zip', 'score', 'row'], ascending=[True, False, True], kind='stable')
+    expected = ranked.groupby('zip', sort=False).head(3)
+    actual = selector.group_frame()
+    assert actual['row'].tolist() == expected['row'].tolist()
+
+    expected_top = frame.assign(score=scores).dropna(subset=['score'])
+    expected_top = expected_top.sort_values(['score', 'row'], ascending=[False, True], kind='stable').head(10)
+    assert selector.to_frame()['row'].tolist() == expected_top['row'].tolist()
@@ -0,0 +1,93 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from engine.discovery_engine import UndervaluationEngine
+from engine.prescreen import PreScreen
+from engine.valuation_service import ValuationService, prepare_listing
+
+DESCRIPTIONS = [
+    "Turnkey, move-in ready with a new roof.",
+    "CASH ONLY investor special, sold as-is.",
+    "Needs TLC, bring your contractor.",
+    "Charming bungalow close to downtown.",
+    "",
+]
+
+# Columns a repair estimate rewrites
+REPAIR_DEPENDENT = ['predicted_price', 'fee_adjusted_value', 'undervaluation_amount', 'undervaluation_pct',
+                    'llm_repair_estimate', 'llm_reasoning', 'repair_source']
+
+
+class FixedEstimateEvaluator:
+    def evaluate_properties(self, rows, max_concurrency=4):
+        return [{'repair_cost_estimate': 12_000, 'reasoning': "Fixed test estimate"} for _ in rows]
+
+
+@pytest.fixture(scope="module")
+def engine(history):
+    engine = UndervaluationEngine(data=history, llm_evaluator=FixedEstimateEvaluator(),
+                                  prescreen=PreScreen(current_year=2026))
+    engine.run_pipeline(n_jobs=1, use_snapshot=False)
+    return engine
+
+
+@pytest.fixture(scope="module")
+def listings(latest_listings):
+    listings = latest_listings.head(40).copy()
+    listings['description'] = [DESCRIPTIONS[i % len(DESCRIPTIONS)] for i in range(len(listings))]
+    listings['year_built'] = 1990
+    listings['days_on_market'] = 20
+    listings['date'] = "2026-02-22"
+    return listings.to_dict('records')
+
+
+def test_service_matches_evaluate_candidates_minus_the_llm(engine, listings):
+    service = ValuationService(engine)
+    try:
+        served = pd.DataFrame(service.valuate({'listings': listings})['results'])
+    finally:
+        service.close()
+    evaluated = engine.evaluate_candidates(pd.DataFrame([prepare_listing(listing) for listing in listings]),
+                                           top_n=len(listings))
+    # Through the same JSON encoding as the service's response
+    evaluated = pd.DataFrame(json.loads(evaluated.to_json(orient='records', date_format='iso')))
+
+    assert list(served.columns) == list(evaluated.columns)
+    # Disqualified listings are flagged rather than dropped
+    assert len(served) == len(listings)
+    assert served['prescreen_disqualified'].sum() == len(listings) - len(evaluated)
+
+    served = served.set_index('house_id')
+    evaluated = evaluated.set_index('house_id')
+    for source, compared in (('prescreen', served.columns),
+                             ('llm', served.columns.difference(REPAIR_DEPENDENT))):
+        expected = evaluated[evaluated['repair_source'] == source]
+        assert len(expected)
+        actual = served.loc[expected.index, compared]
+        pd.testing.assert_frame_equal(actual, expected[compared], check_dtype=False, check_exact=False, rtol=1e-9)
+
+    # Listings left to the LLM are the pre-LLM valuation
+    llm_rows = evaluated[evaluated['repair_source'] == 'llm']
+    assert served.loc[llm_rows.index, 'repair_source'].isna().all()
+    np.testing.assert_allclose(served.loc[llm_rows.index, 'predicted_price'] - 12_000, llm_rows['predicted_price'])
+
+
+class OneListingStore:
+    def __init__(self, row):
+        self.row = row
+
+    def find_listing(self, house_id=None, address=None):
+        return dict(self.row)
+
+
+def test_stored_listing_is_valued_as_of_the_request(latest_listings):
+    stored = latest_listings.iloc[0].to_dict()
+    stored['date'] = "2024-01-05"
+    store = OneListingStore(stored)
+
+    today = pd.Timestamp.now().strftime('%Y-%m-%d')
+    assert prepare_listing({'house_id': stored['house_id']}, store)['date'] == today
+    assert prepare_listing({'house_id': stored['house_id'], 'date': "2025-06-01"}, store)['date'] == "2025-06-01"